@@ -0,0 +1,106 @@
+import argparse
+import sys
+
+from .harness import compare
+from .harness import load
+from .harness import run
+from .harness import save
+from .harness import size_reduction
+from .import_time import IMPORT_TIME_BUDGET
+from .import_time import measure_import_time
+from .workloads import get_workloads
+
+
+def _format_metric(metric, value):
+    if metric == "time":
+        return f"{value * 1000:.2f} ms"
+    return f"{value / 1024:.1f} KiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark rendering of the simplegraph graph types.",
+    )
+    parser.add_argument("--size", choices=("quick", "full"), default="quick")
+    parser.add_argument(
+        "--graph", choices=("categorical", "ribbon", "bubble"), action="append"
+    )
+    parser.add_argument(
+        "-k", "--filter", help="only run workloads with this in their name"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="save the results as JSON")
+    parser.add_argument(
+        "--compare", metavar="PATH", help="compare with results saved before"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change that counts as a regression (default 0.1)",
+    )
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_TIME_BUDGET,
+        help=f"seconds that importing simplegraph may take (default {IMPORT_TIME_BUDGET})",
+    )
+    args = parser.parse_args(argv)
+
+    status = 0
+    import_time, modules = measure_import_time()
+    print(f"{'import simplegraph':<50} {_format_metric('time', import_time):>12}")
+    if import_time > args.import_budget:
+        print(f"Importing simplegraph took longer than {args.import_budget} s.")
+        status = 1
+    if "matplotlib" in modules:
+        print("Importing simplegraph imported matplotlib.")
+        status = 1
+
+    workloads = [
+        workload
+        for workload in get_workloads(args.size)
+        if (not args.graph or workload.graph in args.graph)
+        and (not args.filter or args.filter in workload.name)
+    ]
+
+    def progress(name, result):
+        print(
+            f"{name:<50} {_format_metric('time', result['time']):>12} "
+            + f"{_format_metric('peak_memory', result['peak_memory']):>12} "
+            + f"{_format_metric('base64_peak_memory', result['base64_peak_memory']):>12} "
+            + f"{_format_metric('svg_bytes', result['svg_bytes']):>12} "
+            + f"{_format_metric('compact_bytes', result['compact_bytes']):>12}"
+        )
+
+    results = run(workloads, args.repeat, progress)
+
+    print()
+    for graph, (svg_bytes, compact_bytes) in size_reduction(workloads, results).items():
+        print(
+            f"{graph + ' compact output':<50} "
+            + f"{_format_metric('svg_bytes', svg_bytes)} -> "
+            + f"{_format_metric('compact_bytes', compact_bytes)} "
+            + f"({1 - compact_bytes / svg_bytes:.0%} smaller)"
+        )
+    if args.save:
+        save(results, args.save)
+
+    if args.compare:
+        rows = compare(load(args.compare), results, args.threshold)
+        print()
+        if not rows:
+            print("No changes beyond the threshold.")
+        for name, metric, old, new, change in rows:
+            print(
+                f"{change.upper():<12} {name:<50} {metric:<12} "
+                + f"{_format_metric(metric, old)} -> {_format_metric(metric, new)}"
+            )
+        if any(change == "regression" for *_, change in rows):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import argparse
+import math
+import random
+import re
+import statistics
+import sys
+import time
+
+from simplegraph import BubbleAndArrowGraph
+from simplegraph.arrows import arrow_paths
+from simplegraph.utils import DEFAULT_COLOR_PALETTE
+from simplegraph.utils import polar_to_cartesian
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:e[-+]?\d+)?")
+
+# Draw the largest arrows only, the rest in an other flow per bubble
+KEEP_FRACTION = 0.05
+
+
+def draw_arrow(x1, y1, x2, y2, cx, cy, backoff, width=1, start_offset=0):
+    """
+    Return the path data of one arrow. This is how arrows were drawn one by
+    one before arrow_paths, kept as the reference it is checked against.
+    """
+    circular_arrow = x1 == x2 and y1 == y2
+
+    arrow_head_length = max(10, width / 5)
+    direction_in = math.atan2(y2 - cy, x2 - cx)
+    direction_to_center = math.atan2(y1 - cy, x1 - cx)
+    distance_to_center = math.sqrt((x1 - cx) ** 2 + (y1 - cy) ** 2)
+    ctrl_distance = distance_to_center
+    interior_ctrl_distance = ctrl_distance - 2 * width
+
+    if circular_arrow:
+        # Self-pointing arrows emerge sideways
+        direction_mid = direction_to_center - math.pi / 2
+        direction_out = direction_to_center + 3 * math.pi / 4
+        direction_in += math.pi / 4
+    else:
+        direction_out = direction_to_center
+        direction_mid = math.atan2(y2 - y1, x2 - x1)
+
+    perpendicular = direction_mid + math.pi / 2
+    perpendicular_out = direction_out + math.pi / 2
+    perpendicular_in = direction_in + math.pi / 2
+    cx_offset, cy_offset = polar_to_cartesian(perpendicular, width / 2)
+    x_out_offset, y_out_offset = polar_to_cartesian(perpendicular_out, width / 2)
+    x_out_shift, y_out_shift = polar_to_cartesian(perpendicular_out, start_offset)
+    x_in_offset, y_in_offset = polar_to_cartesian(perpendicular_in, width / 2)
+
+    # Calculate backoff
+    backoff_x, backoff_y = polar_to_cartesian(direction_in, backoff)
+
+    # New position of x2, y2 after backoff
+    x2_backoff = x2 - backoff_x
+    y2_backoff = y2 - backoff_y
+
+    # Arrow head with respect to the original x2, y2, but positioned at the backoff location
+    x_arrow_head, y_arrow_head = polar_to_cartesian(
+        direction_in, -arrow_head_length, x2_backoff, y2_backoff
+    )
+
+    if circular_arrow:
+        # Calculate positions of the control points along the direction_out and direction_in lines
+        ctrl_x1, ctrl_y1 = polar_to_cartesian(direction_out, ctrl_distance, x1, y1)
+        ctrl_x2, ctrl_y2 = polar_to_cartesian(direction_in, -ctrl_distance, x2, y2)
+
+        ctrl_x1_interior, ctrl_y1_interior = polar_to_cartesian(
+            direction_out, interior_ctrl_distance, x1, y1
+        )
+        ctrl_x2_interior, ctrl_y2_interior = polar_to_cartesian(
+            direction_in, -interior_ctrl_distance, x2, y2
+        )
+
+        return (
+            f"M {x1+x_out_offset},{y1+y_out_offset} "
+            + f"C{ctrl_x1_interior},{ctrl_y1_interior} {ctrl_x2_interior},{ctrl_y2_interior} {x_arrow_head + x_in_offset},{y_arrow_head + y_in_offset} "
+            + f"L{x_arrow_head + 1.3 * x_in_offset},{y_arrow_head + 1.3 * y_in_offset} "
+            + f"L{x2_backoff},{y2_backoff} L{x_arrow_head - 1.3 * x_in_offset},{y_arrow_head - 1.3 * y_in_offset} "
+            + f"L{x_arrow_head - x_in_offset},{y_arrow_head - y_in_offset} "
+            + f"C{ctrl_x2},{ctrl_y2} {ctrl_x1},{ctrl_y1} {x1-x_out_offset},{y1-y_out_offset} z "
+        )
+
+    # Control points for each side of the arrow, adjusted by half the width in the direction perpendicular to the arrow
+    ctrl_x1 = cx + cx_offset
+    ctrl_y1 = cy + cy_offset
+    ctrl_x2 = cx - cx_offset
+    ctrl_y2 = cy - cy_offset
+
+    return (
+        f"M {x1-x_out_offset-x_out_shift},{y1-y_out_offset-y_out_shift} "
+        + f"Q{ctrl_x1},{ctrl_y1} {x_arrow_head + x_in_offset},{y_arrow_head + y_in_offset} "
+        + f"L{x_arrow_head + 1.3 * x_in_offset},{y_arrow_head + 1.3 * y_in_offset} "
+        + f"L{x2_backoff},{y2_backoff} L{x_arrow_head - 1.3 * x_in_offset},{y_arrow_head - 1.3 * y_in_offset} "
+        + f"L{x_arrow_head - x_in_offset},{y_arrow_head - y_in_offset}"
+        + f"Q{ctrl_x2},{ctrl_y2} {x1+x_out_offset-x_out_shift},{y1+y_out_offset-y_out_shift} z "
+    )
+
+
+def arrow_graph(bubbles, arrows, seed=0, **options):
+    """
+    Build a bubble and arrow graph with arrows between random bubbles, with
+    heavy-tailed sizes as in real flows.
+    """
+    rng = random.Random(seed)
+    colors = [
+        DEFAULT_COLOR_PALETTE[i % len(DEFAULT_COLOR_PALETTE)] for i in range(bubbles)
+    ]
+    graph = BubbleAndArrowGraph(width=800, height=800, colors=colors, **options)
+    for index in range(bubbles):
+        graph.add_bubble(rng.uniform(10, 100), text=f"Bubble {index}")
+    for _ in range(arrows):
+        graph.add_arrow(
+            rng.randrange(bubbles), rng.randrange(bubbles), rng.paretovariate(1.5)
+        )
+    return graph
+
+
+def path_bytes(svg):
+    return sum(len(d) for d in re.findall(r'<path d="([^"]*)"', svg))
+
+
+def compare_arrows(bubbles=200, arrows=10000, repeat=3):
+    """
+    Render the same flows with every arrow drawn, aggregated (the largest
+    KEEP_FRACTION of arrows and an other flow per bubble) and aggregated and
+    bundled. Returns (name, seconds, flows drawn, bytes of path data) rows.
+    """
+    sizes = sorted(size for _, _, size in arrow_graph(bubbles, arrows).arrows)
+    threshold = sizes[int(len(sizes) * (1 - KEEP_FRACTION))]
+    rows = []
+    for name, options in [
+        ("all arrows", {}),
+        ("aggregated", {"min_arrow_size": threshold}),
+        ("aggregated bundled", {"min_arrow_size": threshold, "bundle_strength": 0.8}),
+    ]:
+        times = []
+        for _ in range(repeat):
+            graph = arrow_graph(bubbles, arrows, **options)
+            start = time.perf_counter()
+            svg = graph.render()
+            times.append(time.perf_counter() - start)
+        rows.append(
+            (name, statistics.median(times), len(graph.drawn_arrows), path_bytes(svg))
+        )
+    return rows
+
+
+def arrow_rows(graph):
+    """
+    Render a graph and return the draw_arrow arguments of its arrows.
+    """
+    graph.render()
+    arrows_from_origin = graph._arrows_from_origin(graph._calculate_positions())
+    return [arrow for arrows in arrows_from_origin.values() for arrow in arrows]
+
+
+def paths_match(expected, found, tolerance=1e-9):
+    """
+    Whether two lists of path data have the same commands and numbers that
+    differ by at most tolerance.
+    """
+    if len(expected) != len(found):
+        return False
+    for path1, path2 in zip(expected, found):
+        numbers1 = [float(n) for n in NUMBER.findall(path1)]
+        numbers2 = [float(n) for n in NUMBER.findall(path2)]
+        if NUMBER.sub("", path1) != NUMBER.sub("", path2) or len(numbers1) != len(
+            numbers2
+        ):
+            return False
+        if any(abs(a - b) > tolerance for a, b in zip(numbers1, numbers2)):
+            return False
+    return True
+
+
+def compare_geometry(bubbles=200, arrows=10000, tolerance=1e-9, repeat=3):
+    """
+    Time drawing the arrows of a graph one by one with draw_arrow against
+    arrow_paths, and check that their paths match within tolerance. Returns
+    (scalar seconds, vectorized seconds, identical).
+    """
+    graph = arrow_graph(bubbles, arrows)
+    rows = arrow_rows(graph)
+    scalar = [draw_arrow(*row) for row in rows]
+    vectorized = arrow_paths(rows)
+    assert paths_match(scalar, vectorized, tolerance)
+    return (
+        _median_time(lambda: [draw_arrow(*row) for row in rows], repeat),
+        _median_time(lambda: arrow_paths(rows), repeat),
+        scalar == vectorized,
+    )
+
+
+def _median_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.arrows",
+        description="Benchmark drawing and aggregating the arrows of dense bubble "
+        + "and arrow graphs.",
+    )
+    parser.add_argument("--bubbles", type=int, default=200)
+    parser.add_argument("--arrows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1e-9,
+        help="largest difference allowed between scalar and vectorized arrow "
+        + "coordinates (default 1e-9)",
+    )
+    args = parser.parse_args(argv)
+
+    scalar, vectorized, identical = compare_geometry(
+        args.bubbles, args.arrows, args.tolerance, args.repeat
+    )
+    print(
+        f"arrow geometry: scalar {scalar * 1000:.0f} ms, vectorized "
+        + f"{vectorized * 1000:.0f} ms ({scalar / vectorized:.1f}x), "
+        + ("identical" if identical else f"within {args.tolerance:g}")
+    )
+
+    print(f"{'arrows':<20} {'time':>10} {'flows':>7} {'path data':>12}")
+    for name, seconds, flows, size in compare_arrows(
+        args.bubbles, args.arrows, args.repeat
+    ):
+        print(
+            f"{name:<20} {seconds * 1000:>7.0f} ms {flows:>7} {size / 1024:>8.0f} KiB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
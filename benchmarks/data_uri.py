@@ -0,0 +1,60 @@
+import argparse
+import base64
+import io
+import sys
+
+from .harness import peak_memory
+from .workloads import get_workloads
+
+
+def legacy_base64_src(graph):
+    """
+    The base64 data URI as to_base64_src built it before, from copies of
+    the whole document as str, UTF-8 bytes and base64 bytes and str.
+    """
+    svg_bytes = graph.render().encode("utf-8")
+    return "data:image/svg+xml;base64," + base64.b64encode(svg_bytes).decode("utf-8")
+
+
+def compare_data_uris(workload):
+    """
+    Return the peak memory in bytes of building the data URI of a workload
+    the earlier way, with to_base64_src, with to_base64_bytes and when
+    writing it out with write_base64_src.
+    """
+    return {
+        "legacy": peak_memory(legacy_base64_src, workload.build()),
+        "to_base64_src": peak_memory(workload.build().to_base64_src),
+        "to_base64_bytes": peak_memory(workload.build().to_base64_bytes),
+        "write_base64_src": peak_memory(
+            workload.build().write_base64_src, io.BytesIO()
+        ),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.data_uri",
+        description="Compare the peak memory of building base64 data URIs.",
+    )
+    parser.add_argument("--size", choices=("quick", "full"), default="full")
+    parser.add_argument(
+        "-k", "--filter", help="only run workloads with this in their name"
+    )
+    args = parser.parse_args(argv)
+
+    methods = ("legacy", "to_base64_src", "to_base64_bytes", "write_base64_src")
+    print(f"{'peak memory (KiB)':<50} " + " ".join(f"{m:>16}" for m in methods))
+    for workload in get_workloads(args.size):
+        if args.filter and args.filter not in workload.name:
+            continue
+        result = compare_data_uris(workload)
+        print(
+            f"{workload.name:<50} "
+            + " ".join(f"{result[method] / 1024:>16.0f}" for method in methods)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
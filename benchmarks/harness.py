@@ -0,0 +1,133 @@
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+# Metrics where a higher number is worse. A change of size is reported but
+# not counted as a regression, since it usually means a change of output.
+TIMED_METRICS = ("time", "peak_memory", "base64_peak_memory")
+SIZE_METRICS = ("svg_bytes", "compact_bytes")
+
+
+def peak_memory(function, *args):
+    """
+    Call function and return the peak memory it allocated, in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def measure(workload, repeat=5):
+    """
+    Render a workload repeat times and return its median and best wall time
+    in seconds, the peak memory of one render and of one base64 data URI in
+    bytes (traced separately, as tracemalloc slows rendering down) and the
+    size of the SVG in bytes, as rendered normally and in compact mode.
+    Building the graph is not timed.
+    """
+    times = []
+    for _ in range(repeat):
+        graph = workload.build()
+        gc.collect()
+        start = time.perf_counter()
+        svg = graph.render()
+        times.append(time.perf_counter() - start)
+
+    render_peak_memory = peak_memory(workload.build().render)
+    base64_peak_memory = peak_memory(workload.build().to_base64_bytes)
+
+    graph = workload.build()
+    graph.compact = True
+    compact_svg = graph.render()
+
+    return {
+        "time": statistics.median(times),
+        "min_time": min(times),
+        "peak_memory": render_peak_memory,
+        "base64_peak_memory": base64_peak_memory,
+        "svg_bytes": len(svg.encode("utf-8")),
+        "compact_bytes": len(compact_svg.encode("utf-8")),
+    }
+
+
+def run(workloads, repeat=5, progress=None):
+    results = {}
+    for workload in workloads:
+        results[workload.name] = measure(workload, repeat)
+        if progress:
+            progress(workload.name, results[workload.name])
+    return results
+
+
+def save(results, path):
+    data = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(baseline, results, threshold=0.1):
+    """
+    Compare results with a baseline. Returns a list of
+    (name, metric, old, new, status) rows for every metric that got worse by
+    more than threshold ("regression"), got better by more than threshold
+    ("improvement") or, for the SVG sizes, changed at all ("changed").
+    Workloads that are not in both are skipped.
+    """
+    rows = []
+    for name in sorted(results.keys() & baseline.keys()):
+        old_result = baseline[name]
+        new_result = results[name]
+        for metric in TIMED_METRICS:
+            if metric not in old_result or metric not in new_result:
+                continue
+            old = old_result[metric]
+            new = new_result[metric]
+            if new > old * (1 + threshold):
+                rows.append((name, metric, old, new, "regression"))
+            elif new < old * (1 - threshold):
+                rows.append((name, metric, old, new, "improvement"))
+        for metric in SIZE_METRICS:
+            if metric not in old_result or metric not in new_result:
+                continue
+            if new_result[metric] != old_result[metric]:
+                rows.append(
+                    (name, metric, old_result[metric], new_result[metric], "changed")
+                )
+    return rows
+
+
+def size_reduction(workloads, results):
+    """
+    Return the total SVG size, normal and compact, of each graph type.
+    """
+    totals = {}
+    for workload in workloads:
+        result = results[workload.name]
+        svg_bytes, compact_bytes = totals.get(workload.graph, (0, 0))
+        totals[workload.graph] = (
+            svg_bytes + result["svg_bytes"],
+            compact_bytes + result["compact_bytes"],
+        )
+    return totals
@@ -0,0 +1,32 @@
+import statistics
+import subprocess
+import sys
+
+# Seconds that a fresh `import simplegraph` may take
+IMPORT_TIME_BUDGET = 0.3
+
+
+def measure_import_time(module="simplegraph", repeat=5):
+    """
+    Import a module in fresh interpreters with `python -X importtime` and
+    return the median cumulative import time in seconds, along with the
+    names of all modules the last run imported.
+    """
+    times = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules = {}
+        for line in process.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+        times.append(modules[module] / 1e6)
+    return statistics.median(times), set(modules)
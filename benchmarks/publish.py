@@ -0,0 +1,147 @@
+import argparse
+import http.server
+import sys
+import threading
+import time
+import urllib.request
+
+from simplegraph.publish import HTTPPublisher
+from simplegraph.publish import publish_many
+
+from .workloads import categorical_workload
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    # Accepts PUT requests after the server's latency, keeping connections
+    # alive
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        server = self.server
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            server.bytes_received += len(data)
+            server.connections.add(self.client_address)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(latency=0.0):
+    """
+    Start a local stand-in for a file store in a background thread. Each
+    request takes latency seconds to answer, to stand in for the network.
+    """
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/charts"
+    reset_server(server)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def reset_server(server):
+    server.requests = 0
+    server.bytes_received = 0
+    server.connections = set()
+
+
+def publish_serially(graphs, url):
+    """
+    Render and upload one graph at a time with a new connection each, the
+    way upload_to_github_gist works.
+    """
+    for index, graph in enumerate(graphs):
+        request = urllib.request.Request(
+            f"{url}/{index}.svg",
+            data=graph.render().encode("utf-8"),
+            method="PUT",
+            headers={"Content-Type": "image/svg+xml"},
+        )
+        with urllib.request.urlopen(request) as response:
+            response.read()
+
+
+def compare_publishing(charts=100, latency=0.005, concurrency=(1, 8)):
+    """
+    Publish the same distinct charts serially and with HTTPPublisher at each
+    concurrency, raw and gzip-compressed. Returns (name, seconds, requests,
+    connections, bytes sent) rows.
+    """
+    graphs = [
+        categorical_workload(50, 2, "mixed", False, False, False, seed).build()
+        for seed in range(charts)
+    ]
+    server = start_server(latency)
+    rows = []
+
+    def record(name, publish):
+        reset_server(server)
+        start = time.perf_counter()
+        publish()
+        rows.append(
+            (
+                name,
+                time.perf_counter() - start,
+                server.requests,
+                len(server.connections),
+                server.bytes_received,
+            )
+        )
+
+    try:
+        record("serial urllib", lambda: publish_serially(graphs, server.url))
+        for workers in concurrency:
+            for compress in (False, True):
+                record(
+                    f"publisher x{workers}" + (" gzip" if compress else ""),
+                    lambda: publish_many(
+                        HTTPPublisher(server.url, max_concurrency=workers),
+                        graphs,
+                        compress=compress,
+                    ),
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.publish",
+        description="Benchmark publishing graphs to a local HTTP server.",
+    )
+    parser.add_argument("--charts", type=int, default=100)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="seconds the server takes to answer each request (default 0.005)",
+    )
+    parser.add_argument("--concurrency", type=int, action="append")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'publishing':<24} {'time':>10} {'requests':>9} {'connections':>12} "
+        + f"{'sent':>10}"
+    )
+    for name, seconds, requests, connections, sent in compare_publishing(
+        args.charts, args.latency, tuple(args.concurrency or (1, 8))
+    ):
+        print(
+            f"{name:<24} {seconds * 1000:>7.0f} ms {requests:>9} {connections:>12} "
+            + f"{sent / 1024:>6.0f} KiB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
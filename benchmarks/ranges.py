@@ -0,0 +1,174 @@
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from simplegraph.categorical import categorical_ranges
+from simplegraph.categorical import series_matrix
+
+# (categories, series) of the compared data sets
+RANGE_SIZES = ((1000, 50), (100000, 10))
+
+
+def reference_stacked_bar_range(data, series_types, secondary):
+    """
+    The pure Python helper that categorical_ranges replaced.
+    """
+    non_secondary_bars_to_use = [
+        not secondary[index] and series_types[index][0] == "bar"
+        for index in range(len(secondary))
+    ]
+
+    stacked_positive_data = [
+        sum(
+            max(value, 0)
+            for i, value in enumerate(column)
+            if non_secondary_bars_to_use[i]
+        )
+        for column in zip(*data)
+    ]
+
+    stacked_negative_data = [
+        sum(
+            min(value, 0)
+            for i, value in enumerate(column)
+            if non_secondary_bars_to_use[i]
+        )
+        for column in zip(*data)
+    ]
+    return (
+        (min(stacked_negative_data), max(stacked_positive_data))
+        if non_secondary_bars_to_use
+        else (None, None)
+    )
+
+
+def reference_non_secondary_range(data, secondary):
+    """
+    The pure Python helper that categorical_ranges replaced.
+    """
+    non_secondary_values = [
+        value
+        for values, is_secondary in zip(data, secondary)
+        if not is_secondary
+        for value in values
+    ]
+    return (
+        (min(non_secondary_values), max(non_secondary_values))
+        if non_secondary_values
+        else (None, None)
+    )
+
+
+def reference_ranges(data, series_types, secondary, stacked):
+    """
+    Compute both ranges the way CategoricalGraph did before, calling the
+    helpers again with the inverted secondary mask.
+    """
+    inverted = [not sec for sec in secondary]
+    if stacked:
+        primary = reference_stacked_bar_range(data, series_types, secondary)
+        secondary_range = (
+            reference_stacked_bar_range(data, series_types, inverted)
+            if any(secondary)
+            else (None, None)
+        )
+    else:
+        primary = reference_non_secondary_range(data, secondary)
+        secondary_range = (
+            reference_non_secondary_range(data, inverted)
+            if any(secondary)
+            else (None, None)
+        )
+    return primary, secondary_range
+
+
+def range_data(categories, series, seed=0):
+    """
+    Return data, series types and secondary flags for a graph with a primary
+    stack of bars and a secondary line.
+    """
+    rng = random.Random(seed)
+    data = [
+        [round(rng.uniform(-50, 100), 2) for _ in range(categories)]
+        for _ in range(series)
+    ]
+    series_types = [("bar", False)] * (series - 1) + [("line", False)]
+    secondary = [False] * (series - 1) + [True]
+    return data, series_types, secondary
+
+
+def _median_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def compare_ranges(categories, series, repeat=5):
+    """
+    Time the reference helpers against categorical_ranges, both from lists
+    and from a ready series matrix, for stacked and unstacked graphs. Returns
+    (stacked, reference, vectorized, vectorized from matrix) rows in seconds.
+    """
+    data, series_types, secondary = range_data(categories, series)
+    matrix = np.array(data)
+    rows = []
+    for stacked in (False, True):
+        expected = reference_ranges(data, series_types, secondary, stacked)
+        found = categorical_ranges(
+            series_matrix(data), series_types, secondary, stacked
+        )
+        assert np.allclose(np.array(found), np.array(expected)), (found, expected)
+        rows.append(
+            (
+                stacked,
+                _median_time(
+                    lambda: reference_ranges(data, series_types, secondary, stacked),
+                    repeat,
+                ),
+                _median_time(
+                    lambda: categorical_ranges(
+                        series_matrix(data), series_types, secondary, stacked
+                    ),
+                    repeat,
+                ),
+                _median_time(
+                    lambda: categorical_ranges(
+                        matrix, series_types, secondary, stacked
+                    ),
+                    repeat,
+                ),
+            )
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.ranges",
+        description="Benchmark the axis ranges of categorical graphs.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'data':<24} {'reference':>12} {'vectorized':>12} {'from array':>12}")
+    for categories, series in RANGE_SIZES:
+        for stacked, reference, vectorized, from_array in compare_ranges(
+            categories, series, args.repeat
+        ):
+            name = f"{categories}x{series}" + ("-stacked" if stacked else "")
+            print(
+                f"{name:<24} {reference * 1000:>9.2f} ms {vectorized * 1000:>9.2f} ms "
+                + f"{from_array * 1000:>9.2f} ms ({reference / vectorized:.0f}x)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
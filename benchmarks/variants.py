@@ -0,0 +1,85 @@
+import argparse
+import sys
+
+from simplegraph.base import THEME_KEYS
+
+from .arrows import _median_time
+from .arrows import arrow_graph
+from .workloads import get_workloads
+
+# Light and dark mode at three widths
+VARIANTS = [
+    {"dark_mode": dark_mode, "width": width}
+    for dark_mode in (False, True)
+    for width in (400, 800, 1200)
+]
+
+
+def _graphs():
+    workloads = {workload.name: workload for workload in get_workloads("full")}
+    return [
+        ("categorical", workloads["categorical-200x8-mixed"].build()),
+        ("ribbon", workloads["ribbon-200"].build()),
+        ("bubble", arrow_graph(60, 600)),
+    ]
+
+
+def separate_graph(graph, variant):
+    """
+    Build the graph a variant stands for as a graph of its own, with the
+    variant's theme and, for a width, a height that keeps the aspect ratio.
+    """
+    spec = graph.to_spec().to_dict()
+    kwargs = spec["kwargs"]
+    kwargs.update((key, variant[key]) for key in THEME_KEYS if key in variant)
+    if "width" in variant:
+        kwargs["height"] = kwargs["height"] * variant["width"] / kwargs["width"]
+        kwargs["width"] = variant["width"]
+    return type(graph).from_spec(spec)
+
+
+def compare_variants(variants=VARIANTS, repeat=3):
+    """
+    Time rendering each variant as a separate graph against render_variants
+    on one graph. Returns (name, separate seconds, render_variants seconds)
+    rows, for all variants together.
+    """
+    rows = []
+    for name, graph in _graphs():
+        graphs = [separate_graph(graph, variant) for variant in variants]
+
+        def separate():
+            for other in graphs:
+                other.render()
+
+        rows.append(
+            (
+                name,
+                _median_time(separate, repeat),
+                _median_time(lambda: graph.render_variants(variants), repeat),
+            )
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.variants",
+        description="Benchmark rendering graphs in light and dark mode at three "
+        + "widths, separately and with render_variants.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    count = len(VARIANTS)
+    print(f"{'per variant':<12} {'separate':>12} {'shared':>12} {'speedup':>12}")
+    for name, separate, shared in compare_variants(repeat=args.repeat):
+        print(
+            f"{name:<12} {separate * 1000 / count:>9.1f} ms {shared * 1000 / count:>9.1f} ms "
+            + f"{separate / shared:>11.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import collections
+import itertools
+import random
+
+from simplegraph import BubbleAndArrowGraph
+from simplegraph import CategoricalGraph
+from simplegraph import RibbonGraph
+from simplegraph.utils import DEFAULT_COLOR_PALETTE
+
+# A named benchmark case. build() returns a new graph, ready to render.
+Workload = collections.namedtuple("Workload", ["name", "graph", "build"])
+
+SERIES_MIXES = {
+    "bar": ("bar",),
+    "line": ("line",),
+    "dot": ("dot",),
+    "mixed": ("bar", "line", "dot"),
+}
+
+# Sizes for quick runs (e.g. before each commit) and for full runs
+CATEGORICAL_SIZES = {"quick": (10, 200), "full": (10, 200, 2000)}
+SERIES_COUNTS = {"quick": (2,), "full": (2, 8)}
+RIBBON_SIZES = {"quick": (10, 200), "full": (10, 200, 2000)}
+BUBBLE_COUNTS = {"quick": (10, 50), "full": (10, 50, 200)}
+ARROW_DENSITIES = (0.0, 0.05, 0.2)
+
+
+def _values(rng, count, low=-50, high=100):
+    return [round(rng.uniform(low, high), 2) for _ in range(count)]
+
+
+def categorical_workload(
+    categories, series, mix, stacked, secondary, print_values, seed=0
+):
+    def build():
+        rng = random.Random(seed)
+        graph = CategoricalGraph(width=800, height=500, stacked=stacked)
+        graph.x_labels = [f"Category {i}" for i in range(categories)]
+        series_types = SERIES_MIXES[mix]
+        for index in range(series):
+            graph.add_series(
+                # Stacked bars are drawn for positive values
+                _values(rng, categories, low=0 if stacked else -50),
+                legend_label=f"Series {index}",
+                series_type=series_types[index % len(series_types)],
+                print_values=print_values,
+                secondary=secondary and index == series - 1,
+            )
+        return graph
+
+    name = (
+        f"categorical-{categories}x{series}-{mix}"
+        + ("-stacked" if stacked else "")
+        + ("-secondary" if secondary else "")
+        + ("-values" if print_values else "")
+    )
+    return Workload(name, "categorical", build)
+
+
+def ribbon_workload(categories, print_values, seed=0):
+    def build():
+        rng = random.Random(seed)
+        graph = RibbonGraph(width=800, height=500)
+        graph.x_labels = [f"Category {i}" for i in range(categories)]
+        low = _values(rng, categories, 0, 50)
+        graph.add_series(low, legend_label="Low", print_values=print_values)
+        graph.add_series(
+            [value + rng.uniform(0, 50) for value in low],
+            legend_label="High",
+            print_values=print_values,
+        )
+        graph.add_series(_values(rng, categories), legend_label="Color")
+        return graph
+
+    name = f"ribbon-{categories}" + ("-values" if print_values else "")
+    return Workload(name, "ribbon", build)
+
+
+def bubble_workload(bubbles, arrow_density, seed=0):
+    def build():
+        rng = random.Random(seed)
+        # The default palette has fewer colors than the larger workloads need
+        colors = [
+            DEFAULT_COLOR_PALETTE[i % len(DEFAULT_COLOR_PALETTE)]
+            for i in range(bubbles)
+        ]
+        graph = BubbleAndArrowGraph(width=800, height=800, colors=colors)
+        for index in range(bubbles):
+            inner_size = rng.uniform(0, 50) if index % 3 == 0 else None
+            graph.add_bubble(
+                rng.uniform(10, 100), inner_size=inner_size, text=f"Bubble {index}"
+            )
+        for origin, destination in itertools.permutations(range(bubbles), 2):
+            if rng.random() < arrow_density:
+                graph.add_arrow(origin, destination, rng.uniform(1, 50))
+        return graph
+
+    name = f"bubble-{bubbles}-arrows{arrow_density:g}"
+    return Workload(name, "bubble", build)
+
+
+def get_workloads(size="quick"):
+    """
+    Return the workloads of a run size ("quick" or "full").
+    """
+    workloads = []
+    for categories, series, mix, stacked, secondary, print_values in itertools.product(
+        CATEGORICAL_SIZES[size],
+        SERIES_COUNTS[size],
+        SERIES_MIXES,
+        (False, True),
+        (False, True),
+        (False, True),
+    ):
+        # Stacking only applies to bars, and stacked bars cannot be split
+        # across axes, so the series on the secondary axis cannot be a bar
+        series_types = SERIES_MIXES[mix]
+        if stacked and "bar" not in series_types:
+            continue
+        if (
+            stacked
+            and secondary
+            and series_types[(series - 1) % len(series_types)] == "bar"
+        ):
+            continue
+        workloads.append(
+            categorical_workload(
+                categories, series, mix, stacked, secondary, print_values
+            )
+        )
+
+    for categories, print_values in itertools.product(
+        RIBBON_SIZES[size], (False, True)
+    ):
+        workloads.append(ribbon_workload(categories, print_values))
+
+    for bubbles, arrow_density in itertools.product(
+        BUBBLE_COUNTS[size], ARROW_DENSITIES
+    ):
+        workloads.append(bubble_workload(bubbles, arrow_density))
+
+    return workloads
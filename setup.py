@@ -13,7 +13,7 @@ setup(
     author="Garrett M. Petersen",
     author_email="garrett.m.petersen@gmail.com",
     license="MIT",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     install_requires=["matplotlib", "numpy"],
     keywords=["graph", "svg", "base64", "simplegraph", "simple graph"],
     classifiers=[
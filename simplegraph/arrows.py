@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+
+# Path data of an arrow curving through its control point, and of one
+# pointing to its origin
+_HEAD = "L%s,%s L%s,%s L%s,%s L%s,%s"
+CURVED_ARROW = "M %s,%s Q%s,%s %s,%s " + _HEAD + "Q%s,%s %s,%s z "
+LOOPED_ARROW = "M %s,%s C%s,%s %s,%s %s,%s " + _HEAD + " C%s,%s %s,%s %s,%s z "
+
+
+def _each(function, *arrays):
+    # Trigonometry goes through math rather than NumPy, whose SIMD versions
+    # can differ in the last bit, so arrows come out as when they were drawn
+    # one by one
+    return np.array(
+        list(map(function, *(array.tolist() for array in arrays))), dtype=float
+    )
+
+
+def _polar(direction, radius, x=0, y=0):
+    # polar_to_cartesian on arrays, given the cosines and sines of the angles
+    cos, sin = direction
+    return x + radius * cos, y + radius * sin
+
+
+def _direction(angle):
+    return _each(math.cos, angle), _each(math.sin, angle)
+
+
+def arrow_geometry(arrows):
+    """
+    Compute the geometry of many arrows at once. arrows holds a row per
+    arrow: its start (x1, y1), its end (x2, y2), the control point (cx, cy)
+    it curves through, how far it backs off from its end, its width and how
+    far its start is shifted sideways. Returns a dict of arrays with one
+    value per arrow.
+    """
+    x1, y1, x2, y2, cx, cy, backoff, width, start_offset = (
+        np.array(arrows, dtype=float).reshape(-1, 9).T
+    )
+    circular = (x1 == x2) & (y1 == y2)
+
+    arrow_head_length = np.maximum(10, width / 5)
+    direction_in = _each(math.atan2, y2 - cy, x2 - cx)
+    direction_to_center = _each(math.atan2, y1 - cy, x1 - cx)
+    ctrl_distance = np.sqrt((x1 - cx) ** 2 + (y1 - cy) ** 2)
+    interior_ctrl_distance = ctrl_distance - 2 * width
+
+    # Self-pointing arrows emerge sideways
+    direction_mid = np.where(
+        circular,
+        direction_to_center - math.pi / 2,
+        _each(math.atan2, y2 - y1, x2 - x1),
+    )
+    direction_out = np.where(
+        circular, direction_to_center + 3 * math.pi / 4, direction_to_center
+    )
+    direction_in = np.where(circular, direction_in + math.pi / 4, direction_in)
+
+    out = _direction(direction_out)
+    into = _direction(direction_in)
+    perpendicular_out = _direction(direction_out + math.pi / 2)
+    perpendicular_in = _direction(direction_in + math.pi / 2)
+    cx_offset, cy_offset = _polar(_direction(direction_mid + math.pi / 2), width / 2)
+    x_out_offset, y_out_offset = _polar(perpendicular_out, width / 2)
+    x_out_shift, y_out_shift = _polar(perpendicular_out, start_offset)
+    x_in_offset, y_in_offset = _polar(perpendicular_in, width / 2)
+
+    backoff_x, backoff_y = _polar(into, backoff)
+    x2_backoff = x2 - backoff_x
+    y2_backoff = y2 - backoff_y
+    x_arrow_head, y_arrow_head = _polar(
+        into, -arrow_head_length, x2_backoff, y2_backoff
+    )
+
+    # Control points of self-pointing arrows, along their directions out and in
+    ctrl_x1, ctrl_y1 = _polar(out, ctrl_distance, x1, y1)
+    ctrl_x2, ctrl_y2 = _polar(into, -ctrl_distance, x2, y2)
+    ctrl_x1_interior, ctrl_y1_interior = _polar(out, interior_ctrl_distance, x1, y1)
+    ctrl_x2_interior, ctrl_y2_interior = _polar(into, -interior_ctrl_distance, x2, y2)
+
+    return {
+        "circular": circular,
+        "x1": x1,
+        "y1": y1,
+        "x_out_offset": x_out_offset,
+        "y_out_offset": y_out_offset,
+        "x_out_shift": x_out_shift,
+        "y_out_shift": y_out_shift,
+        "x_in_offset": x_in_offset,
+        "y_in_offset": y_in_offset,
+        "x2_backoff": x2_backoff,
+        "y2_backoff": y2_backoff,
+        "x_arrow_head": x_arrow_head,
+        "y_arrow_head": y_arrow_head,
+        # Other arrows curve through the control point, offset to each side
+        "q_x1": np.where(circular, ctrl_x1_interior, cx + cx_offset),
+        "q_y1": np.where(circular, ctrl_y1_interior, cy + cy_offset),
+        "q_x2": np.where(circular, ctrl_x2_interior, cx - cx_offset),
+        "q_y2": np.where(circular, ctrl_y2_interior, cy - cy_offset),
+        "ctrl_x1": ctrl_x1,
+        "ctrl_y1": ctrl_y1,
+        "ctrl_x2": ctrl_x2,
+        "ctrl_y2": ctrl_y2,
+    }
+
+
+def arrow_paths(arrows):
+    """
+    Return the path data of each arrow, from the geometry of all arrows
+    computed at once.
+    """
+    if not len(arrows):
+        return []
+    g = arrow_geometry(arrows)
+    circular = g["circular"]
+
+    # Coordinates are computed as whole arrays before being formatted
+    start_x1 = g["x1"] + g["x_out_offset"]
+    start_y1 = g["y1"] + g["y_out_offset"]
+    end_x1 = g["x1"] - g["x_out_offset"]
+    end_y1 = g["y1"] - g["y_out_offset"]
+    shifted_x1 = g["x1"] - g["x_out_offset"] - g["x_out_shift"]
+    shifted_y1 = g["y1"] - g["y_out_offset"] - g["y_out_shift"]
+    shifted_x2 = g["x1"] + g["x_out_offset"] - g["x_out_shift"]
+    shifted_y2 = g["y1"] + g["y_out_offset"] - g["y_out_shift"]
+    head = [
+        g["x_arrow_head"] + g["x_in_offset"],
+        g["y_arrow_head"] + g["y_in_offset"],
+        g["x_arrow_head"] + 1.3 * g["x_in_offset"],
+        g["y_arrow_head"] + 1.3 * g["y_in_offset"],
+        g["x2_backoff"],
+        g["y2_backoff"],
+        g["x_arrow_head"] - 1.3 * g["x_in_offset"],
+        g["y_arrow_head"] - 1.3 * g["y_in_offset"],
+        g["x_arrow_head"] - g["x_in_offset"],
+        g["y_arrow_head"] - g["y_in_offset"],
+    ]
+
+    paths = [None] * len(circular)
+    curved = np.flatnonzero(~circular)
+    for index, path in zip(
+        curved.tolist(),
+        _format_rows(
+            CURVED_ARROW,
+            [shifted_x1, shifted_y1, g["q_x1"], g["q_y1"]]
+            + head
+            + [g["q_x2"], g["q_y2"], shifted_x2, shifted_y2],
+            curved,
+        ),
+    ):
+        paths[index] = path
+    looped = np.flatnonzero(circular)
+    for index, path in zip(
+        looped.tolist(),
+        _format_rows(
+            LOOPED_ARROW,
+            [start_x1, start_y1, g["q_x1"], g["q_y1"], g["q_x2"], g["q_y2"]]
+            + head
+            + [g["ctrl_x2"], g["ctrl_y2"], g["ctrl_x1"], g["ctrl_y1"]]
+            + [end_x1, end_y1],
+            looped,
+        ),
+    ):
+        paths[index] = path
+    return paths
+
+
+def _format_rows(template, columns, rows):
+    # repr formats floats as f-strings do. Formatting all numbers in one pass
+    # and filling a template per arrow is much faster than an f-string each
+    if not len(rows):
+        return []
+    numbers = list(map(repr, np.column_stack(columns)[rows].ravel().tolist()))
+    count = len(columns)
+    return [
+        template % tuple(numbers[start : start + count])
+        for start in range(0, len(numbers), count)
+    ]
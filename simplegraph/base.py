@@ -1,13 +1,29 @@
 import base64
-import urllib.request
+import binascii
+import inspect
+import io
 import json
-import time
 import math
 
 from .utils import DEFAULT_COLOR_PALETTE
 from .utils import is_dark
-from .utils import estimate_text_dimensions
 from .utils import human_readable_number
+from .text_metrics import get_text_metrics
+from .collision import resolve_label_collisions
+from .spec import GraphSpec
+from .render_cache import spec_key
+from .compact import compact_svg
+from .scene import Line
+from .scene import Scene
+from .scene import Text
+from .scene import iter_svg
+from .scene import svg_open_tag
+
+BASE64_PREFIX = "data:image/svg+xml;base64,"
+
+# Keys of a render_variants variant: theme settings, then size settings
+THEME_KEYS = ("dark_mode", "background_color", "colors")
+SIZE_KEYS = ("scale", "width", "height")
 
 
 class BaseGraph:
@@ -16,6 +32,24 @@ class BaseGraph:
     other classes.
     """
 
+    # Attributes that __init__ derives from its arguments; to_spec records
+    # them as they are now
+    _spec_attributes = (
+        "y_top_padding",
+        "y_bottom_padding",
+        "x_left_padding",
+        "x_right_padding",
+        "colors",
+        "text_color",
+    )
+
+    # A RenderCache shared by all graphs, or set on a single graph, to reuse
+    # the output of graphs that were rendered before
+    render_cache = None
+
+    # Attributes that depend on the theme, restored after render_variants
+    _theme_attributes = ("dark_mode", "background_color", "colors", "text_color")
+
     def __init__(
         self,
         width=300,
@@ -40,6 +74,9 @@ class BaseGraph:
         title_font_size=None,
         element_spacing=None,
         watermark=None,
+        value_label_strategy=None,
+        compact=False,
+        precision=2,
     ):
         self.width = width
         self.height = height
@@ -70,6 +107,20 @@ class BaseGraph:
         self.svg_elements = []
         self.element_spacing = element_spacing or 10
         self.watermark = watermark
+        self.value_label_strategy = value_label_strategy
+        self.compact = compact
+        self.precision = precision
+        self.text_metrics = get_text_metrics()
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self._fragment_cache = {}
+        self._used_fragments = {}
+        self._layout_cache = None
+        self._theme_arguments = {
+            "dark_mode": dark_mode,
+            "background_color": background_color,
+            "colors": colors,
+        }
 
         # Use dark colors last if in dark mode and using default color palette
         if self.colors == DEFAULT_COLOR_PALETTE and self.dark_mode:
@@ -101,26 +152,20 @@ class BaseGraph:
         text = str(text)
         if not fill:
             fill = self.text_color
-        # Start building the SVG text element
-        text_element = f'<text x="{x}" y="{y}" font-size="{font_size}" fill="{fill}"'
-
-        # Add optional attributes
-        if anchor:
-            text_element += f' text-anchor="{anchor}"'
-        if dominant_baseline:
-            text_element += f' dominant-baseline="{dominant_baseline}"'
-        if rotation:
-            text_element += f' transform="rotate({rotation} {x} {y})"'
-        if additional_attributes:
-            text_element += " " + " ".join(
-                [f'{k}="{v}"' for k, v in additional_attributes.items()]
-            )
-
-        # Close the opening tag and add the text content
-        text_element += f">{text}</text>"
+        text_element = Text(
+            x,
+            y,
+            text,
+            font_size,
+            fill,
+            anchor,
+            dominant_baseline,
+            rotation,
+            additional_attributes,
+        )
 
         # Estimate the text dimensions
-        text_width, text_height = estimate_text_dimensions(text, font_size)
+        text_width, text_height = self.text_metrics.measure(text, font_size)
 
         # Adjust the bounding box coordinates according to the anchor and dominant-baseline
         if anchor == "end":
@@ -145,14 +190,12 @@ class BaseGraph:
             # Rotate each corner of the bounding box
             corners = [(left, top), (right, top), (right, bottom), (left, bottom)]
             rotation_radians = math.radians(rotation)
+            cos = math.cos(rotation_radians)
+            sin = math.sin(rotation_radians)
             rotated_corners = [
                 (
-                    x
-                    + (cx - x) * math.cos(rotation_radians)
-                    - (cy - y) * math.sin(rotation_radians),
-                    y
-                    + (cx - x) * math.sin(rotation_radians)
-                    + (cy - y) * math.cos(rotation_radians),
+                    x + (cx - x) * cos - (cy - y) * sin,
+                    y + (cx - x) * sin + (cy - y) * cos,
                 )
                 for cx, cy in corners
             ]
@@ -163,21 +206,103 @@ class BaseGraph:
             top, bottom = min(ys), max(ys)
 
         # Update the most extreme dimensions
-        self.most_extreme_dimensions["left"] = min(
-            self.most_extreme_dimensions["left"], left
-        )
-        self.most_extreme_dimensions["right"] = max(
-            self.most_extreme_dimensions["right"], right
-        )
-        self.most_extreme_dimensions["top"] = min(
-            self.most_extreme_dimensions["top"], top
-        )
-        self.most_extreme_dimensions["bottom"] = max(
-            self.most_extreme_dimensions["bottom"], bottom
-        )
+        extent = self.most_extreme_dimensions
+        if left < extent["left"]:
+            extent["left"] = left
+        if right > extent["right"]:
+            extent["right"] = right
+        if top < extent["top"]:
+            extent["top"] = top
+        if bottom > extent["bottom"]:
+            extent["bottom"] = bottom
 
         return text_element
 
+    def _add_value_label(self, elements, value_labels, text, x, y, fill):
+        # Value labels are drawn right away unless they need to be placed
+        # together to avoid collisions
+        if self.value_label_strategy:
+            value_labels.append([x, y, text, fill])
+        else:
+            elements.append(self._generate_text(text, x, y, fill=fill))
+
+    def _draw_labels(self, labels, strategy, font_size=10):
+        """
+        Generate text elements for a list of [x, y, text, fill] labels, moved
+        or hidden by the given collision strategy ("shift", "hide" or
+        "leader") so that they do not overlap.
+        """
+        texts = [
+            text if isinstance(text, str) else human_readable_number(text)
+            for _, _, text, _ in labels
+        ]
+        dimensions = self.text_metrics.measure_many(texts, font_size)
+        placements = resolve_label_collisions(
+            [
+                (x, y, width, height)
+                for (x, y, _, _), (width, height) in zip(labels, dimensions)
+            ],
+            strategy,
+        )
+
+        elements = []
+        for label, text, (_, height), placement in zip(
+            labels, texts, dimensions, placements
+        ):
+            if placement is None:
+                continue
+            anchor_x, anchor_y, _, fill = label
+            x, y = placement
+            if strategy == "leader" and y != anchor_y:
+                # Connect the label to its anchor at the nearest edge
+                edge_y = y - height / 2 if y > anchor_y else y + height / 2
+                elements.append(
+                    Line(anchor_x, anchor_y, x, edge_y, stroke=fill, stroke_width=0.5)
+                )
+            elements.append(
+                self._generate_text(text, x, y, font_size=font_size, fill=fill)
+            )
+        return elements
+
+    def _cached_fragment(self, key, build):
+        """
+        Return build(), reusing the result from an earlier render if key was
+        seen before. The extent that the fragment adds to the drawing is cached
+        with it, so most_extreme_dimensions ends up the same either way.
+        """
+        entry = self._fragment_cache.get(key)
+        if entry is None:
+            self.fragment_misses += 1
+            most_extreme_dimensions = self.most_extreme_dimensions
+            self.most_extreme_dimensions = {
+                "left": math.inf,
+                "right": -math.inf,
+                "top": math.inf,
+                "bottom": -math.inf,
+            }
+            entry = (build(), self.most_extreme_dimensions)
+            self.most_extreme_dimensions = most_extreme_dimensions
+        else:
+            self.fragment_hits += 1
+        self._used_fragments[key] = entry
+
+        fragment, fragment_dimensions = entry
+        for side, pick in (
+            ("left", min),
+            ("right", max),
+            ("top", min),
+            ("bottom", max),
+        ):
+            self.most_extreme_dimensions[side] = pick(
+                self.most_extreme_dimensions[side], fragment_dimensions[side]
+            )
+        return fragment
+
+    def _discard_unused_fragments(self):
+        # Keep only the fragments used by the latest render
+        self._fragment_cache = self._used_fragments
+        self._used_fragments = {}
+
     def _reset_graph(self):
         self.most_extreme_dimensions = {
             "left": self.width,
@@ -192,6 +317,13 @@ class BaseGraph:
         """
         Generate the SVG string from the styles and elements.
         """
+        return "".join(self._iter_svg())
+
+    def _scene(self):
+        """
+        Finish the scene once all elements are built: add the title and
+        watermark and fit the viewBox to the final extent of the drawing.
+        """
         if self.title:
             title_x_position = self.width / 2
             title_y_position = (
@@ -226,17 +358,6 @@ class BaseGraph:
         viewbox_left = self.most_extreme_dimensions["left"] - self.x_left_padding
         viewbox_top = self.most_extreme_dimensions["top"] - self.y_top_padding
 
-        viewbox_param = (
-            f'viewBox="{viewbox_left} {viewbox_top} {viewbox_width} {viewbox_height}"'
-        )
-
-        background_rect = ""
-        if self.background_color:
-            background_rect = (
-                f"<rect x='{viewbox_left}' y='{viewbox_top}' width='{viewbox_width}' height='{viewbox_height}' "
-                + f"rx='10' ry='10' fill='{self.background_color}' />"
-            )
-
         if self.watermark:
             if not isinstance(self.watermark, str):
                 raise ValueError("Watermark must be a string.")
@@ -244,62 +365,314 @@ class BaseGraph:
                 raise ValueError("Watermark must be a valid SVG snippet.")
             self.svg_elements.append(self.watermark)
 
-        defs_str = ""
-        if self.defs:
-            defs_str = "<defs>" + "\n".join(self.defs) + "</defs>"
-        svg_elements_str = "\n".join(self.svg_elements)
-        svg = (
-            f"<svg xmlns='http://www.w3.org/2000/svg' width='{viewbox_width}' height='{viewbox_height}' {viewbox_param}>"
-            + defs_str
-            + background_rect
-            + svg_elements_str
-            + "</svg>"
+        return Scene(
+            (viewbox_left, viewbox_top, viewbox_width, viewbox_height),
+            self.background_color,
+            self.defs,
+            self.svg_elements,
         )
-        return svg
 
-    def render(self):
-        # Implement the specific rendering for this subclass
+    def _iter_svg(self):
+        """
+        Yield the SVG document in chunks. The header depends on the final
+        extent of the drawing, so all elements must be built before the first
+        chunk is produced.
+        """
+        yield from iter_svg(self._scene())
+
+    def to_scene(self):
+        """
+        Lay the graph out and return its Scene: the typed primitives (Rect,
+        Circle, Line, Path and Text) that the SVG is serialized from.
+        """
+        self._build_elements()
+        return self._scene()
+
+    def _shared_layout(self, name, compute):
+        """
+        Return compute(). While render_variants renders several themes of the
+        graph, the result is kept under name and computed only once, so
+        compute must not depend on colors.
+        """
+        if self._layout_cache is None:
+            return compute()
+        if name not in self._layout_cache:
+            self._layout_cache[name] = compute()
+        return self._layout_cache[name]
+
+    def _apply_theme(self, dark_mode=None, background_color=None, colors=None):
+        # Derive the theme attributes as __init__ does
+        self.background_color = background_color
+        self.dark_mode = dark_mode
+        if dark_mode is None:
+            self.dark_mode = bool(background_color) and is_dark(background_color)
+        self.colors = (colors or DEFAULT_COLOR_PALETTE).copy()
+        if self.colors == DEFAULT_COLOR_PALETTE and self.dark_mode:
+            self.colors.sort(key=lambda x: is_dark(x))
+        self.text_color = "#ffffff" if self.dark_mode else "#000000"
+
+    def _variant_theme(self, current, variant):
+        """
+        Return the theme attributes of a variant, given the graph's current
+        ones. dark_mode, background_color and colors that were changed since
+        the graph was constructed count as settings of their own, which the
+        variant's settings override; changed derived attributes, such as
+        text_color, are kept.
+        """
+        settings = {key: variant[key] for key in THEME_KEYS if key in variant}
+        if not settings:
+            return dict(current)
+        self._apply_theme(**self._theme_arguments)
+        constructed = {name: getattr(self, name) for name in self._theme_attributes}
+        arguments = {
+            key: (
+                self._theme_arguments[key]
+                if current[key] == constructed[key]
+                else current[key]
+            )
+            for key in THEME_KEYS
+        }
+        self._apply_theme(**{**arguments, **settings})
+        theme = {name: getattr(self, name) for name in self._theme_attributes}
+        for name in self._theme_attributes:
+            # Keep derived attributes, such as text_color, that were set
+            if name not in THEME_KEYS and current[name] != constructed[name]:
+                theme[name] = current[name]
+        return theme
+
+    def render_variants(self, variants):
+        """
+        Render the graph in several themes and sizes from one layout, and
+        return the SVG strings in the order of variants. Each variant is a
+        dict of theme settings, dark_mode, background_color and colors, and
+        one size setting: scale, or the width or height to display the SVG
+        at, keeping its aspect ratio. A variant without theme settings uses
+        the graph's current theme; theme settings are applied to it as the
+        constructor applies its arguments.
+
+        Ranges, ticks, positions and other geometry are computed once for all
+        variants. Variants with the same theme share one drawing and differ
+        only in the size of the <svg> element, which scales everything,
+        text included, rather than laying the graph out again.
+        """
+        variants = list(variants)
+        for variant in variants:
+            unknown = set(variant) - set(THEME_KEYS + SIZE_KEYS)
+            if unknown:
+                raise ValueError(f"Unknown variant settings: {sorted(unknown)}")
+            if len(set(variant) & set(SIZE_KEYS)) > 1:
+                raise ValueError("A variant takes one of scale, width and height.")
+
+        saved = {name: getattr(self, name) for name in self._theme_attributes}
+        svgs = [None] * len(variants)
+        self._layout_cache = {}
+        try:
+            themes = {}
+            for index, variant in enumerate(variants):
+                theme = self._variant_theme(saved, variant)
+                key = repr(sorted(theme.items()))
+                themes.setdefault(key, (theme, []))[1].append(index)
+
+            for theme, indices in themes.values():
+                for name, value in theme.items():
+                    setattr(self, name, value)
+                self._build_elements()
+                scene = self._scene()
+                body = "".join(list(iter_svg(scene))[1:])
+                for index in indices:
+                    variant = variants[index]
+                    scale = variant.get("scale", 1)
+                    if "width" in variant:
+                        scale = variant["width"] / scene.viewbox[2]
+                    elif "height" in variant:
+                        scale = variant["height"] / scene.viewbox[3]
+                    svg = svg_open_tag(scene.viewbox, scale) + body
+                    if self.compact:
+                        svg = compact_svg(svg, self.precision)
+                    svgs[index] = svg
+        finally:
+            self._layout_cache = None
+            for name, value in saved.items():
+                setattr(self, name, value)
+        return svgs
+
+    def _build_elements(self):
+        # Implement the specific layout for this subclass, filling self.defs
+        # and self.svg_elements with scene primitives
         pass
 
-    def to_base64_src(self):
-        svg_str = self.render()
+    def render(self):
+        """
+        Render the graph as an SVG string. With a render_cache, a hit returns
+        the cached output without laying the graph out, so svg_elements,
+        most_extreme_dimensions and the other layout attributes (such as
+        drawn_data or drawn_arrows) keep what the last uncached render left
+        in them. Use to_scene() to inspect the layout.
+        """
+        if self.render_cache is None:
+            return "".join(self.iter_render())
+        return self._render_cached(spec_key(self.to_spec()))
+
+    def _render_cached(self, key):
+        svg_str = self.render_cache.get(key, "svg")
+        if svg_str is None:
+            svg_str = "".join(self.iter_render())
+            self.render_cache.put(key, "svg", svg_str)
+        return svg_str
+
+    def iter_render(self, encoding=None):
+        """
+        Render the graph as a generator of SVG chunks, so that large graphs
+        can be written out without joining the whole document into one
+        string. Chunks are str, or bytes if an encoding is given.
+
+        All elements are built before the first chunk is yielded, since the
+        header depends on the final extent of the drawing, and only their
+        serialization is streamed. With compact, the whole document is
+        joined and compacted before it is yielded.
+        """
+        self._build_elements()
+        chunks = self._iter_svg()
+        if self.compact:
+            # Compacting needs the whole document
+            chunks = [compact_svg("".join(chunks), self.precision)]
+        if encoding:
+            for chunk in chunks:
+                yield chunk.encode(encoding)
+        else:
+            yield from chunks
+
+    def render_to(self, fp, encoding="utf-8"):
+        """
+        Render the graph into a writable file-like object. Text streams receive
+        str chunks; anything else (binary files, gzip streams, sockets)
+        receives bytes in the given encoding.
+        """
+        if isinstance(fp, io.TextIOBase):
+            encoding = None
+        for chunk in self.iter_render(encoding=encoding):
+            fp.write(chunk)
+
+    def _spec_data(self):
+        # Implement for each subclass: the arguments of the add_* calls
+        return {}
+
+    def to_spec(self):
+        """
+        Describe the graph as an immutable GraphSpec (see simplegraph.spec),
+        which can be hashed, cached and sent to other processes.
+        """
+        parameters = inspect.signature(type(self).__init__).parameters
+        kwargs = {
+            name: getattr(self, name)
+            for name in parameters
+            if name not in self._spec_attributes and hasattr(self, name)
+        }
+        attributes = {name: getattr(self, name) for name in self._spec_attributes}
+        return GraphSpec(
+            type(self).__name__,
+            {"kwargs": kwargs, "attributes": attributes, **self._spec_data()},
+        )
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build a graph from a GraphSpec, or from a dict with the same keys as
+        GraphSpec.to_dict().
+        """
+        if isinstance(spec, GraphSpec):
+            spec = spec.to_dict()
+        if spec.get("graph", cls.__name__) != cls.__name__:
+            raise ValueError(f"Spec describes a {spec['graph']}, not a {cls.__name__}.")
+
+        graph = cls(**spec.get("kwargs", {}))
+        for name, value in spec.get("attributes", {}).items():
+            setattr(graph, name, value)
+        for series in spec.get("series", []):
+            graph.add_series(**series)
+        for bubble in spec.get("bubbles", []):
+            graph.add_bubble(**bubble)
+        for arrow in spec.get("arrows", []):
+            graph.add_arrow(**arrow)
+        return graph
+
+    def _encode_base64(self, svg_str):
         svg_bytes = svg_str.encode("utf-8")
         encoded_svg = base64.b64encode(svg_bytes).decode("utf-8")
-        return "data:image/svg+xml;base64," + encoded_svg
+        return BASE64_PREFIX + encoded_svg
+
+    def iter_base64(self, block_size=3 * 16384):
+        """
+        Render the graph as a base64 data URI, as a generator of bytes
+        chunks. The SVG is encoded block by block as it is rendered, so the
+        whole document is never held in memory. block_size is rounded down
+        to a multiple of 3, which base64 encodes without padding.
+        """
+        block_size = max(block_size - block_size % 3, 3)
+        yield BASE64_PREFIX.encode("ascii")
+        pending = bytearray()
+        for chunk in self.iter_render(encoding="utf-8"):
+            pending += chunk
+            if len(pending) >= block_size:
+                size = len(pending) - len(pending) % 3
+                with memoryview(pending) as view:
+                    yield binascii.b2a_base64(view[:size], newline=False)
+                del pending[:size]
+        if pending:
+            yield binascii.b2a_base64(pending, newline=False)
+
+    def to_base64_bytes(self):
+        """
+        Return the base64 data URI of the graph as ASCII bytes.
+        """
+        if self.render_cache is not None:
+            return self.to_base64_src().encode("ascii")
+        buffer = io.BytesIO()
+        for chunk in self.iter_base64():
+            buffer.write(chunk)
+        return buffer.getvalue()
+
+    def write_base64_src(self, fp):
+        """
+        Write the base64 data URI of the graph into a writable file-like
+        object, as str for text streams and as bytes otherwise.
+        """
+        if self.render_cache is not None:
+            chunks = [self.to_base64_bytes()]
+        else:
+            chunks = self.iter_base64()
+        text = isinstance(fp, io.TextIOBase)
+        for chunk in chunks:
+            fp.write(chunk.decode("ascii") if text else chunk)
+
+    def to_base64_src(self):
+        if self.render_cache is None:
+            return self.to_base64_bytes().decode("ascii")
+
+        key = spec_key(self.to_spec())
+        src = self.render_cache.get(key, "base64")
+        if src is None:
+            src = self._encode_base64(self._render_cached(key))
+            self.render_cache.put(key, "base64", src)
+        return src
 
     def upload_to_github_gist(self, access_token, filename=None):
+        # Imported here, as only uploads need them
+        import urllib.request
+
+        from .gist import GITHUB_API_URL
+        from .gist import gist_payload
+
         token = access_token
-        access_url = "https://api.github.com/gists"
-
-        epoch_time = int(time.time())
-
-        if not filename:
-            filename = "simplegraph"
-        filename = f"{filename}_{epoch_time}.svg"
-        description = self.title if self.title else filename
-        public = "true"
-
-        raw_svg = self.render()
-        json_svg = json.dumps(raw_svg)[
-            1:-1
-        ]  # escape the SVG content without adding extra quotes
-
-        data = f"""{{
-        "description": "{description}",
-        "public": {public},
-        "files": {{
-            "{filename}": {{
-            "content": "{json_svg}"
-            }}
-        }}
-        }}"""
+        access_url = f"{GITHUB_API_URL}/gists"
+        filename, data = gist_payload(self, filename)
 
         req = urllib.request.Request(access_url)
         req.add_header("Authorization", f"token {token}")
         req.add_header("Content-Type", "application/json")
 
         try:
-            response = urllib.request.urlopen(req, data=data.encode("utf-8"))
+            response = urllib.request.urlopen(req, data=data)
             response_dict = json.load(response)
             raw_url = response_dict["files"][filename]["raw_url"]
             return raw_url
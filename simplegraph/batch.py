@@ -0,0 +1,130 @@
+import collections
+import concurrent.futures
+import itertools
+import os
+import traceback
+
+from .ribbon import RibbonGraph
+from .categorical import CategoricalGraph
+from .bubble_and_arrow import BubbleAndArrowGraph
+from .spec import GraphSpec
+
+GRAPH_CLASSES = {
+    "CategoricalGraph": CategoricalGraph,
+    "RibbonGraph": RibbonGraph,
+    "BubbleAndArrowGraph": BubbleAndArrowGraph,
+}
+
+OUTPUT_FORMATS = ("svg", "base64")
+
+# The result for one chart: its position in the input, the rendered output
+# and, if rendering failed, the formatted traceback instead of an output
+BatchResult = collections.namedtuple("BatchResult", ["index", "output", "error"])
+
+
+def build_graph(spec):
+    """
+    Build a graph from a GraphSpec (see BaseGraph.to_spec) or from a plain
+    dict with these keys:
+
+    graph: class name, e.g. "CategoricalGraph"
+    kwargs: constructor keyword arguments
+    attributes: attributes set after construction, e.g. {"x_labels": [...]}
+    series: keyword arguments for each add_series call
+    bubbles, arrows: keyword arguments for each add_bubble/add_arrow call
+    """
+    name = spec.graph if isinstance(spec, GraphSpec) else spec.get("graph")
+    if name not in GRAPH_CLASSES:
+        raise ValueError(f"Unknown graph type {name!r}.")
+    return GRAPH_CLASSES[name].from_spec(spec)
+
+
+def render_spec(spec, output="svg"):
+    graph = build_graph(spec)
+    if output == "base64":
+        return graph.to_base64_src()
+    return graph.render()
+
+
+def _render_chunk(chunk, output):
+    results = []
+    for index, spec in chunk:
+        try:
+            results.append(BatchResult(index, render_spec(spec, output), None))
+        except Exception:
+            results.append(BatchResult(index, None, traceback.format_exc()))
+    return results
+
+
+def _chunked(specs, chunksize):
+    iterator = enumerate(specs)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def render_many(specs, workers=None, chunksize=1, ordered=True, output="svg"):
+    """
+    Render many graphs across a pool of worker processes. specs is an
+    iterable of GraphSpecs or spec dicts (see build_graph); output is "svg"
+    or "base64".
+
+    Yields a BatchResult per spec, in input order if ordered is True and as
+    soon as they are done otherwise. A chart that fails to render gets its
+    traceback in BatchResult.error and does not stop the batch. Specs are
+    sent to the workers in chunks of chunksize, and only a few chunks per
+    worker are in flight at a time, so the input can be a lazy iterable.
+    workers=0 renders in the calling process.
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format {output!r}, expected one of {OUTPUT_FORMATS}."
+        )
+    chunks = _chunked(specs, chunksize)
+
+    if workers == 0:
+        for chunk in chunks:
+            yield from _render_chunk(chunk, output)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+
+        chunk_indices = {}
+
+        def submit(chunk):
+            future = executor.submit(_render_chunk, chunk, output)
+            chunk_indices[future] = [index for index, _ in chunk]
+            return future
+
+        def results_of(future):
+            indices = chunk_indices.pop(future)
+            try:
+                return future.result()
+            except Exception:
+                # The worker itself failed, e.g. a spec that cannot be pickled
+                error = traceback.format_exc()
+                return [BatchResult(index, None, error) for index in indices]
+
+        if ordered:
+            pending = collections.deque(
+                submit(chunk) for chunk in itertools.islice(chunks, max_pending)
+            )
+            while pending:
+                future = pending.popleft()
+                yield from results_of(future)
+                for chunk in itertools.islice(chunks, 1):
+                    pending.append(submit(chunk))
+        else:
+            pending = {submit(chunk) for chunk in itertools.islice(chunks, max_pending)}
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield from results_of(future)
+                    for chunk in itertools.islice(chunks, 1):
+                        pending.add(submit(chunk))
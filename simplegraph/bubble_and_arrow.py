@@ -1,10 +1,16 @@
+import bisect
 import math
 
+from .arrows import arrow_paths
 from .base import BaseGraph
+from .layout import LAYOUTS
+from .layout import force_layout
+from .layout import ring_layout
+from .scene import Circle
+from .scene import Group
+from .scene import Path
 from .utils import hex_to_rgba
 from .utils import is_dark
-from .utils import estimate_text_dimensions
-from .utils import boxes_overlap
 from .utils import polar_to_cartesian
 
 
@@ -16,6 +22,9 @@ class BubbleAndArrowGraph(BaseGraph):
     data provided.
     """
 
+    _spec_attributes = BaseGraph._spec_attributes + ("cx", "cy", "inner_fill")
+    _theme_attributes = BaseGraph._theme_attributes + ("inner_fill",)
+
     def __init__(
         self,
         width=300,
@@ -40,6 +49,14 @@ class BubbleAndArrowGraph(BaseGraph):
         title_font_size=None,
         element_spacing=None,
         watermark=None,
+        label_strategy="shift",
+        layout="circle",
+        layout_seed=0,
+        layout_iterations=50,
+        min_arrow_size=None,
+        bundle_strength=0,
+        compact=False,
+        precision=2,
     ):
         super().__init__(
             width=width,
@@ -64,14 +81,29 @@ class BubbleAndArrowGraph(BaseGraph):
             title_font_size=title_font_size,
             element_spacing=element_spacing,
             watermark=watermark,
+            compact=compact,
+            precision=precision,
         )
         self.bubbles = []
+        # Arrows as added, and indexed by origin in drawing order
         self.arrows = []
+        self.arrows_by_origin = {}
+        self.pending_arrows = []
+        self.arrow_order = None
         self.total_arrow_width_from_origin = {}
         self.cx = self.width / 2
         self.cy = self.height / 2
         self.dot_labels = {}
         self.text_buffer = []
+        self.label_strategy = label_strategy
+        assert layout in LAYOUTS, f"layout must be one of {LAYOUTS}"
+        self.layout = layout
+        self.layout_seed = layout_seed
+        self.layout_iterations = layout_iterations
+        assert 0 <= bundle_strength <= 1, "bundle_strength must be between 0 and 1"
+        self.min_arrow_size = min_arrow_size
+        self.bundle_strength = bundle_strength
+        self.drawn_arrows = []
         self.inner_fill = (
             self.background_color or "#000000" if self.dark_mode else "#ffffff"
         )
@@ -100,9 +132,73 @@ class BubbleAndArrowGraph(BaseGraph):
         assert size >= 0, "size cannot be negative"
         if size > 0:
             self.arrows.append([origin, destination, size])
+            if not self._index_arrow(len(self.arrows) - 1):
+                self.pending_arrows.append(len(self.arrows) - 1)
+
+    def _index_arrow(self, number):
+        """
+        Add an arrow of self.arrows to arrows_by_origin and the total width
+        of its origin, resolving labels to bubble indices. Returns False if
+        it names a label that has not been added yet.
+        """
+        origin, destination, size = self.arrows[number]
+        origin = self.dot_labels.get(origin, origin)
+        destination = self.dot_labels.get(destination, destination)
+        if isinstance(origin, str) or isinstance(destination, str):
+            return False
+        # Arrows are drawn by destination, those pointing back to earlier
+        # bubbles last, and arrows between the same bubbles in the order added
+        bisect.insort(
+            self.arrows_by_origin.setdefault(origin, []),
+            (destination < origin, destination, number, size),
+        )
+        self.total_arrow_width_from_origin[origin] = (
+            self.total_arrow_width_from_origin.get(origin, 0) + size
+        )
+        self.arrow_order = None
+        return True
+
+    def _indexed_arrows(self):
+        """
+        Return the arrows as [origin, destination, size] with bubble indices,
+        in drawing order. The list is kept until an arrow is added. Raises a
+        KeyError for an unknown label.
+        """
+        self.pending_arrows = [
+            number for number in self.pending_arrows if not self._index_arrow(number)
+        ]
+        for number in self.pending_arrows:
+            for end in self.arrows[number][:2]:
+                if isinstance(end, str) and end not in self.dot_labels:
+                    raise KeyError(end)
+        if self.arrow_order is None:
+            self.arrow_order = [
+                [origin, destination, size]
+                for origin in sorted(self.arrows_by_origin)
+                for _, destination, _, size in self.arrows_by_origin[origin]
+            ]
+        return self.arrow_order
+
+    def _spec_data(self):
+        labels = {index: label for label, index in self.dot_labels.items()}
+        return {
+            "bubbles": [
+                {
+                    "size": size,
+                    "inner_size": inner_size,
+                    "text": text,
+                    "label": labels.get(index),
+                }
+                for index, (size, inner_size, text) in enumerate(self.bubbles)
+            ],
+            "arrows": [
+                {"origin": origin, "destination": destination, "size": size}
+                for origin, destination, size in self.arrows
+            ],
+        }
 
     def _draw_dot(self, x, y, fill, radius=5, inner_radius=None, text=None):
-        text_width, _ = estimate_text_dimensions(text, 10) if text else 0
+        text_width, _ = self.text_metrics.measure(text, 10) if text else 0
         self.most_extreme_dimensions["left"] = min(
             self.most_extreme_dimensions["left"], x - radius
         )
@@ -115,9 +211,9 @@ class BubbleAndArrowGraph(BaseGraph):
         self.most_extreme_dimensions["bottom"] = max(
             self.most_extreme_dimensions["bottom"], y + radius
         )
-        dot = f'<circle cx="{x}" cy="{y}" r="{radius}" fill="{fill}" />'
+        dot = Circle(x, y, radius, fill=fill)
         if inner_radius:
-            dot += f'<circle cx="{x}" cy="{y}" r="{inner_radius}" fill="{self.inner_fill}" />'
+            dot = Group([dot, Circle(x, y, inner_radius, fill=self.inner_fill)])
         if text:
             text_color = "black"
             if self.dark_mode:
@@ -129,91 +225,13 @@ class BubbleAndArrowGraph(BaseGraph):
             self.text_buffer.append([x, y, text, text_color])
         return dot
 
-    def _draw_arrow(self, x1, y1, x2, y2, cx, cy, backoff, width=1, start_offset=0):
-        circular_arrow = x1 == x2 and y1 == y2
-
-        arrow_head_length = max(10, width / 5)
-        direction_in = math.atan2(y2 - cy, x2 - cx)
-        direction_to_center = math.atan2(y1 - cy, x1 - cx)
-        distance_to_center = math.sqrt((x1 - cx) ** 2 + (y1 - cy) ** 2)
-        ctrl_distance = distance_to_center
-        interior_ctrl_distance = ctrl_distance - 2 * width
-
-        if circular_arrow:
-            # Self-pointing arrows emerge sideways
-            direction_mid = direction_to_center - math.pi / 2
-            direction_out = direction_to_center + 3 * math.pi / 4
-            direction_in += math.pi / 4
-        else:
-            direction_out = direction_to_center
-            direction_mid = math.atan2(y2 - y1, x2 - x1)
-
-        perpendicular = direction_mid + math.pi / 2
-        perpendicular_out = direction_out + math.pi / 2
-        perpendicular_in = direction_in + math.pi / 2
-        cx_offset, cy_offset = polar_to_cartesian(perpendicular, width / 2)
-        x_out_offset, y_out_offset = polar_to_cartesian(perpendicular_out, width / 2)
-        x_out_shift, y_out_shift = polar_to_cartesian(perpendicular_out, start_offset)
-        x_in_offset, y_in_offset = polar_to_cartesian(perpendicular_in, width / 2)
-
-        # Calculate backoff
-        backoff_x, backoff_y = polar_to_cartesian(direction_in, backoff)
-
-        # New position of x2, y2 after backoff
-        x2_backoff = x2 - backoff_x
-        y2_backoff = y2 - backoff_y
-
-        # Arrow head with respect to the original x2, y2, but positioned at the backoff location
-        x_arrow_head, y_arrow_head = polar_to_cartesian(
-            direction_in, -arrow_head_length, x2_backoff, y2_backoff
-        )
-
-        if circular_arrow:
-            # Calculate positions of the control points along the direction_out and direction_in lines
-            ctrl_x1, ctrl_y1 = polar_to_cartesian(direction_out, ctrl_distance, x1, y1)
-            ctrl_x2, ctrl_y2 = polar_to_cartesian(direction_in, -ctrl_distance, x2, y2)
-
-            ctrl_x1_interior, ctrl_y1_interior = polar_to_cartesian(
-                direction_out, interior_ctrl_distance, x1, y1
-            )
-            ctrl_x2_interior, ctrl_y2_interior = polar_to_cartesian(
-                direction_in, -interior_ctrl_distance, x2, y2
-            )
-
-            return (
-                f"M {x1+x_out_offset},{y1+y_out_offset} "
-                + f"C{ctrl_x1_interior},{ctrl_y1_interior} {ctrl_x2_interior},{ctrl_y2_interior} {x_arrow_head + x_in_offset},{y_arrow_head + y_in_offset} "
-                + f"L{x_arrow_head + 1.3 * x_in_offset},{y_arrow_head + 1.3 * y_in_offset} "
-                + f"L{x2_backoff},{y2_backoff} L{x_arrow_head - 1.3 * x_in_offset},{y_arrow_head - 1.3 * y_in_offset} "
-                + f"L{x_arrow_head - x_in_offset},{y_arrow_head - y_in_offset} "
-                + f"C{ctrl_x2},{ctrl_y2} {ctrl_x1},{ctrl_y1} {x1-x_out_offset},{y1-y_out_offset} z "
-            )
-
-        # Control points for each side of the arrow, adjusted by half the width in the direction perpendicular to the arrow
-        ctrl_x1 = cx + cx_offset
-        ctrl_y1 = cy + cy_offset
-        ctrl_x2 = cx - cx_offset
-        ctrl_y2 = cy - cy_offset
-
-        return (
-            f"M {x1-x_out_offset-x_out_shift},{y1-y_out_offset-y_out_shift} "
-            + f"Q{ctrl_x1},{ctrl_y1} {x_arrow_head + x_in_offset},{y_arrow_head + y_in_offset} "
-            + f"L{x_arrow_head + 1.3 * x_in_offset},{y_arrow_head + 1.3 * y_in_offset} "
-            + f"L{x2_backoff},{y2_backoff} L{x_arrow_head - 1.3 * x_in_offset},{y_arrow_head - 1.3 * y_in_offset} "
-            + f"L{x_arrow_head - x_in_offset},{y_arrow_head - y_in_offset}"
-            + f"Q{ctrl_x2},{ctrl_y2} {x1+x_out_offset-x_out_shift},{y1+y_out_offset-y_out_shift} z "
-        )
-
-    def _draw_arrows(self, arrows, fill):
-        path = ""
-        for arrow in arrows:
-            path += self._draw_arrow(*arrow)
-        return f'<path d="{path}" fill="{hex_to_rgba(fill,0.5)}" />'
-
-    def _draw_text(self, x, y, text, fill):
-        return self._generate_text(text, x, y, fill=fill)
+    def _draw_arrows(self, paths, fill):
+        return Path("".join(paths), fill=hex_to_rgba(fill, 0.5))
 
     def _calculate_positions(self):
+        if self.layout != "circle":
+            return self._calculate_layout_positions()
+
         inter_bubble_space = 0.1  # Proportional gap between bubbles
 
         # Calculate radii for all bubbles without scaling
@@ -292,33 +310,136 @@ class BubbleAndArrowGraph(BaseGraph):
 
         return positions
 
-    def render(self):
-        self._reset_graph()
-        svg = []
-        svg_text = []
-        self.text_buffer = []
-        self.total_arrow_width_from_origin = {}
-        self.defs = []
-        self.svg_elements = []
+    def _calculate_layout_positions(self):
+        """
+        Place the bubbles with the rings or force layout (see
+        simplegraph.layout) and scale them to fill the canvas.
+        """
+        radii = [math.sqrt(size / math.pi) for size, _, _ in self.bubbles]
+        if self.layout == "rings":
+            xs, ys = ring_layout(radii)
+        else:
+            arrows = self._indexed_arrows()
+            xs, ys = force_layout(
+                radii,
+                [(origin, destination) for origin, destination, _ in arrows],
+                [size for _, _, size in arrows],
+                seed=self.layout_seed,
+                iterations=self.layout_iterations,
+            )
 
-        positions = self._calculate_positions()
+        left = min(x - r for x, r in zip(xs.tolist(), radii))
+        right = max(x + r for x, r in zip(xs.tolist(), radii))
+        top = min(y - r for y, r in zip(ys.tolist(), radii))
+        bottom = max(y + r for y, r in zip(ys.tolist(), radii))
+        scaling_factor = min(
+            self.width / max(right - left, 1e-9),
+            self.height / max(bottom - top, 1e-9),
+        )
+        x_shift = self.cx - (left + right) / 2 * scaling_factor
+        y_shift = self.cy - (top + bottom) / 2 * scaling_factor
+        return [
+            (
+                x_shift + x * scaling_factor,
+                y_shift + y * scaling_factor,
+                radius * scaling_factor,
+                math.sqrt(bubble[1] / math.pi) * scaling_factor if bubble[1] else None,
+            )
+            for x, y, radius, bubble in zip(
+                xs.tolist(), ys.tolist(), radii, self.bubbles
+            )
+        ]
 
-        for i, arrow in enumerate(self.arrows):
-            if isinstance(arrow[0], str):
-                self.arrows[i][0] = self.dot_labels[arrow[0]]
-            if isinstance(arrow[1], str):
-                self.arrows[i][1] = self.dot_labels[arrow[1]]
+    def _arrow_control(self, origin_position, destination_position):
+        # Arrows curve through the middle of the circle layout; elsewhere they
+        # bow slightly to the side, and loops leave away from the middle
+        if self.layout == "circle":
+            return self.cx, self.cy
+        x1, y1, radius = origin_position[:3]
+        x2, y2 = destination_position[:2]
+        if origin_position is destination_position:
+            direction = math.pi / 2
+            if (x1, y1) != (self.cx, self.cy):
+                direction = math.atan2(y1 - self.cy, x1 - self.cx)
+            return polar_to_cartesian(direction, -3 * radius, x1, y1)
+        return (
+            (x1 + x2) / 2 - 0.15 * (y2 - y1),
+            (y1 + y2) / 2 + 0.15 * (x2 - x1),
+        )
 
-            if self.arrows[i][0] not in self.total_arrow_width_from_origin:
-                self.total_arrow_width_from_origin[self.arrows[i][0]] = 0
-            self.total_arrow_width_from_origin[self.arrows[i][0]] += arrow[2]
+    def _aggregate_arrows(self, arrows):
+        """
+        Sum arrows between the same bubbles into one flow, and merge the flows
+        smaller than min_arrow_size into one "other" flow per origin, with
+        None as destination. Returns flows in drawing order.
+        """
+        totals = {}
+        for origin, destination, size in arrows:
+            totals[(origin, destination)] = totals.get((origin, destination), 0) + size
+
+        flows = []
+        other = {}
+        for (origin, destination), size in totals.items():
+            if size >= self.min_arrow_size:
+                flows.append([origin, destination, size])
+            else:
+                other[origin] = other.get(origin, 0) + size
+        flows.extend([origin, None, size] for origin, size in other.items())
+        flows.sort(
+            key=lambda x: (
+                x[0],
+                x[1] is None,
+                x[1] is not None and x[1] < x[0],
+                x[1] or 0,
+            )
+        )
+        return flows
+
+    def _bundle_hubs(self, positions):
+        """
+        Group the bubbles into about sqrt(n) runs of neighbours by their angle
+        around the middle of the graph. Returns the group of each bubble and
+        the hub of each group, halfway between its bubbles and the middle.
+        """
+        # The circle layout already places the bubbles in order
+        order = list(range(len(positions)))
+        if self.layout != "circle":
+            order.sort(
+                key=lambda i: math.atan2(
+                    positions[i][1] - self.cy, positions[i][0] - self.cx
+                )
+            )
+        group_size = max(1, round(math.sqrt(len(positions))))
+        groups = [0] * len(positions)
+        members = []
+        for rank, index in enumerate(order):
+            if rank % group_size == 0:
+                members.append([])
+            groups[index] = len(members) - 1
+            members[-1].append(index)
+        hubs = [
+            (
+                (self.cx + sum(positions[i][0] for i in group) / len(group)) / 2,
+                (self.cy + sum(positions[i][1] for i in group) / len(group)) / 2,
+            )
+            for group in members
+        ]
+        return groups, hubs
+
+    def _arrows_from_origin(self, positions):
+        """
+        Return the arrow_paths rows of each arrow, grouped by origin.
+        """
+        self.drawn_arrows = self._indexed_arrows()
+        if self.min_arrow_size is not None:
+            self.drawn_arrows = self._aggregate_arrows(self.drawn_arrows)
+        if self.bundle_strength:
+            groups, hubs = self._bundle_hubs(positions)
 
-        self.arrows.sort(key=lambda x: (x[0], x[1] < x[0], x[1]))
         prev_origin = 0
         width_of_existing_arrows = 0
         arrows_from_origin = {}
-        # Draw Arrows
-        for arrow in self.arrows:
+        for arrow in self.drawn_arrows:
             origin = arrow[0]
             origin_position = positions[origin]
             if arrow[0] != prev_origin:
@@ -337,26 +458,92 @@ class BubbleAndArrowGraph(BaseGraph):
                 width_of_existing_arrows + (width / 2) - (width_all_arrows / 2)
             )
             width_of_existing_arrows += width
-            destination_position = positions[arrow[1]]
-            backoff = positions[arrow[1]][2]
             if origin not in arrows_from_origin:
                 arrows_from_origin[origin] = []
+
+            if arrow[1] is None:
+                # The other flow is a short straight stub pointing outwards
+                direction = math.pi / 2
+                if origin_position[:2] != (self.cx, self.cy):
+                    direction = math.atan2(
+                        origin_position[1] - self.cy, origin_position[0] - self.cx
+                    )
+                destination_position = polar_to_cartesian(
+                    direction,
+                    origin_position[2] + max(20, width),
+                    origin_position[0],
+                    origin_position[1],
+                )
+                backoff = 0
+                control_x = (origin_position[0] + destination_position[0]) / 2
+                control_y = (origin_position[1] + destination_position[1]) / 2
+            else:
+                destination_position = positions[arrow[1]]
+                backoff = positions[arrow[1]][2]
+                control_x, control_y = self._arrow_control(
+                    origin_position, destination_position
+                )
+                if self.bundle_strength and origin != arrow[1]:
+                    # Arrows between the same groups share a control point
+                    hub1 = hubs[groups[origin]]
+                    hub2 = hubs[groups[arrow[1]]]
+                    strength = self.bundle_strength
+                    control_x += strength * ((hub1[0] + hub2[0]) / 2 - control_x)
+                    control_y += strength * ((hub1[1] + hub2[1]) / 2 - control_y)
             arrows_from_origin[origin].append(
                 [
                     origin_position[0],
                     origin_position[1],
                     destination_position[0],
                     destination_position[1],
-                    self.cx,
-                    self.cy,
+                    control_x,
+                    control_y,
                     backoff,
                     width,
                     start_offset,
                 ]
             )
+        return arrows_from_origin
 
+    def _apply_theme(self, **theme):
+        super()._apply_theme(**theme)
+        self.inner_fill = (
+            self.background_color or "#000000" if self.dark_mode else "#ffffff"
+        )
+
+    def _compute_layout(self):
+        """
+        Compute the bubble positions and the arrows, with the path data of all
+        arrows computed at once; none of them depend on colors.
+        """
+        positions = self._calculate_positions()
+        arrows_from_origin = self._arrows_from_origin(positions)
+        paths = arrow_paths(
+            [arrow for arrows in arrows_from_origin.values() for arrow in arrows]
+        )
+        return positions, arrows_from_origin, paths
+
+    def _build_elements(self):
+        self._reset_graph()
+        svg = []
+        self.text_buffer = []
+        self.defs = []
+        self.svg_elements = []
+
+        positions, arrows_from_origin, paths = self._shared_layout(
+            "bubbles", self._compute_layout
+        )
+
+        # Draw Arrows
+        start = 0
         for origin, arrows in arrows_from_origin.items():
-            svg.append(self._draw_arrows(arrows, self.colors[origin]))
+            svg.append(
+                self._draw_arrows(
+                    paths[start : start + len(arrows)],
+                    self.colors[origin % len(self.colors)],
+                )
+            )
+            start += len(arrows)
 
         # Draw Bubbles
         for i, bubble in enumerate(self.bubbles):
@@ -364,7 +551,7 @@ class BubbleAndArrowGraph(BaseGraph):
             dot = self._draw_dot(
                 position[0],
                 position[1],
-                self.colors[i],
+                self.colors[i % len(self.colors)],
                 radius=position[2],
                 inner_radius=position[3],
                 text=bubble[2],
@@ -372,49 +559,7 @@ class BubbleAndArrowGraph(BaseGraph):
 
             svg.append(dot)
 
-        # Shift labels to not overlap
-        text_to_check = 0
-        num_loops = 0
-        max_loops = len(self.text_buffer) * 10
-        while text_to_check < len(self.text_buffer) and num_loops < max_loops:
-            first_text = self.text_buffer[text_to_check]
-            any_change = False
-            for i in [-2, -1, 1, 2]:
-                other_index = (text_to_check + i) % len(self.text_buffer)
-                other_text = self.text_buffer[other_index]
-                first_text_width, first_text_height = estimate_text_dimensions(
-                    first_text[2], 10
-                )
-                other_text_width, other_text_height = estimate_text_dimensions(
-                    other_text[2], 10
-                )
-                vertical_overlap = boxes_overlap(
-                    first_text[0],
-                    first_text[1],
-                    first_text_width,
-                    first_text_height,
-                    other_text[0],
-                    other_text[1],
-                    other_text_width,
-                    other_text_height,
-                )
-                if vertical_overlap:
-                    if first_text[1] < other_text[1]:
-                        self.text_buffer[text_to_check][1] -= vertical_overlap
-                    else:
-                        self.text_buffer[text_to_check][1] += vertical_overlap
-
-                    any_change = True
-            if any_change:
-                text_to_check = max(0, text_to_check - 3)
-            else:
-                text_to_check += 1
-            num_loops += 1
-
-        # Draw Text
-        for text in self.text_buffer:
-            svg_text.append(self._draw_text(*text))
+        # Place labels so they do not overlap
+        svg_text = self._draw_labels(self.text_buffer, self.label_strategy)
 
         self.svg_elements = svg + svg_text
-
-        return self._generate_svg()
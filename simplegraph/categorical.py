@@ -1,51 +1,87 @@
+import numpy as np
+
 from .base import BaseGraph
+from .downsample import DEFAULT_METHODS
+from .downsample import DOWNSAMPLE_METHODS
+from .downsample import bucket_edges
+from .downsample import downsample
+from .scene import Dot
+from .scene import Line
+from .scene import Path
+from .scene import Rect
 from .utils import human_readable_number
 from .utils import calculate_ticks
 from .utils import match_ticks
 
+SERIES_TYPES = ("bar", "line", "dot")
 
-def stacked_bar_range(data, series_types, secondary):
-    non_secondary_bars_to_use = [
-        not secondary[index] and series_types[index][0] == "bar"
-        for index in range(len(secondary))
-    ]
-
-    stacked_positive_data = [
-        sum(
-            max(value, 0)
-            for i, value in enumerate(column)
-            if non_secondary_bars_to_use[i]
-        )
-        for column in zip(*data)
-    ]
-
-    stacked_negative_data = [
-        sum(
-            min(value, 0)
-            for i, value in enumerate(column)
-            if non_secondary_bars_to_use[i]
+# The per-series rows of the geometry computed by _series_geometry
+SERIES_GEOMETRY = ("x", "y", "heights", "value_x", "value_y", "values")
+
+
+def series_matrix(data):
+    """
+    Return the series as one series x category float64 array. Series can be
+    lists or any buffer, such as NumPy arrays, array.array or memoryviews.
+    """
+    if len({len(series) for series in data}) > 1:
+        raise ValueError("All series must have the same number of values.")
+    return np.array(data, dtype=float)
+
+
+def categorical_ranges(values, series_types, secondary, stacked=False):
+    """
+    Return the (min, max) of the primary and of the secondary axis of a
+    series x category matrix, or (None, None) for an axis without series.
+    Stacked bars count towards their axis with the sums of their positive
+    and of their negative values in each category; other series do not
+    count then.
+    """
+    values = np.asarray(values, dtype=float)
+    secondary = np.array(secondary, dtype=bool)
+    if not len(secondary):
+        return (None, None), (None, None)
+
+    if stacked:
+        is_bar = np.array(
+            [series_type == "bar" for series_type, _ in series_types], dtype=bool
         )
-        for column in zip(*data)
-    ]
-    return (
-        (min(stacked_negative_data), max(stacked_positive_data))
-        if non_secondary_bars_to_use
-        else (None, None)
-    )
+        ranges = []
+        for bars, has_series in [
+            (is_bar & ~secondary, True),
+            (is_bar & secondary, secondary.any()),
+        ]:
+            if not has_series:
+                ranges.append((None, None))
+                continue
+            stacked_negative = np.minimum(values[bars], 0).sum(axis=0)
+            stacked_positive = np.maximum(values[bars], 0).sum(axis=0)
+            ranges.append(
+                (float(stacked_negative.min()), float(stacked_positive.max()))
+            )
+        return tuple(ranges)
+
+    # Reduce each series once, then combine the series of each axis
+    if values.size:
+        series_min = values.min(axis=1)
+        series_max = values.max(axis=1)
+    ranges = []
+    for mask in (~secondary, secondary):
+        if not mask.any() or not values.size:
+            ranges.append((None, None))
+        else:
+            ranges.append(
+                (float(series_min[mask].min()), float(series_max[mask].max()))
+            )
+    return tuple(ranges)
+
+
+def stacked_bar_range(data, series_types, secondary):
+    return categorical_ranges(data, series_types, secondary, stacked=True)[0]
 
 
 def non_secondary_range(data, secondary):
-    non_secondary_values = [
-        value
-        for values, is_secondary in zip(data, secondary)
-        if not is_secondary
-        for value in values
-    ]
-    return (
-        (min(non_secondary_values), max(non_secondary_values))
-        if non_secondary_values
-        else (None, None)
-    )
+    return categorical_ranges(data, None, secondary)[0]
 
 
 class CategoricalGraph(BaseGraph):
@@ -56,6 +92,8 @@ class CategoricalGraph(BaseGraph):
     or dots.
     """
 
+    _spec_attributes = BaseGraph._spec_attributes + ("x_labels",)
+
     def __init__(
         self,
         width=300,
@@ -82,6 +120,12 @@ class CategoricalGraph(BaseGraph):
         title_font_size=None,
         element_spacing=None,
         watermark=None,
+        value_label_strategy=None,
+        incremental=False,
+        merge_paths=False,
+        max_categories=None,
+        compact=False,
+        precision=2,
     ):
         super().__init__(
             width=width,
@@ -106,12 +150,20 @@ class CategoricalGraph(BaseGraph):
             title_font_size=title_font_size,
             element_spacing=element_spacing,
             watermark=watermark,
+            value_label_strategy=value_label_strategy,
+            compact=compact,
+            precision=precision,
         )
         self.stacked = stacked
         self.bar_width = bar_width
+        self.incremental = incremental
+        self._geometry_cache = {}
+        self.merge_paths = merge_paths
+        self.max_categories = max_categories
         self.x_labels = []
         self.series_types = []
         self.secondary = []
+        self.downsampling = []
 
     def add_series(
         self,
@@ -120,237 +172,420 @@ class CategoricalGraph(BaseGraph):
         series_type="bar",
         print_values=False,
         secondary=False,
+        downsample=None,
     ):
+        """
+        Add a series, drawn as series_type "bar", "line" or "dot". With
+        downsample, a series with more values than the graph has room for is
+        reduced before it is drawn: "lttb" keeps the shape of a line,
+        "minmax" the envelope of dots and "sum", "mean" or "max" aggregate
+        bars. True picks the method that suits the series type.
+        """
+        if series_type not in SERIES_TYPES:
+            raise ValueError(
+                f"Unknown series type {series_type!r}, expected one of {SERIES_TYPES}."
+            )
+        if downsample not in (None, False, True) + DOWNSAMPLE_METHODS:
+            raise ValueError(
+                f"Unknown downsample method {downsample!r}, expected one of {DOWNSAMPLE_METHODS}."
+            )
         self.data.append(series)
         self.legend_labels.append(legend_label or "")
         self.series_types.append((series_type, print_values))
         self.secondary.append(secondary)
+        self.downsampling.append(downsample)
+
+    def _spec_data(self):
+        series_specs = []
+        for series, legend_label, (series_type, print_values), secondary, method in zip(
+            self.data,
+            self.legend_labels,
+            self.series_types,
+            self.secondary,
+            self.downsampling,
+        ):
+            series_spec = {
+                "series": series,
+                "legend_label": legend_label,
+                "series_type": series_type,
+                "print_values": print_values,
+                "secondary": secondary,
+            }
+            if method:
+                series_spec["downsample"] = method
+            series_specs.append(series_spec)
+        return {"series": series_specs}
+
+    def _downsample(self):
+        """
+        Return the series and x labels to draw. When a series asks for
+        downsampling and there are more categories than max_categories (by
+        default two per pixel of width), the categories are split into that
+        many buckets. Every series is reduced to one value per bucket, with
+        its own method or the default for its type, and each bucket is
+        labelled with the first label among its categories.
+        """
+        num_categories = len(self.data[0]) if self.data else 0
+        max_categories = self.max_categories or 2 * int(self.width)
+        if not any(self.downsampling) or num_categories <= max_categories:
+            return self.data, self.x_labels
+        if any(len(series) != num_categories for series in self.data):
+            raise ValueError("All series must have the same number of values.")
+
+        edges = bucket_edges(num_categories, max_categories)
+        data = []
+        for series, (series_type, _), method in zip(
+            self.data, self.series_types, self.downsampling
+        ):
+            if method is None or isinstance(method, bool):
+                method = DEFAULT_METHODS[series_type]
+            data.append(downsample(series, edges, method))
+        x_labels = [
+            next(
+                (label for label in self.x_labels[start:end] if label is not None),
+                None,
+            )
+            for start, end in zip(edges[:-1], edges[1:])
+            if start < len(self.x_labels)
+        ]
+        return data, x_labels
 
     def _draw_bar(self, x, y, width, height, fill):
+        # Bars of no height are not drawn, but leave an empty line
         if height == 0:
             return ""
         if height < 0:
             y += height
             height *= -1
-        return (
-            f'<rect x="{x}" y="{y}" width="{width}" height="{height}" fill="{fill}" />'
-        )
+        return Rect(x, y, width, height, fill)
 
     def _draw_dot(self, x, y, fill, radius=5, stroke=None, stroke_width=1):
         if stroke is None:
-            stroke_parameter = ""
-        else:
-            stroke_parameter = f'stroke="{stroke}" stroke-width="{stroke_width}"'
-        return f'<circle cx="{x}" cy="{y}" r="{radius}" fill="{fill}" {stroke_parameter} />'
+            stroke_width = None
+        return Dot(x, y, radius, fill, stroke, stroke_width)
 
     def _draw_line(self, x1, y1, x2, y2, stroke="black", stroke_width="1"):
-        return f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{stroke}" stroke-width="{stroke_width}" />'
-
-    def render(self):
-        self._reset_graph()
-        graph_width = self.width
-        has_secondary = any(self.secondary)
-        max_value_secondary = None
-        min_value_secondary = None
-        if self.stacked:
-            bar_series_indices = [
-                i for i, series in enumerate(self.series_types) if series[0] == "bar"
+        return Line(x1, y1, x2, y2, stroke, stroke_width)
+
+    def _draw_merged_series(self, index, geometry, bar_width):
+        """
+        Draw one series as a single path: the outlines of all bars, the
+        polyline through all points or a circle per dot. Value labels follow
+        the path. Returns the elements and the value labels that still need
+        to be placed.
+        """
+        series_type, print_values = self.series_types[index]
+        row = {name: geometry[name][index].tolist() for name in SERIES_GEOMETRY}
+        fill = self.colors[index]
+
+        if series_type == "bar":
+            d = []
+            for x, y, height in zip(row["x"], row["y"], row["heights"]):
+                if height == 0:
+                    continue
+                if height < 0:
+                    y += height
+                    height *= -1
+                d.append(f"M{x} {y}h{bar_width}v{height}h-{bar_width}z")
+            path = Path("".join(d), fill=fill) if d else None
+        elif series_type == "dot":
+            radius = 5
+            d = [
+                f"M{x - radius} {y}a{radius} {radius} 0 1 0 {2 * radius} 0"
+                + f"a{radius} {radius} 0 1 0 -{2 * radius} 0z"
+                for x, y in zip(geometry["center_x"].tolist(), row["y"])
             ]
-
-            assert all(self.secondary[i] for i in bar_series_indices) or not any(
-                self.secondary[i] for i in bar_series_indices
-            ), "All stacked bar series must be either primary or secondary."
-
-            min_value_primary, max_value_primary = stacked_bar_range(
-                self.data, self.series_types, self.secondary
+            path = Path("".join(d), fill=fill) if d else None
+        elif series_type == "line" and len(row["x"]) > 1:
+            points = [f"{x} {y}" for x, y in zip(row["x"], row["y"])]
+            path = Path(
+                "M" + "L".join(points), fill="none", stroke=fill, stroke_width=1
             )
-            if has_secondary:
-                min_value_secondary, max_value_secondary = stacked_bar_range(
-                    self.data, self.series_types, [not sec for sec in self.secondary]
-                )
         else:
-            min_value_primary, max_value_primary = non_secondary_range(
-                self.data, self.secondary
-            )
-            if has_secondary:
-                min_value_secondary, max_value_secondary = non_secondary_range(
-                    self.data, [not sec for sec in self.secondary]
+            path = None
+
+        elements = [path] if path else []
+        value_labels = []
+        if print_values:
+            for sub_index, value in enumerate(row["values"]):
+                self._add_value_label(
+                    elements,
+                    value_labels,
+                    value,
+                    row["value_x"][sub_index],
+                    row["value_y"][sub_index],
+                    self.text_color,
                 )
+        return elements, value_labels
 
-        primary_ticks = calculate_ticks(
-            min_value_primary,
-            max_value_primary,
-            include_zero=True,
-            target_tick_count=self.num_y_ticks,
+    def _series_geometry(
+        self,
+        values,
+        scales,
+        min_values,
+        bar_width,
+        bar_spacing,
+        total_bars_width,
+        bar_series_across,
+        rows=None,
+        offsets=None,
+    ):
+        """
+        Compute the position of every (series, category) cell at once. values
+        is a series x category array; scales and min_values hold the axis of
+        each series. rows limits the result to those series, and offsets are
+        the stacked bar offsets if already computed. Returns a dict of arrays
+        used by the SVG serialization.
+        """
+        num_series, num_categories = values.shape
+        if rows is None:
+            rows = list(range(num_series))
+        positions = {index: position for position, index in enumerate(rows)}
+        categories = np.arange(num_categories)
+        is_bar = np.array(
+            [self.series_types[index][0] == "bar" for index in rows], dtype=bool
         )
 
-        if has_secondary:
-            secondary_ticks = calculate_ticks(
-                min_value_secondary,
-                max_value_secondary,
-                include_zero=True,
-                target_tick_count=self.num_y_ticks,
-            )
-
-            primary_ticks, secondary_ticks = match_ticks(primary_ticks, secondary_ticks)
+        # Dots, lines and stacked bars sit at the same x; side by side bars get
+        # their own slot within the category
+        point_x = categories * bar_spacing + (bar_spacing - bar_width) / 2
+        start_x = categories * bar_spacing + (bar_spacing - total_bars_width) / 2
+        center_x = start_x + bar_width * (bar_series_across - 1) / 2
+        x = np.empty((len(rows), num_categories))
+        value_x = np.empty((len(rows), num_categories))
+        bar_count = 0
+        for index, (series_type, _) in enumerate(self.series_types):
+            position = positions.get(index)
+            if series_type == "dot" or series_type == "line" or self.stacked:
+                if position is not None:
+                    x[position] = point_x
+                    if series_type == "bar":
+                        x[position] -= bar_width / 2
+            else:
+                if position is not None:
+                    x[position] = start_x + bar_count * bar_width - bar_width / 2
+                bar_count += 1
+            if position is None:
+                continue
+            if series_type == "dot":
+                value_x[position] = center_x
+            elif series_type == "line":
+                value_x[position] = x[position]
+            else:
+                value_x[position] = x[position] + bar_width / 2
+
+        values = values[rows]
+        scales = scales[rows]
+        heights = values * scales[:, None]
+        y = self.height - (values - min_values[rows][:, None]) * scales[:, None]
 
-            adjusted_max_value_secondary = secondary_ticks[-1]
-            adjusted_min_value_secondary = secondary_ticks[0]
-
-        adjusted_max_value_primary = primary_ticks[-1]
-        adjusted_min_value_primary = primary_ticks[0]
-
-        num_bars = 0
-        if not self.stacked:
-            for type, _ in self.series_types:
-                if type == "bar":
-                    num_bars += 1
-        num_bars = max(num_bars, 1)
-        max_bar_width = graph_width / (num_bars * len(self.data[0]))
-
-        bar_width = min(max_bar_width, self.bar_width)
+        if self.stacked:
+            if offsets is None:
+                offsets = self._stack_offsets(values, heights, is_bar)
+            else:
+                offsets = offsets[rows]
+            y = np.where(is_bar[:, None], y - offsets, y)
+        value_y = np.where(is_bar[:, None], y - 5, y - 10)
+
+        return {
+            "x": x,
+            "y": y,
+            "heights": heights,
+            "center_x": center_x,
+            "value_x": value_x,
+            "value_y": value_y,
+            "values": values,
+        }
+
+    def _stack_offsets(self, values, heights, is_bar):
+        # Offset each bar by the heights of the bars below it, keeping
+        # positive and negative stacks separate
+        positive = values >= 0
+        stacked_positive = np.where(is_bar[:, None] & positive, heights, 0.0)
+        stacked_negative = np.where(is_bar[:, None] & ~positive, heights, 0.0)
+        positive_bar_heights = np.zeros_like(heights)
+        negative_bar_heights = np.zeros_like(heights)
+        positive_bar_heights[1:] = np.cumsum(stacked_positive, axis=0)[:-1]
+        negative_bar_heights[1:] = np.cumsum(stacked_negative, axis=0)[:-1]
+        return np.where(positive, positive_bar_heights, negative_bar_heights)
+
+    def _cached_series_geometry(self, values, scales, min_values, *bar_layout):
+        """
+        Series geometry for incremental mode, as rows per series. The rows of
+        series whose values, axis and bar slot did not change since the last
+        render are reused and only the others are computed. Returns the
+        geometry and the key of each series.
+        """
+        num_series, num_categories = values.shape
+        offsets = None
+        if self.stacked:
+            # Stacked bars also move with the bars below them
+            is_bar = np.array(
+                [series_type == "bar" for series_type, _ in self.series_types],
+                dtype=bool,
+            )
+            offsets = self._stack_offsets(values, values * scales[:, None], is_bar)
+
+        keys = []
+        bar_count = 0
+        for index, (series_type, _) in enumerate(self.series_types):
+            slot = None
+            if series_type == "bar" and not self.stacked:
+                slot = bar_count
+                bar_count += 1
+            keys.append(
+                (
+                    series_type,
+                    slot,
+                    self.stacked,
+                    self.height,
+                    bar_layout,
+                    float(scales[index]),
+                    float(min_values[index]),
+                    values[index].tobytes(),
+                    (
+                        offsets[index].tobytes()
+                        if offsets is not None and series_type == "bar"
+                        else None
+                    ),
+                )
+            )
 
-        scale_primary = (self.height) / (
-            adjusted_max_value_primary - adjusted_min_value_primary
+        missing = [
+            index for index, key in enumerate(keys) if key not in self._geometry_cache
+        ]
+        computed = self._series_geometry(
+            values, scales, min_values, *bar_layout, rows=missing, offsets=offsets
         )
-        if has_secondary:
-            scale_secondary = (self.height) / (
-                adjusted_max_value_secondary - adjusted_min_value_secondary
+        for position, index in enumerate(missing):
+            self._geometry_cache[keys[index]] = {
+                name: computed[name][position] for name in SERIES_GEOMETRY
+            }
+
+        # Keep only the rows used by the latest render
+        self._geometry_cache = {key: self._geometry_cache[key] for key in keys}
+        geometry = {
+            name: [self._geometry_cache[key][name] for key in keys]
+            for name in SERIES_GEOMETRY
+        }
+        geometry["center_x"] = computed["center_x"]
+        return geometry, keys
+
+    def _draw_cell(
+        self, elements, value_labels, index, sub_index, row, center_x, bar_width
+    ):
+        series_type, print_values = self.series_types[index]
+        x = row["x"][sub_index]
+        y = row["y"][sub_index]
+
+        if series_type == "bar":
+            elements.append(
+                self._draw_bar(
+                    x, y, bar_width, row["heights"][sub_index], self.colors[index]
+                )
             )
-        else:
-            scale_secondary = None
-
-        # Draw series
-        bar_spacing = (self.width) / len(self.data[0])
-        bar_series_across = (
-            1
-            if self.stacked
-            else len(
-                [
-                    series_type
-                    for series_type, _ in self.series_types
-                    if series_type == "bar"
-                ]
+        elif series_type == "dot":
+            elements.append(
+                self._draw_dot(
+                    center_x[sub_index],
+                    y,
+                    radius=5,
+                    fill=self.colors[index],
+                )
             )
-        )
-        total_bars_width = bar_series_across * bar_width
-
-        num_categories = len(self.data[0])
-        num_series = len(self.data)
-        positive_bar_heights = [0] * num_categories
-        negative_bar_heights = [0] * num_categories
-
-        for sub_index in range(num_categories):
-            bar_count = 0
-            for index in range(num_series):
-                value = self.data[index][sub_index]
-                secondary_value = self.secondary[index]
-
-                series_type, print_values = self.series_types[index]
-
-                if series_type == "dot" or series_type == "line" or self.stacked:
-                    x = sub_index * bar_spacing + (bar_spacing - bar_width) / 2
-                else:
-                    # Calculate the starting x-position of the bars in each category
-                    start_x = (
-                        sub_index * bar_spacing + (bar_spacing - total_bars_width) / 2
-                    )
-                    x = (
-                        start_x + bar_count * bar_width - bar_width / 2
-                    )  # Adjusting by half of the bar width
-                    bar_count += 1
-                scale = scale_secondary if secondary_value else scale_primary
-                min_value = (
-                    adjusted_min_value_secondary
-                    if secondary_value
-                    else adjusted_min_value_primary
+        elif series_type == "line" and sub_index > 0:
+            elements.append(
+                self._draw_line(
+                    row["x"][sub_index - 1],
+                    row["y"][sub_index - 1],
+                    x,
+                    y,
+                    stroke=self.colors[index],
                 )
-                y = self.height - (value - min_value) * scale
-
-                if series_type == "bar" and self.stacked:
-                    bar_height = value * scale
-                    x -= bar_width / 2
-                    if value >= 0:
-                        y -= positive_bar_heights[sub_index]
-                        positive_bar_heights[sub_index] += bar_height
-                    else:
-                        y -= negative_bar_heights[sub_index]
-                        negative_bar_heights[sub_index] += bar_height
-                    self.svg_elements.append(
-                        self._draw_bar(x, y, bar_width, bar_height, self.colors[index])
-                    )
-                elif series_type == "bar":
-                    self.svg_elements.append(
-                        self._draw_bar(
-                            x,
-                            y,
-                            bar_width,
-                            value * scale,
-                            self.colors[index],
-                        )
-                    )
-                elif series_type == "dot":
-                    center_x = (
-                        sub_index * bar_spacing
-                        + (bar_spacing - total_bars_width) / 2
-                        + bar_width * (bar_series_across - 1) / 2
-                    )
-                    self.svg_elements.append(
-                        self._draw_dot(
-                            center_x,
-                            y,
-                            radius=5,
-                            fill=self.colors[index],
-                        )
-                    )
-                elif series_type == "line" and sub_index > 0:
-                    prev_y = (
-                        self.height
-                        - (self.data[index][sub_index - 1] - min_value) * scale
-                    )
-                    prev_x = (sub_index - 1) * bar_spacing + (
-                        bar_spacing - bar_width
-                    ) / 2
-                    self.svg_elements.append(
-                        self._draw_line(
-                            prev_x,
-                            prev_y,
-                            x,
-                            y,
-                            stroke=self.colors[index],
-                        )
-                    )
+            )
 
-                if print_values:
-                    if series_type == "dot":
-                        value_x = center_x
-                    elif series_type == "line":
-                        value_x = x
-                    else:
-                        value_x = x + bar_width / 2
+        if print_values:
+            self._add_value_label(
+                elements,
+                value_labels,
+                row["values"][sub_index],
+                row["value_x"][sub_index],
+                row["value_y"][sub_index],
+                self.text_color,
+            )
 
-                    value_y = y - 5 if series_type == "bar" else y - 10
-                    self.svg_elements.append(
-                        self._generate_text(
-                            value, value_x, value_y, fill=self.text_color
-                        )
-                    )
+    def _draw_series(self, index, geometry, bar_width):
+        """
+        Draw all cells of one series. Returns the elements and the value labels
+        that still need to be placed.
+        """
+        row = {name: geometry[name][index].tolist() for name in SERIES_GEOMETRY}
+        center_x = geometry["center_x"].tolist()
+        elements = []
+        value_labels = []
+        for sub_index in range(len(row["x"])):
+            self._draw_cell(
+                elements, value_labels, index, sub_index, row, center_x, bar_width
+            )
+        return elements, value_labels
+
+    def _draw_axes(
+        self,
+        primary_axis,
+        secondary_axis,
+        bar_spacing,
+        bar_width,
+        total_bars_width,
+        bar_series_across,
+    ):
+        """
+        Draw the axis lines, x tick labels and y ticks. Each axis is given as
+        (ticks, tick_labels, adjusted_min_value, scale); secondary_axis is
+        None when no series uses the secondary axis.
+        """
+        has_secondary = secondary_axis is not None
+        (
+            primary_ticks,
+            primary_tick_labels,
+            adjusted_min_value_primary,
+            scale_primary,
+        ) = primary_axis
+        if has_secondary:
+            (
+                secondary_ticks,
+                secondary_tick_labels,
+                adjusted_min_value_secondary,
+                scale_secondary,
+            ) = secondary_axis
+        elements = []
 
         # Draw axis
-        self.svg_elements.append(
-            f'<line x1="0" y1="0" x2="0" y2="{self.height}" stroke="{self.text_color}" stroke-width="1" />'
+        elements.append(
+            Line(0, 0, 0, self.height, stroke=self.text_color, stroke_width=1)
         )
         zero_line_y = self.height + adjusted_min_value_primary * scale_primary
-        self.svg_elements.append(
-            f'<line x1="0" y1="{zero_line_y}" '
-            + f'x2="{self.width}" y2="{zero_line_y}" '
-            + f'stroke="{self.text_color}" stroke-width="1" />'
+        elements.append(
+            Line(
+                0,
+                zero_line_y,
+                self.width,
+                zero_line_y,
+                stroke=self.text_color,
+                stroke_width=1,
+            )
         )
 
         # Draw secondary y-axis if needed
         if has_secondary:
-            self.svg_elements.append(
-                f'<line x1="{self.width}" y1="0" x2="{self.width}" y2="{self.height}" stroke="{self.text_color}" stroke-width="1" />'
+            elements.append(
+                Line(
+                    self.width,
+                    0,
+                    self.width,
+                    self.height,
+                    stroke=self.text_color,
+                    stroke_width=1,
+                )
             )
             secondary_zero_line_y = (
                 self.height + adjusted_min_value_secondary * scale_secondary
@@ -360,7 +595,7 @@ class CategoricalGraph(BaseGraph):
             ), f"Secondary y-axis not aligned with primary y-axis: {secondary_zero_line_y} != {zero_line_y}"
 
         # Draw x tick labels
-        for index, label in enumerate(self.x_labels):
+        for index, label in enumerate(self.drawn_x_labels):
             x = (
                 index * bar_spacing
                 + (bar_spacing - total_bars_width) / 2
@@ -368,24 +603,23 @@ class CategoricalGraph(BaseGraph):
             )
             y = self.height + 5
             if label is not None and self.rotate_x_labels:
-                self.svg_elements.append(
+                elements.append(
                     self._generate_text(
                         label, x, y, anchor="end", fill=self.text_color, rotation=-90
                     )
                 )
             elif label is not None and not self.rotate_x_labels:
-                self.svg_elements.append(
+                elements.append(
                     self._generate_text(label, x, y + 10, fill=self.text_color)
                 )
 
         # Draw primary y-axis ticks and values
-        for tick_value in primary_ticks:
+        for tick_value, tick_label in zip(primary_ticks, primary_tick_labels):
             tick_y = (
                 self.height - (tick_value - adjusted_min_value_primary) * scale_primary
             )
-            tick_label = f"{human_readable_number(tick_value)}"
 
-            self.svg_elements.append(
+            elements.append(
                 self._generate_text(
                     tick_label,
                     -5,
@@ -395,20 +629,19 @@ class CategoricalGraph(BaseGraph):
                     dominant_baseline="text-bottom",
                 )
             )
-            self.svg_elements.append(
-                f'<line x1="0" y1="{tick_y}" x2="-3" y2="{tick_y}" stroke="{self.text_color}" stroke-width="1" />'
+            elements.append(
+                Line(0, tick_y, -3, tick_y, stroke=self.text_color, stroke_width=1)
             )
 
         # Draw secondary y-axis ticks and values if needed
         if has_secondary:
-            for tick_value in secondary_ticks:
+            for tick_value, tick_label in zip(secondary_ticks, secondary_tick_labels):
                 tick_y = (
                     self.height
                     - (tick_value - adjusted_min_value_secondary) * scale_secondary
                 )
-                tick_label = f"{human_readable_number(tick_value)}"
 
-                self.svg_elements.append(
+                elements.append(
                     self._generate_text(
                         tick_label,
                         self.width + 5,
@@ -418,10 +651,260 @@ class CategoricalGraph(BaseGraph):
                         dominant_baseline="text-bottom",
                     )
                 )
-                self.svg_elements.append(
-                    f'<line x1="{self.width}" y1="{tick_y}" x2="{self.width + 3}" y2="{tick_y}" stroke="{self.text_color}" stroke-width="1" />'
+                elements.append(
+                    Line(
+                        self.width,
+                        tick_y,
+                        self.width + 3,
+                        tick_y,
+                        stroke=self.text_color,
+                        stroke_width=1,
+                    )
                 )
 
+        return elements
+
+    def _compute_layout(self):
+        """
+        Compute everything the drawing needs that does not depend on colors:
+        the downsampled data, ranges, ticks, bar sizes and series geometry.
+        """
+        self.drawn_data, self.drawn_x_labels = self._downsample()
+        values = series_matrix(self.drawn_data)
+        num_series, num_categories = values.shape
+        graph_width = self.width
+        has_secondary = any(self.secondary)
+        if self.stacked:
+            bar_series_indices = [
+                i for i, series in enumerate(self.series_types) if series[0] == "bar"
+            ]
+
+            assert all(self.secondary[i] for i in bar_series_indices) or not any(
+                self.secondary[i] for i in bar_series_indices
+            ), "All stacked bar series must be either primary or secondary."
+
+        primary_range, secondary_range = categorical_ranges(
+            values, self.series_types, self.secondary, self.stacked
+        )
+        min_value_primary, max_value_primary = primary_range
+        min_value_secondary, max_value_secondary = secondary_range
+
+        primary_ticks = calculate_ticks(
+            min_value_primary,
+            max_value_primary,
+            include_zero=True,
+            target_tick_count=self.num_y_ticks,
+        )
+
+        if has_secondary:
+            secondary_ticks = calculate_ticks(
+                min_value_secondary,
+                max_value_secondary,
+                include_zero=True,
+                target_tick_count=self.num_y_ticks,
+            )
+
+            primary_ticks, secondary_ticks = match_ticks(primary_ticks, secondary_ticks)
+
+            adjusted_max_value_secondary = secondary_ticks[-1]
+            adjusted_min_value_secondary = secondary_ticks[0]
+
+        adjusted_max_value_primary = primary_ticks[-1]
+        adjusted_min_value_primary = primary_ticks[0]
+
+        num_bars = 0
+        if not self.stacked:
+            for type, _ in self.series_types:
+                if type == "bar":
+                    num_bars += 1
+        num_bars = max(num_bars, 1)
+        max_bar_width = graph_width / (num_bars * num_categories)
+
+        bar_width = min(max_bar_width, self.bar_width)
+
+        scale_primary = (self.height) / (
+            adjusted_max_value_primary - adjusted_min_value_primary
+        )
+        if has_secondary:
+            scale_secondary = (self.height) / (
+                adjusted_max_value_secondary - adjusted_min_value_secondary
+            )
+        else:
+            scale_secondary = None
+
+        bar_spacing = (self.width) / num_categories
+        bar_series_across = (
+            1
+            if self.stacked
+            else len(
+                [
+                    series_type
+                    for series_type, _ in self.series_types
+                    if series_type == "bar"
+                ]
+            )
+        )
+        total_bars_width = bar_series_across * bar_width
+
+        scales = np.array(
+            [scale_secondary if sec else scale_primary for sec in self.secondary],
+            dtype=float,
+        )
+        min_values = np.array(
+            [
+                adjusted_min_value_secondary if sec else adjusted_min_value_primary
+                for sec in self.secondary
+            ],
+            dtype=float,
+        )
+        bar_layout = (bar_width, bar_spacing, total_bars_width, bar_series_across)
+        geometry_keys = None
+        if self.incremental:
+            geometry, geometry_keys = self._cached_series_geometry(
+                values, scales, min_values, *bar_layout
+            )
+        else:
+            geometry = self._series_geometry(values, scales, min_values, *bar_layout)
+
+        primary_tick_labels = [
+            f"{human_readable_number(tick_value)}" for tick_value in primary_ticks
+        ]
+        secondary_tick_labels = (
+            [f"{human_readable_number(tick_value)}" for tick_value in secondary_ticks]
+            if has_secondary
+            else []
+        )
+
+        return {
+            "values": values,
+            "geometry": geometry,
+            "geometry_keys": geometry_keys,
+            "has_secondary": has_secondary,
+            "bar_width": bar_width,
+            "bar_spacing": bar_spacing,
+            "total_bars_width": total_bars_width,
+            "bar_series_across": bar_series_across,
+            "primary_axis": (
+                primary_ticks,
+                primary_tick_labels,
+                adjusted_min_value_primary,
+                scale_primary,
+            ),
+            "secondary_axis": (
+                (
+                    secondary_ticks,
+                    secondary_tick_labels,
+                    adjusted_min_value_secondary,
+                    scale_secondary,
+                )
+                if has_secondary
+                else None
+            ),
+            "drawn_data": self.drawn_data,
+            "drawn_x_labels": self.drawn_x_labels,
+        }
+
+    def _build_elements(self):
+        self._reset_graph()
+        layout = self._shared_layout("categorical", self._compute_layout)
+        self.drawn_data = layout["drawn_data"]
+        self.drawn_x_labels = layout["drawn_x_labels"]
+        values = layout["values"]
+        geometry = layout["geometry"]
+        num_series, num_categories = values.shape
+        has_secondary = layout["has_secondary"]
+        bar_width = layout["bar_width"]
+        bar_spacing = layout["bar_spacing"]
+        total_bars_width = layout["total_bars_width"]
+        bar_series_across = layout["bar_series_across"]
+        primary_axis = layout["primary_axis"]
+        secondary_axis = layout["secondary_axis"]
+        primary_ticks = primary_axis[0]
+        secondary_ticks = secondary_axis[0] if has_secondary else None
+
+        # Draw series
+        if self.incremental or self.compact or self.merge_paths:
+            # Draw series by series, as merged paths need all cells of a
+            # series at once. Compact output can then group the elements of
+            # a series, and in incremental mode series whose geometry did
+            # not change since the last render reuse their elements. Changed
+            # ticks move every series, so nothing is reused then.
+            draw_series = (
+                self._draw_merged_series if self.merge_paths else self._draw_series
+            )
+            value_labels = []
+            for index in range(num_series):
+                if not self.incremental:
+                    elements, labels = draw_series(index, geometry, bar_width)
+                else:
+                    key = (
+                        "series",
+                        self.merge_paths,
+                        self.series_types[index],
+                        self.colors[index],
+                        self.text_color,
+                        bar_width,
+                        self.value_label_strategy,
+                        layout["geometry_keys"][index],
+                    )
+                    elements, labels = self._cached_fragment(
+                        key,
+                        lambda index=index: draw_series(index, geometry, bar_width),
+                    )
+                self.svg_elements.extend(elements)
+                value_labels.extend(labels)
+        else:
+            # Serialize series, category by category
+            rows = [
+                {name: geometry[name][index].tolist() for name in SERIES_GEOMETRY}
+                for index in range(num_series)
+            ]
+            center_x = geometry["center_x"].tolist()
+
+            value_labels = []
+            for sub_index in range(num_categories):
+                for index in range(num_series):
+                    self._draw_cell(
+                        self.svg_elements,
+                        value_labels,
+                        index,
+                        sub_index,
+                        rows[index],
+                        center_x,
+                        bar_width,
+                    )
+
+        if value_labels:
+            self.svg_elements.extend(
+                self._draw_labels(value_labels, self.value_label_strategy)
+            )
+
+        axis_arguments = (
+            primary_axis,
+            secondary_axis,
+            bar_spacing,
+            bar_width,
+            total_bars_width,
+            bar_series_across,
+        )
+        if self.incremental:
+            key = (
+                "axes",
+                self.width,
+                self.height,
+                self.text_color,
+                self.rotate_x_labels,
+                tuple(self.drawn_x_labels),
+                tuple(primary_ticks),
+                tuple(secondary_ticks) if has_secondary else None,
+                axis_arguments[2:],
+            )
+            self.svg_elements.extend(
+                self._cached_fragment(key, lambda: self._draw_axes(*axis_arguments))
+            )
+        else:
+            self.svg_elements.extend(self._draw_axes(*axis_arguments))
+
         # Draw axis labels
         if self.x_axis_label:
             x_label_x = (self.width) / 2
@@ -504,8 +987,13 @@ class CategoricalGraph(BaseGraph):
                     )
                 else:  # series_type == "bar"
                     self.svg_elements.append(
-                        f'<rect x="{legend_x}" y="{legend_y}" width="{legend_rect_size}" '
-                        + f'height="{legend_rect_size}" fill="{self.colors[index]}" />'
+                        Rect(
+                            legend_x,
+                            legend_y,
+                            legend_rect_size,
+                            legend_rect_size,
+                            fill=self.colors[index],
+                        )
                     )
                 self.svg_elements.append(
                     self._generate_text(
@@ -524,4 +1012,5 @@ class CategoricalGraph(BaseGraph):
                         + (2 * self.element_spacing) / 3
                     )
 
-        return self._generate_svg()
+        if self.incremental:
+            self._discard_unused_fragments()
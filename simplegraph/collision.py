@@ -0,0 +1,191 @@
+import bisect
+import math
+
+LABEL_STRATEGIES = ("shift", "hide", "leader")
+
+# How many times a label is moved below the labels in its way before it is
+# moved below every label across its width
+MAX_SHIFTS = 8
+
+
+class LabelGrid:
+    """
+    A uniform grid over label bounding boxes. Each box is registered in every
+    cell it covers, so looking up the boxes that overlap a query box only
+    touches the cells around it instead of every label.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.boxes = {}
+
+    def _cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        for column in range(math.floor(left / size), math.floor(right / size) + 1):
+            for row in range(math.floor(top / size), math.floor(bottom / size) + 1):
+                yield column, row
+
+    def insert(self, key, left, top, right, bottom):
+        self.boxes[key] = (left, top, right, bottom)
+        for cell in self._cell_range(left, top, right, bottom):
+            self.cells.setdefault(cell, []).append(key)
+
+    def query(self, left, top, right, bottom):
+        """
+        Return the keys of all boxes that overlap the given box. Boxes that
+        only touch along an edge do not overlap.
+        """
+        found = set()
+        for cell in self._cell_range(left, top, right, bottom):
+            for key in self.cells.get(cell, ()):
+                if key in found:
+                    continue
+                other_left, other_top, other_right, other_bottom = self.boxes[key]
+                if (
+                    left < other_right
+                    and other_left < right
+                    and top < other_bottom
+                    and other_top < bottom
+                ):
+                    found.add(key)
+        return found
+
+
+class Skyline:
+    """
+    The lowest bottom edge of the labels placed over each span of x, kept in
+    a segment tree over the x edges of all labels. Finding the lowest label
+    under a span and adding a label both take O(log n). Labels that only
+    touch along an edge do not share any span.
+    """
+
+    def __init__(self, edges):
+        self.edges = sorted(set(edges))
+        self.size = max(len(self.edges) - 1, 1)
+        self.bottoms = [-math.inf] * (4 * self.size)
+        # Bottoms that still have to be passed on to the children of a node
+        self.pending = [-math.inf] * (4 * self.size)
+
+    def _span(self, left, right):
+        return bisect.bisect_left(self.edges, left), bisect.bisect_left(
+            self.edges, right
+        )
+
+    def _push(self, node):
+        bottom = self.pending[node]
+        if bottom > -math.inf:
+            for child in (2 * node, 2 * node + 1):
+                self.bottoms[child] = max(self.bottoms[child], bottom)
+                self.pending[child] = max(self.pending[child], bottom)
+            self.pending[node] = -math.inf
+
+    def _lowest(self, node, start, end, low, high):
+        if high <= start or end <= low:
+            return -math.inf
+        if low <= start and end <= high:
+            return self.bottoms[node]
+        self._push(node)
+        middle = (start + end) // 2
+        return max(
+            self._lowest(2 * node, start, middle, low, high),
+            self._lowest(2 * node + 1, middle, end, low, high),
+        )
+
+    def _insert(self, node, start, end, low, high, bottom):
+        if high <= start or end <= low:
+            return
+        if low <= start and end <= high:
+            self.bottoms[node] = max(self.bottoms[node], bottom)
+            self.pending[node] = max(self.pending[node], bottom)
+            return
+        self._push(node)
+        middle = (start + end) // 2
+        self._insert(2 * node, start, middle, low, high, bottom)
+        self._insert(2 * node + 1, middle, end, low, high, bottom)
+        self.bottoms[node] = max(self.bottoms[2 * node], self.bottoms[2 * node + 1])
+
+    def lowest(self, left, right):
+        """
+        Return the lowest bottom edge of the labels placed over left to
+        right, or -inf if there are none.
+        """
+        low, high = self._span(left, right)
+        return self._lowest(1, 0, self.size, low, high)
+
+    def insert(self, left, right, bottom):
+        low, high = self._span(left, right)
+        self._insert(1, 0, self.size, low, high, bottom)
+
+
+def resolve_label_collisions(labels, strategy="shift", padding=0):
+    """
+    Place labels so that no two bounding boxes overlap. labels is a list of
+    (x, y, width, height) boxes centred on (x, y).
+
+    "shift" and "leader" visit the labels from top to bottom and push each
+    label down until it clears the labels already placed ("leader" lets the
+    caller connect moved labels to their anchor). A label that is still in
+    the way after MAX_SHIFTS moves goes below every label across its width,
+    so that each label is placed in O(log n). "hide" keeps labels in the
+    order given and drops any label that would overlap an earlier one.
+
+    Returns a list with the (x, y) centre of each label, or None for labels
+    that are hidden.
+    """
+    if strategy not in LABEL_STRATEGIES:
+        raise ValueError(
+            f"Unknown label strategy {strategy!r}, expected one of {LABEL_STRATEGIES}."
+        )
+    if not labels:
+        return []
+
+    average_size = sum(width + height for _, _, width, height in labels) / (
+        2 * len(labels)
+    )
+    grid = LabelGrid(max(average_size + padding, 1))
+    placements = [None] * len(labels)
+
+    if strategy == "hide":
+        for index, (x, y, width, height) in enumerate(labels):
+            half_width = width / 2 + padding / 2
+            half_height = height / 2 + padding / 2
+            box = (x - half_width, y - half_height, x + half_width, y + half_height)
+            if grid.query(*box):
+                continue
+            grid.insert(index, *box)
+            placements[index] = (x, y)
+        return placements
+
+    skyline = Skyline(
+        edge
+        for x, _, width, _ in labels
+        for edge in (x - width / 2 - padding / 2, x + width / 2 + padding / 2)
+    )
+    order = sorted(range(len(labels)), key=lambda i: (labels[i][1], labels[i][0]))
+    for index in order:
+        x, y, width, height = labels[index]
+        half_width = width / 2 + padding / 2
+        half_height = height / 2 + padding / 2
+        left = x - half_width
+        right = x + half_width
+        for _ in range(MAX_SHIFTS):
+            overlapping = grid.query(left, y - half_height, right, y + half_height)
+            if not overlapping:
+                break
+            # Move just below the lowest label in the way
+            new_y = max(grid.boxes[key][3] for key in overlapping) + half_height
+            y = new_y if new_y > y else math.nextafter(y, math.inf)
+        else:
+            # Still in the way of a tall stack of labels: move below all of
+            # them at once
+            lowest = skyline.lowest(left, right)
+            if y - half_height < lowest:
+                y = lowest + half_height
+                while y - half_height < lowest:
+                    y = math.nextafter(y, math.inf)
+        grid.insert(index, left, y - half_height, right, y + half_height)
+        skyline.insert(left, right, y + half_height)
+        placements[index] = (x, y)
+
+    return placements
@@ -0,0 +1,87 @@
+import numpy as np
+
+from .utils import hex2color
+
+_HEX_DIGITS = [format(value, "02x") for value in range(256)]
+
+
+class ColorScale:
+    """
+    Maps values to colors interpolated between a list of colors, the same
+    way as utils.get_color but for a whole array of values in one call.
+    Values are first scaled from domain to the range 0 to 1.
+
+    The palette is converted once, so one scale can be shared by all the
+    elements of a graph. With lut_size, colors are looked up in a table of
+    that many precomputed colors instead, which is faster for large arrays
+    but rounds every value to the nearest entry of the table.
+    """
+
+    def __init__(self, colors, domain=(0, 1), lut_size=None):
+        self.colors = list(colors)
+        self.domain = domain
+        self.rgbs = np.array([hex2color(color) for color in self.colors])
+        self.ranges = np.linspace(0, 1, len(self.colors))
+        self.lut = None
+        if lut_size:
+            self.lut = np.array(
+                self._interpolate(np.linspace(0, 1, lut_size)), dtype=object
+            )
+
+    def normalize(self, values):
+        low, high = self.domain
+        values = np.asarray(values, dtype=float)
+        # A domain of zero width maps values to nan or infinity, which get
+        # the first or an edge color
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (values - low) / (high - low)
+
+    def _interpolate(self, values):
+        colors = np.empty(len(values), dtype=object)
+        below = values <= 0
+        above = values >= 1
+        colors[below] = self.colors[0]
+        colors[above] = self.colors[-1]
+
+        inside = ~(below | above)
+        values = values[inside]
+        # Index of the range each value falls in. Values outside all ranges
+        # (nan, or any value with a single color) get the first color.
+        index = np.searchsorted(self.ranges, values, side="right") - 1
+        found = (index >= 0) & (index < len(self.colors) - 1)
+        index = np.where(found, index, 0)
+        next_index = np.minimum(index + 1, len(self.colors) - 1)
+
+        low_range = self.ranges[index]
+        high_range = self.ranges[next_index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = ((values - low_range) / (high_range - low_range))[:, np.newaxis]
+            rgbs = self.rgbs[index] * (1 - t) + self.rgbs[next_index] * t
+        rgbs[~found] = self.rgbs[0]
+
+        channels = np.rint(rgbs * 255).astype(int).tolist()
+        colors[inside] = [
+            "#" + _HEX_DIGITS[r] + _HEX_DIGITS[g] + _HEX_DIGITS[b]
+            for r, g, b in channels
+        ]
+        return colors.tolist()
+
+    def map(self, values):
+        """
+        Return the hex color of each value, as a list.
+        """
+        values = self.normalize(values).ravel()
+        if self.lut is None:
+            return self._interpolate(values)
+
+        colors = np.empty(len(values), dtype=object)
+        below = values <= 0
+        above = values >= 1
+        colors[below] = self.colors[0]
+        colors[above] = self.colors[-1]
+        inside = ~(below | above | np.isnan(values))
+        colors[inside] = self.lut[
+            np.rint(values[inside] * (len(self.lut) - 1)).astype(int)
+        ]
+        colors[np.isnan(values)] = self._interpolate(np.array([np.nan]))[0]
+        return colors.tolist()
@@ -0,0 +1,467 @@
+import re
+from collections import Counter
+
+_TOKEN = re.compile(
+    r"<!--.*?-->"
+    + r"|<(/?)([A-Za-z][\w:.-]*)((?:\s+[\w:.-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>",
+    re.S,
+)
+_ATTRIBUTE = re.compile(r"([\w:.-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_HEX_COLOR = re.compile(r"#([0-9a-fA-F])\1([0-9a-fA-F])\2([0-9a-fA-F])\3$")
+
+# Attributes that hold numbers only, which get rounded
+NUMERIC_ATTRIBUTES = {
+    "x",
+    "y",
+    "x1",
+    "y1",
+    "x2",
+    "y2",
+    "cx",
+    "cy",
+    "r",
+    "rx",
+    "ry",
+    "width",
+    "height",
+    "points",
+    "transform",
+    "viewBox",
+    "stroke-width",
+    "font-size",
+}
+
+# Presentation attributes that children inherit from a <g>
+INHERITED_ATTRIBUTES = (
+    "fill",
+    "stroke",
+    "stroke-width",
+    "font-size",
+    "font-family",
+    "text-anchor",
+)
+
+# Presentation attributes that can move into a CSS rule
+STYLE_ATTRIBUTES = INHERITED_ATTRIBUTES + (
+    "dominant-baseline",
+    "opacity",
+    "fill-opacity",
+    "stroke-opacity",
+    "stroke-dasharray",
+    "stroke-linecap",
+)
+
+# Elements whose children are drawn as a group, so hoisting applies
+_CONTAINERS = ("svg", "g")
+
+# Number of arguments of each path command
+_PATH_ARGUMENTS = {"m": 2, "l": 2, "h": 1, "v": 1, "c": 6, "s": 4, "q": 4, "t": 2}
+_PATH_ARGUMENTS["a"] = 7
+_PATH_ARGUMENTS["z"] = 0
+
+
+class _Element:
+    __slots__ = ("tag", "attributes", "children")
+
+    def __init__(self, tag, attributes):
+        self.tag = tag
+        self.attributes = attributes
+        self.children = []
+
+
+def _parse(svg):
+    root = _Element(None, {})
+    stack = [root]
+    position = 0
+    for match in _TOKEN.finditer(svg):
+        text = svg[position : match.start()]
+        position = match.end()
+        if text and (text.strip() or stack[-1].tag in ("text", "tspan")):
+            stack[-1].children.append(text)
+
+        closing, tag, attributes, self_closing = match.groups()
+        if tag is None:
+            # A comment
+            continue
+        if closing:
+            if stack[-1].tag != tag:
+                raise ValueError(f"Unexpected </{tag}>.")
+            stack.pop()
+            continue
+        element = _Element(
+            tag,
+            {
+                match[1]: match[2] if match[2] is not None else match[3]
+                for match in _ATTRIBUTE.finditer(attributes)
+            },
+        )
+        stack[-1].children.append(element)
+        if not self_closing:
+            stack.append(element)
+
+    if len(stack) > 1 or svg[position:].strip():
+        raise ValueError("Unbalanced SVG.")
+    return root
+
+
+def _serialize(element, out):
+    for child in element.children:
+        if isinstance(child, str):
+            out.append(child)
+            continue
+        out.append("<" + child.tag)
+        for name, value in child.attributes.items():
+            quote = "'" if '"' in value else '"'
+            out.append(f" {name}={quote}{value}{quote}")
+        if child.children:
+            out.append(">")
+            _serialize(child, out)
+            out.append(f"</{child.tag}>")
+        else:
+            out.append("/>")
+
+
+def format_number(value, precision):
+    """
+    Format a number with at most precision decimals and no redundant
+    characters, e.g. 0.50 as ".5" and -0.001 as "0".
+    """
+    text = f"{value:.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    if text in ("-0", ""):
+        text = "0"
+    return text
+
+
+def _round_numbers(value, precision):
+    return _NUMBER.sub(lambda match: format_number(float(match[0]), precision), value)
+
+
+def _join_numbers(numbers):
+    # Numbers need a separator unless the next one starts with a sign, or
+    # with a decimal point while the previous one already has one
+    out = []
+    previous = None
+    for number in numbers:
+        if previous is not None and not (
+            number[0] == "-" or (number[0] == "." and "." in previous)
+        ):
+            out.append(" ")
+        out.append(number)
+        previous = number
+    return "".join(out)
+
+
+def compact_path(d, precision):
+    """
+    Rewrite path data with rounded numbers, choosing the shorter of the
+    absolute and the relative form of each command and leaving out repeated
+    command letters and separators that are not needed.
+    """
+    tokens = _PATH_TOKEN.findall(d)
+    segments = []
+    index = 0
+    while index < len(tokens):
+        command = tokens[index]
+        if not command.isalpha() or command.lower() not in _PATH_ARGUMENTS:
+            return d
+        index += 1
+        count = _PATH_ARGUMENTS[command.lower()]
+        while True:
+            arguments = tokens[index : index + count]
+            if len(arguments) < count or any(token.isalpha() for token in arguments):
+                return d
+            segments.append((command, [float(token) for token in arguments]))
+            index += count
+            # Further arguments repeat the command, as lines after a move
+            if count == 0 or index >= len(tokens) or tokens[index].isalpha():
+                break
+            if command in "Mm":
+                command = "L" if command == "M" else "l"
+
+    def rounded(value):
+        return float(format_number(value, precision))
+
+    out = []
+    previous_command = None
+    # The current point, exact and as written out
+    exact_x = exact_y = exact_start_x = exact_start_y = 0.0
+    x = y = start_x = start_y = 0.0
+    for command, arguments in segments:
+        lower = command.lower()
+        if lower == "z":
+            out.append("z")
+            previous_command = "z"
+            exact_x, exact_y = exact_start_x, exact_start_y
+            x, y = start_x, start_y
+            continue
+
+        # Exact absolute coordinates of every argument
+        exact = list(arguments)
+        if command.islower():
+            if lower == "h":
+                exact[0] += exact_x
+            elif lower == "v":
+                exact[0] += exact_y
+            elif lower == "a":
+                exact[5] += exact_x
+                exact[6] += exact_y
+            else:
+                for i in range(0, len(exact), 2):
+                    exact[i] += exact_x
+                    exact[i + 1] += exact_y
+        absolute = [rounded(value) for value in exact]
+
+        # The same coordinates relative to the current point, which is itself
+        # rounded, so that rounding errors do not add up along the path
+        offsets = list(absolute)
+        if lower == "h":
+            offsets[0] = absolute[0] - x
+        elif lower == "v":
+            offsets[0] = absolute[0] - y
+        elif lower == "a":
+            offsets[5] = absolute[5] - x
+            offsets[6] = absolute[6] - y
+        else:
+            for i in range(0, len(absolute), 2):
+                offsets[i] = absolute[i] - x
+                offsets[i + 1] = absolute[i + 1] - y
+
+        # Lines along an axis only need one coordinate
+        if lower == "l" and absolute[0] == x:
+            lower, absolute, offsets = "v", absolute[1:], offsets[1:]
+        elif lower == "l" and absolute[1] == y:
+            lower, absolute, offsets = "h", absolute[:1], offsets[:1]
+
+        candidates = []
+        for letter, values in ((lower.upper(), absolute), (lower, offsets)):
+            text = _join_numbers([format_number(value, precision) for value in values])
+            # A repeated command can leave out its letter, except for moves,
+            # whose repeats are lines
+            if letter != previous_command or lower == "m":
+                text = letter + text
+            elif not text.startswith("-"):
+                text = " " + text
+            # On a tie, stay absolute or relative like the previous command,
+            # which lets the next command leave out its letter more often
+            candidates.append(
+                (
+                    len(text),
+                    letter.isupper() != (previous_command or "M").isupper(),
+                    text,
+                    letter,
+                )
+            )
+        _, _, text, letter = min(candidates)
+        out.append(text)
+        previous_command = letter
+
+        if command in "Hh":
+            exact_x = exact[0]
+        elif command in "Vv":
+            exact_y = exact[0]
+        else:
+            exact_x, exact_y = exact[-2], exact[-1]
+        if lower == "h":
+            x = absolute[0]
+        elif lower == "v":
+            y = absolute[0]
+        else:
+            x, y = absolute[-2], absolute[-1]
+        if lower == "m":
+            exact_start_x, exact_start_y = exact_x, exact_y
+            start_x, start_y = x, y
+
+    return "".join(out).lstrip()
+
+
+def _short_color(value):
+    match = _HEX_COLOR.match(value)
+    if match:
+        return "#" + "".join(match.groups()).lower()
+    return value
+
+
+def _compact_attributes(element, precision):
+    attributes = element.attributes
+    for name, value in attributes.items():
+        if name in NUMERIC_ATTRIBUTES:
+            attributes[name] = _round_numbers(value, precision)
+        elif name == "d" and element.tag == "path":
+            attributes[name] = compact_path(value, precision)
+        elif name in ("fill", "stroke"):
+            attributes[name] = _short_color(value)
+    for child in element.children:
+        if not isinstance(child, str):
+            _compact_attributes(child, precision)
+
+
+def _hoisted_length(attributes):
+    return sum(len(name) + len(value) + 4 for name, value in attributes.items())
+
+
+def _hoist(element):
+    """
+    Move inherited attributes that consecutive children share onto a <g>
+    around them.
+    """
+    for child in element.children:
+        if not isinstance(child, str) and child.tag in _CONTAINERS:
+            _hoist(child)
+    if element.tag is not None and element.tag not in _CONTAINERS:
+        return
+
+    children = []
+    run = []
+    shared = {}
+
+    def flush():
+        # Wrapping costs <g></g> plus the shared attributes once
+        saving = (len(run) - 1) * _hoisted_length(shared) - 7
+        if len(run) > 1 and shared and saving > 0:
+            group = _Element("g", dict(shared))
+            for member in run:
+                for name in shared:
+                    del member.attributes[name]
+            group.children = list(run)
+            children.append(group)
+        else:
+            children.extend(run)
+
+    for child in element.children:
+        if isinstance(child, str) or "class" in child.attributes:
+            flush()
+            run, shared = [], {}
+            children.append(child)
+            continue
+        attributes = {
+            name: child.attributes[name]
+            for name in INHERITED_ATTRIBUTES
+            if name in child.attributes
+        }
+        common = {
+            name: value
+            for name, value in shared.items()
+            if attributes.get(name) == value
+        }
+        # Once a run has formed, it only grows while all shared attributes
+        # still match
+        if run and common and (len(run) == 1 or common == shared):
+            run.append(child)
+            shared = common
+        else:
+            flush()
+            run, shared = [child], attributes
+    flush()
+    element.children = children
+
+
+def _class_names(taken):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    length = 1
+    while True:
+        for index in range(len(letters) ** length):
+            name = ""
+            for _ in range(length):
+                index, digit = divmod(index, len(letters))
+                name += letters[digit]
+            if name not in taken:
+                yield name
+        length += 1
+
+
+def _style_declaration(name, value):
+    if name in ("font-size", "stroke-width") and _NUMBER.fullmatch(value):
+        value += "px"
+    return f"{name}:{value}"
+
+
+def _elements(element, skip=("defs",)):
+    for child in element.children:
+        if not isinstance(child, str):
+            yield child
+            if child.tag not in skip:
+                yield from _elements(child, skip)
+
+
+def _add_style(root):
+    """
+    Replace combinations of presentation attributes that repeat across
+    elements with CSS classes in a <style> block.
+    """
+    svg = next((child for child in _elements(root) if child.tag == "svg"), None)
+    if svg is None:
+        return
+
+    def signature(element):
+        return tuple(
+            (name, element.attributes[name])
+            for name in STYLE_ATTRIBUTES
+            if name in element.attributes
+        )
+
+    elements = [
+        element
+        for element in _elements(svg)
+        if "class" not in element.attributes and element.tag != "style"
+    ]
+    counts = Counter(signature(element) for element in elements)
+    taken = {
+        name
+        for element in _elements(root, skip=())
+        for name in element.attributes.get("class", "").split()
+    }
+    names = _class_names(taken)
+    name = next(names)
+    classes = {}
+    rules = []
+    for attributes, count in counts.most_common():
+        if not attributes or count < 2:
+            continue
+        inline = _hoisted_length(dict(attributes))
+        rule = ";".join(_style_declaration(*attribute) for attribute in attributes)
+        # Each element trades its attributes for class="name"
+        if count * (inline - len(name) - 9) - (len(rule) + len(name) + 3) <= 0:
+            continue
+        classes[attributes] = name
+        rules.append(f".{name}{{{rule}}}")
+        name = next(names)
+
+    if not rules:
+        return
+    for element in elements:
+        name = classes.get(signature(element))
+        if name:
+            for attribute, _ in signature(element):
+                del element.attributes[attribute]
+            element.attributes["class"] = name
+
+    style = _Element("style", {})
+    style.children = ["".join(rules)]
+    svg.children.insert(0, style)
+
+
+def compact_svg(svg, precision=2):
+    """
+    Shrink an SVG document: round numbers to precision decimals, shorten path
+    data and colors, group consecutive elements that share a fill, stroke or
+    font into <g> elements and move repeated attributes into CSS classes.
+    Documents this module cannot parse are returned unchanged.
+    """
+    try:
+        root = _parse(svg)
+    except ValueError:
+        return svg
+    _compact_attributes(root, precision)
+    _hoist(root)
+    _add_style(root)
+    out = []
+    _serialize(root, out)
+    return "".join(out)
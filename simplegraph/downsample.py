@@ -0,0 +1,100 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax", "sum", "mean", "max")
+
+# Method used for a series that asks for downsampling without naming one, or
+# that has to follow the others onto a downsampled graph
+DEFAULT_METHODS = {"bar": "mean", "line": "lttb", "dot": "minmax"}
+
+
+def bucket_edges(length, buckets):
+    """
+    Split range(length) into buckets runs of nearly equal size. Returns the
+    buckets + 1 boundaries; bucket i covers edges[i] up to edges[i + 1].
+    """
+    return np.linspace(0, length, buckets + 1).astype(int)
+
+
+def lttb(values, edges):
+    """
+    Largest-Triangle-Three-Buckets: return the index of one point per bucket,
+    picking in each bucket the point that forms the largest triangle with
+    the point picked before it and the average of the next bucket. The
+    first and last points are always kept.
+    """
+    values = np.asarray(values, dtype=float)
+    buckets = len(edges) - 1
+    x = np.arange(len(values), dtype=float)
+    sizes = np.diff(edges)
+    average_x = (edges[:-1] + edges[1:] - 1) / 2
+    average_y = np.add.reduceat(values, edges[:-1]) / sizes
+    average_x[-1] = x[-1]
+    average_y[-1] = values[-1]
+
+    selected = np.empty(buckets, dtype=int)
+    selected[0] = 0
+    selected[-1] = len(values) - 1
+    previous = 0
+    for bucket in range(1, buckets - 1):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x = average_x[bucket + 1]
+        next_y = average_y[bucket + 1]
+        areas = np.abs(
+            (x[previous] - next_x) * (values[start:end] - values[previous])
+            - (x[previous] - x[start:end]) * (next_y - values[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket] = previous
+    return selected
+
+
+def min_max(values, edges):
+    """
+    Return the indices of the smallest and largest value of each pair of
+    buckets, in the order they occur, so that two buckets together keep the
+    envelope of the points they cover. With an odd number of buckets, the
+    last one keeps the last point.
+    """
+    values = np.asarray(values, dtype=float)
+    buckets = len(edges) - 1
+    columns = buckets // 2
+    column_edges = edges[: 2 * columns + 1 : 2]
+    column_sizes = np.diff(column_edges)
+
+    # Sort by column, then by value: the first entry of each column is its
+    # minimum and the last its maximum
+    column = np.repeat(np.arange(columns), column_sizes)
+    order = np.lexsort((values[: column_edges[-1]], column))
+    low = order[column_edges[:-1]]
+    high = order[column_edges[1:] - 1]
+
+    selected = np.empty(buckets, dtype=int)
+    selected[: 2 * columns : 2] = np.minimum(low, high)
+    selected[1 : 2 * columns : 2] = np.maximum(low, high)
+    if buckets % 2:
+        selected[-1] = len(values) - 1
+    return selected
+
+
+def aggregate(values, edges, how):
+    """
+    Reduce each bucket to the sum, mean or maximum of its values.
+    """
+    values = np.asarray(values)
+    if how == "sum":
+        return np.add.reduceat(values, edges[:-1])
+    if how == "max":
+        return np.maximum.reduceat(values, edges[:-1])
+    return np.add.reduceat(values.astype(float), edges[:-1]) / np.diff(edges)
+
+
+def downsample(values, edges, method):
+    """
+    Reduce values to one value per bucket with the given method. Returns a
+    list; values that are picked rather than aggregated keep their type.
+    """
+    if method == "lttb":
+        return np.asarray(values)[lttb(values, edges)].tolist()
+    if method == "minmax":
+        return np.asarray(values)[min_max(values, edges)].tolist()
+    return aggregate(values, edges, method).tolist()
@@ -0,0 +1,111 @@
+import gzip
+import json
+import time
+
+from .publish import HTTPPublisher
+from .publish import PublishError
+from .publish import publish_many
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+class GistUploadError(PublishError):
+    pass
+
+
+def gist_filename(filename=None):
+    return f"{filename or 'simplegraph'}_{int(time.time())}.svg"
+
+
+def gist_body(content, filename, description=None, public=True):
+    """
+    The JSON body that creates a gist holding one file.
+    """
+    body = {
+        "description": description or filename,
+        "public": public,
+        "files": {filename: {"content": content}},
+    }
+    return json.dumps(body).encode("utf-8")
+
+
+def gist_payload(graph, filename=None, public=True):
+    """
+    Render a graph and return the name of its file in the gist along with
+    the JSON body that creates the gist.
+    """
+    filename = gist_filename(filename)
+    return filename, gist_body(graph.render(), filename, graph.title, public)
+
+
+class GistUploader(HTTPPublisher):
+    """
+    A publishing backend that uploads each file as a new GitHub Gist and
+    returns its raw URL. Gists hold text, so compressed files are
+    decompressed before they are uploaded. File names get the upload
+    time appended, as with BaseGraph.upload_to_github_gist. Creating a gist
+    is not idempotent, so only uploads that were not sent or were rate
+    limited are retried.
+    """
+
+    error_class = GistUploadError
+
+    def __init__(self, access_token, api_url=GITHUB_API_URL, public=True, **options):
+        super().__init__(
+            api_url,
+            headers={
+                "Authorization": f"token {access_token}",
+                "Accept": "application/vnd.github+json",
+                "User-Agent": "simplegraph",
+            },
+            **options,
+        )
+        self.public = public
+
+    async def _publish(self, data, name, compressed, description):
+        if compressed:
+            data = gzip.decompress(data)
+        body = gist_body(data.decode("utf-8"), name, description, self.public)
+        response = await self._request(
+            "POST",
+            f"{self.pool.path}/gists",
+            body,
+            {"Content-Type": "application/json"},
+        )
+        return json.loads(response)["files"][name]["raw_url"]
+
+    async def publish(self, data, name=None, compressed=False, description=None):
+        return await super().publish(data, gist_filename(name), compressed, description)
+
+    async def upload(self, graph, filename=None):
+        """
+        Upload one graph as an SVG file in a new gist and return the raw URL
+        of the file.
+        """
+        return await self.publish_graph(graph, filename)
+
+    async def upload_many(self, graphs, filenames=None, return_exceptions=False):
+        """
+        Upload graphs concurrently and return their raw URLs in order. With
+        return_exceptions, a failed upload gives its GistUploadError, and a
+        graph that fails to render its exception, in place of a URL instead
+        of raising it.
+        """
+        return await self.publish_many(
+            graphs, filenames, return_exceptions=return_exceptions
+        )
+
+
+def upload_many(
+    graphs, access_token, filenames=None, return_exceptions=False, **options
+):
+    """
+    Upload graphs to GitHub Gist from synchronous code and return their raw
+    URLs in order. options are passed on to GistUploader.
+    """
+    return publish_many(
+        GistUploader(access_token, **options),
+        graphs,
+        filenames,
+        return_exceptions=return_exceptions,
+    )
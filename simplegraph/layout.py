@@ -0,0 +1,301 @@
+import math
+
+import numpy as np
+
+from .collision import LabelGrid
+
+LAYOUTS = ("circle", "rings", "force")
+
+# Depth of the quadtree, and so the resolution of the Morton codes
+MAX_DEPTH = 16
+
+
+def ring_layout(radii, gap=0.1):
+    """
+    Place circles on concentric rings around the largest one, the largest
+    circles innermost. Neighbours are at least (r1 + r2) * (1 + gap) apart,
+    so no circles overlap. Returns the x and y arrays of the centres,
+    around (0, 0).
+    """
+    radii = np.asarray(radii, dtype=float)
+    x = np.zeros(len(radii))
+    y = np.zeros(len(radii))
+    order = np.argsort(-radii, kind="stable").tolist()
+    if not order:
+        return x, y
+
+    # Ring 0 is the largest circle alone, in the middle
+    outer = radii[order[0]] * (1 + gap)
+    index = 1
+    while index < len(order):
+        ring_radius = outer + radii[order[index]] * (1 + gap)
+        # Fill the ring while the angle between neighbours, and between the
+        # last and the first circle, fits around it
+        members = [order[index]]
+        angles = [0.0]
+        index += 1
+        while index < len(order):
+            previous = radii[members[-1]]
+            current = radii[order[index]]
+            step = _ring_angle(previous, current, ring_radius, gap)
+            closing = _ring_angle(current, radii[members[0]], ring_radius, gap)
+            if angles[-1] + step + closing > 2 * math.pi:
+                break
+            angles.append(angles[-1] + step)
+            members.append(order[index])
+            index += 1
+
+        # Spread out the slack evenly
+        if len(members) > 1:
+            closing = _ring_angle(
+                radii[members[-1]], radii[members[0]], ring_radius, gap
+            )
+            slack = (2 * math.pi - angles[-1] - closing) / len(members)
+            angles = [angle + slack * i for i, angle in enumerate(angles)]
+        angles = np.array(angles)
+        x[members] = ring_radius * np.cos(angles)
+        y[members] = ring_radius * np.sin(angles)
+        outer = ring_radius + radii[members[0]] * (1 + gap)
+    return x, y
+
+
+def _ring_angle(radius1, radius2, ring_radius, gap):
+    # Angle between two circles on a ring whose centres are a chord of
+    # (r1 + r2) * (1 + gap) apart
+    return 2 * math.asin(min(1.0, (radius1 + radius2) * (1 + gap) / (2 * ring_radius)))
+
+
+def _morton_keys(qx, qy):
+    # Interleave the bits of the cell coordinates, so that sorting the keys
+    # sorts the points cell by cell at every depth of the quadtree
+    keys = np.zeros(len(qx), dtype=np.int64)
+    for bit in range(MAX_DEPTH):
+        keys |= ((qx >> bit) & 1) << (2 * bit)
+        keys |= ((qy >> bit) & 1) << (2 * bit + 1)
+    return keys
+
+
+def build_quadtree(x, y, charge):
+    """
+    Build a quadtree over the points, level by level from Morton codes.
+    Returns the size of the root cell, the key of each point and for each
+    level the arrays (keys, counts, mass, centre of mass x and y, first child,
+    end of children) of its cells; the children of a cell are a range of
+    cells on the next level.
+    """
+    left = x.min()
+    top = y.min()
+    size = max(x.max() - left, y.max() - top) or 1.0
+    cells = 1 << MAX_DEPTH
+    qx = np.minimum(((x - left) / size * cells).astype(np.int64), cells - 1)
+    qy = np.minimum(((y - top) / size * cells).astype(np.int64), cells - 1)
+    point_keys = _morton_keys(qx, qy)
+
+    order = np.argsort(point_keys, kind="stable")
+    sorted_keys = point_keys[order]
+    sorted_charge = charge[order]
+    sorted_x = (charge * x)[order]
+    sorted_y = (charge * y)[order]
+
+    levels = []
+    for level in range(MAX_DEPTH + 1):
+        level_keys = sorted_keys >> (2 * (MAX_DEPTH - level))
+        starts = np.flatnonzero(np.r_[True, level_keys[1:] != level_keys[:-1]])
+        mass = np.add.reduceat(sorted_charge, starts)
+        levels.append(
+            [
+                level_keys[starts],
+                np.diff(np.r_[starts, len(x)]),
+                mass,
+                np.add.reduceat(sorted_x, starts) / mass,
+                np.add.reduceat(sorted_y, starts) / mass,
+            ]
+        )
+    for level in range(MAX_DEPTH):
+        parents = levels[level + 1][0] >> 2
+        levels[level].append(np.searchsorted(parents, levels[level][0], "left"))
+        levels[level].append(np.searchsorted(parents, levels[level][0], "right"))
+    return size, point_keys, levels
+
+
+def barnes_hut_repulsion(x, y, charge, theta=0.8):
+    """
+    Return the x and y components of the repulsion on each point from all
+    other points, charge_i * charge_j / distance, in O(n log n). All points
+    walk the quadtree at once: a cell that is small compared to its
+    distance (size / distance < theta) acts as one point at its centre of
+    mass, other cells are opened.
+    """
+    n = len(x)
+    fx = np.zeros(n)
+    fy = np.zeros(n)
+    if n < 2:
+        return fx, fy
+    size, point_keys, levels = build_quadtree(x, y, charge)
+
+    pair_point = np.arange(n)
+    pair_cell = np.zeros(n, dtype=np.int64)
+    for level, cell_arrays in enumerate(levels):
+        if not len(pair_point):
+            break
+        keys, counts, mass, mass_x, mass_y = cell_arrays[:5]
+        dx = x[pair_point] - mass_x[pair_cell]
+        dy = y[pair_point] - mass_y[pair_cell]
+        distance2 = dx * dx + dy * dy
+        cell_size = size / (1 << level)
+        contains = (point_keys[pair_point] >> (2 * (MAX_DEPTH - level))) == keys[
+            pair_cell
+        ]
+        last_level = level == MAX_DEPTH
+        leaf = (counts[pair_cell] == 1) | last_level
+
+        # A leaf that holds the point itself adds nothing; points that share
+        # a cell of the last level are left to the overlap removal
+        accept = ~contains & (leaf | (cell_size * cell_size < theta**2 * distance2))
+        force = charge[pair_point[accept]] * mass[pair_cell[accept]]
+        force /= np.maximum(distance2[accept], 1e-12)
+        fx += np.bincount(pair_point[accept], force * dx[accept], minlength=n)
+        fy += np.bincount(pair_point[accept], force * dy[accept], minlength=n)
+
+        if last_level:
+            break
+        opened = ~accept & ~leaf
+        first_child, end_child = cell_arrays[5], cell_arrays[6]
+        starts = first_child[pair_cell[opened]]
+        child_counts = end_child[pair_cell[opened]] - starts
+        pair_point = np.repeat(pair_point[opened], child_counts)
+        offsets = np.arange(len(pair_point)) - np.repeat(
+            np.cumsum(child_counts) - child_counts, child_counts
+        )
+        pair_cell = np.repeat(starts, child_counts) + offsets
+    return fx, fy
+
+
+def force_layout(radii, edges=(), weights=None, seed=0, iterations=50, gap=0.1):
+    """
+    Place circles with a force-directed layout: circles repel each other in
+    proportion to their radii (computed with barnes_hut_repulsion), edges
+    (pairs of indices) pull their ends together in proportion to their
+    weights and a weak gravity keeps the layout round. The start positions
+    come from seed, and the layout moves for the given number of
+    iterations, less and less each time. Overlaps are then removed. Returns
+    the x and y arrays of the centres, around (0, 0).
+    """
+    radii = np.asarray(radii, dtype=float)
+    n = len(radii)
+    if n < 2:
+        return np.zeros(n), np.zeros(n)
+
+    # Aim for the circles to cover about half of the layout
+    area = max(np.pi * np.sum(((1 + gap) * radii) ** 2), 1e-9)
+    layout_radius = math.sqrt(2 * area / np.pi)
+    ideal_distance = layout_radius * math.sqrt(np.pi / n)
+    charge = np.maximum(radii / max(radii.mean(), 1e-12), 0.1)
+
+    rng = np.random.default_rng(seed)
+    angle = rng.uniform(0, 2 * np.pi, n)
+    distance = layout_radius * np.sqrt(rng.uniform(0, 1, n))
+    x = distance * np.cos(angle)
+    y = distance * np.sin(angle)
+
+    # Loops pull nothing
+    edges = list(edges)
+    weights = [1.0] * len(edges) if weights is None else list(weights)
+    kept = [index for index, (origin, end) in enumerate(edges) if origin != end]
+    edge_weights = np.array([weights[index] for index in kept], dtype=float)
+    if len(edge_weights):
+        edge_weights /= max(edge_weights.max(), 1e-12)
+    edges = np.array([edges[index] for index in kept], dtype=np.int64).reshape(-1, 2)
+
+    temperature = layout_radius / 5
+    for iteration in range(iterations):
+        fx, fy = barnes_hut_repulsion(x, y, charge)
+        fx *= ideal_distance**2
+        fy *= ideal_distance**2
+
+        if len(edges):
+            origins, destinations = edges[:, 0], edges[:, 1]
+            dx = x[destinations] - x[origins]
+            dy = y[destinations] - y[origins]
+            pull = edge_weights * np.hypot(dx, dy) / ideal_distance
+            fx += np.bincount(origins, pull * dx, minlength=n)
+            fy += np.bincount(origins, pull * dy, minlength=n)
+            fx -= np.bincount(destinations, pull * dx, minlength=n)
+            fy -= np.bincount(destinations, pull * dy, minlength=n)
+
+        fx -= charge * x * ideal_distance / layout_radius
+        fy -= charge * y * ideal_distance / layout_radius
+
+        # Move each circle along its force, by at most the temperature
+        strength = np.maximum(np.hypot(fx, fy), 1e-12)
+        step = np.minimum(strength, temperature) / strength
+        x += fx * step
+        y += fy * step
+        temperature *= 1 - 1 / (iterations - iteration + 1)
+
+    x, y = remove_overlaps(x, y, radii, gap)
+    return x - x.mean(), y - y.mean()
+
+
+def _overlapping_pairs(x, y, radii, gap):
+    # Find candidate pairs with a grid of the bounding boxes of the circles
+    reach = radii * (1 + gap)
+    grid = LabelGrid(max(2 * np.median(reach), 1e-9))
+    pairs = []
+    for index, (px, py, r) in enumerate(zip(x.tolist(), y.tolist(), reach.tolist())):
+        for other in grid.query(px - r, py - r, px + r, py + r):
+            pairs.append((other, index))
+        grid.insert(index, px - r, py - r, px + r, py + r)
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.array(pairs, dtype=np.int64)
+    first, second = pairs[:, 0], pairs[:, 1]
+    distance = np.hypot(x[first] - x[second], y[first] - y[second])
+    return pairs[distance < (radii[first] + radii[second]) * (1 + gap)]
+
+
+def remove_overlaps(x, y, radii, gap=0.1, passes=10):
+    """
+    Push overlapping circles apart until neighbours are at least
+    (r1 + r2) * (1 + gap) apart. After a few passes, any overlap that is
+    left is removed by spreading out all centres.
+    """
+    x = np.array(x, dtype=float)
+    y = np.array(y, dtype=float)
+    radii = np.asarray(radii, dtype=float)
+    for _ in range(passes):
+        pairs = _overlapping_pairs(x, y, radii, gap)
+        if not len(pairs):
+            return x, y
+        first, second = pairs[:, 0], pairs[:, 1]
+        dx = x[second] - x[first]
+        dy = y[second] - y[first]
+        distance = np.hypot(dx, dy)
+        # Circles on the same spot are pushed apart in a fixed direction
+        same = distance < 1e-12
+        dx[same] = 1.0
+        dy[same] = 0.0
+        distance[same] = 1.0
+        deficit = (radii[first] + radii[second]) * (1 + gap) - distance
+        # The smaller circle moves further
+        share = radii[first] ** 2 / np.maximum(
+            radii[first] ** 2 + radii[second] ** 2, 1e-12
+        )
+        share[radii[first] + radii[second] == 0] = 0.5
+        move_x = deficit * dx / distance
+        move_y = deficit * dy / distance
+        n = len(x)
+        x -= np.bincount(first, move_x * (1 - share), minlength=n)
+        y -= np.bincount(first, move_y * (1 - share), minlength=n)
+        x += np.bincount(second, move_x * share, minlength=n)
+        y += np.bincount(second, move_y * share, minlength=n)
+
+    pairs = _overlapping_pairs(x, y, radii, gap)
+    if len(pairs):
+        first, second = pairs[:, 0], pairs[:, 1]
+        distance = np.hypot(x[first] - x[second], y[first] - y[second])
+        needed = (radii[first] + radii[second]) * (1 + gap)
+        spread = (needed / np.maximum(distance, 1e-12)).max()
+        x = x.mean() + (x - x.mean()) * spread
+        y = y.mean() + (y - y.mean()) * spread
+    return x, y
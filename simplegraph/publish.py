@@ -0,0 +1,363 @@
+import asyncio
+import concurrent.futures
+import gzip
+import hashlib
+import http.client
+import os
+import pathlib
+import select
+import tempfile
+import threading
+import urllib.parse
+import weakref
+
+# Responses that are worth retrying: rate limits and server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods that can be sent again after a request may have been processed.
+# Other requests, such as a POST that creates a gist, are only retried when
+# they were not sent at all or were rate limited.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+
+class PublishError(Exception):
+    pass
+
+
+class RequestNotSent(Exception):
+    # Raised by HTTPPublisher._send when the request failed before it went
+    # out, with the original error as its cause
+    pass
+
+
+def render_bytes(graph, compress=False):
+    """
+    Render a graph to UTF-8 SVG bytes, gzip-compressed if compress is True.
+    """
+    data = graph.render().encode("utf-8")
+    if compress:
+        # A fixed mtime keeps the bytes, and so their hash, the same
+        data = gzip.compress(data, mtime=0)
+    return data
+
+
+class Publisher:
+    """
+    The base class of publishing backends. A backend stores rendered SVG
+    bytes, raw or gzip-compressed, and returns the URL they can be read
+    from; subclasses implement the coroutine _publish(data, name,
+    compressed, description). Backends that keep no metadata ignore the
+    description.
+
+    At most max_concurrency items are published at a time, and blocking
+    work (rendering, file and network IO) runs on a thread per slot. With
+    deduplicate, bytes that were already published, or are being published,
+    are not sent again: they get the URL of the first copy. Unnamed items
+    are named after the hash of their content. A graph keeps its layout on
+    itself, so one graph is rendered by one thread at a time.
+
+    Use as an async context manager, or call close() when done.
+    """
+
+    def __init__(self, max_concurrency=8, deduplicate=True):
+        self.max_concurrency = max_concurrency
+        self.deduplicate = deduplicate
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_concurrency)
+        self.published = {}
+        self.pending = {}
+        self.semaphore = None
+        self.semaphore_loop = None
+        self.render_locks = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    def _render_locked(self, lock, graph, compress):
+        with lock:
+            return render_bytes(graph, compress)
+
+    async def _render(self, graph, compress):
+        # Locks are only made on the event loop's thread, so no two threads
+        # ever get different locks for one graph
+        lock = self.render_locks.get(graph)
+        if lock is None:
+            lock = self.render_locks[graph] = threading.Lock()
+        return await self._run(self._render_locked, lock, graph, compress)
+
+    def _slot(self):
+        # A semaphore belongs to the event loop it was first used in
+        loop = asyncio.get_running_loop()
+        if self.semaphore_loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.semaphore_loop = loop
+        return self.semaphore
+
+    async def _publish(self, data, name, compressed, description):
+        raise NotImplementedError
+
+    async def _publish_limited(self, *args):
+        async with self._slot():
+            return await self._publish(*args)
+
+    async def publish(self, data, name=None, compressed=False, description=None):
+        """
+        Publish rendered SVG bytes and return their URL. compressed tells
+        whether data is gzip-compressed.
+        """
+        key = hashlib.sha256(data).hexdigest()
+        if name is None:
+            name = f"{key[:16]}.svg" + (".gz" if compressed else "")
+        if not self.deduplicate:
+            return await self._publish_limited(data, name, compressed, description)
+
+        key = (key, compressed)
+        if key in self.published:
+            return self.published[key]
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(
+                self._publish_limited(data, name, compressed, description)
+            )
+        task = self.pending[key]
+        try:
+            url = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self.pending.pop(key, None)
+        self.published[key] = url
+        return url
+
+    async def publish_graph(self, graph, name=None, compress=False):
+        """
+        Render a graph, gzip-compressed if compress is True, and publish it
+        with its title as description.
+        """
+        data = await self._render(graph, compress)
+        return await self.publish(data, name, compress, graph.title)
+
+    async def publish_many(
+        self, graphs, names=None, compress=False, return_exceptions=False
+    ):
+        """
+        Publish graphs concurrently and return their URLs in order. With
+        return_exceptions, a failed item gives its exception in place of a
+        URL instead of raising it.
+        """
+        graphs = list(graphs)
+        names = list(names) if names else [None] * len(graphs)
+        # A graph that is passed more than once is rendered once
+        shared = {}
+        renders = []
+        for graph in graphs:
+            if id(graph) not in shared:
+                shared[id(graph)] = asyncio.ensure_future(self._render(graph, compress))
+            renders.append(shared[id(graph)])
+        del shared
+        # Publish each graph once it and the graphs before it are rendered, so
+        # that of identical graphs the first one is always the copy that is
+        # published. The bytes are not kept once they are published.
+        tasks = []
+        for index, (name, graph) in enumerate(zip(names, graphs)):
+            render = renders[index]
+            renders[index] = None
+            await asyncio.wait([render])
+            if render.exception() is None:
+                tasks.append(
+                    asyncio.ensure_future(
+                        self.publish(render.result(), name, compress, graph.title)
+                    )
+                )
+                continue
+            tasks.append(render)
+            if not return_exceptions:
+                # Raise the error without rendering the rest
+                for other in renders[index + 1 :]:
+                    other.cancel()
+                break
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+
+def publish_many(
+    publisher, graphs, names=None, compress=False, return_exceptions=False
+):
+    """
+    Publish graphs from synchronous code and return their URLs in order.
+    The publisher is closed afterwards.
+    """
+
+    async def main():
+        async with publisher:
+            return await publisher.publish_many(
+                graphs, names, compress, return_exceptions
+            )
+
+    return asyncio.run(main())
+
+
+class DirectoryPublisher(Publisher):
+    """
+    Publishes into a local directory. URLs are base_url followed by the file
+    name, or file: URLs without a base_url.
+    """
+
+    def __init__(self, directory, base_url=None, **options):
+        super().__init__(**options)
+        self.directory = directory
+        self.base_url = base_url.rstrip("/") if base_url else None
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, data, name):
+        # Write to a temporary file first so that readers never see a partial
+        # file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = os.path.join(self.directory, name)
+        os.replace(temp_path, path)
+        return path
+
+    async def _publish(self, data, name, compressed, description):
+        path = await self._run(self._write, data, name)
+        if self.base_url:
+            return f"{self.base_url}/{urllib.parse.quote(name)}"
+        return pathlib.Path(path).resolve().as_uri()
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections to one host. A connection is taken out of
+    the pool for one request at a time and put back once its response has
+    been read, so later requests skip the TCP and TLS handshakes.
+    """
+
+    def __init__(self, url, timeout=30):
+        parts = urllib.parse.urlsplit(url)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.idle = []
+        self.opened = 0
+
+    def acquire(self):
+        while self.idle:
+            connection = self.idle.pop()
+            # An idle connection with something to read was closed by the
+            # server; finding that out after sending a request is too late to
+            # send it again if it is not idempotent
+            sock = connection.sock
+            if sock is None or not select.select([sock], [], [], 0)[0]:
+                return connection
+            connection.close()
+        self.opened += 1
+        return self.connection_class(self.host, self.port, timeout=self.timeout)
+
+    def release(self, connection):
+        self.idle.append(connection)
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
+
+
+class HTTPPublisher(Publisher):
+    """
+    Publishes with an HTTP PUT of each file to base_url followed by its
+    name, over a pool of keep-alive connections. headers are sent with every
+    request, e.g. for authorization. Failed connections, rate limits and
+    server errors are retried up to max_retries times, waiting backoff
+    seconds before the first retry and twice as long before each next one
+    (or as long as the server asks with Retry-After). Requests that are not
+    idempotent are only retried if they were not sent or were rate limited.
+    """
+
+    error_class = PublishError
+
+    def __init__(
+        self,
+        base_url,
+        headers=None,
+        max_retries=3,
+        backoff=0.5,
+        timeout=30,
+        **options,
+    ):
+        super().__init__(**options)
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool = ConnectionPool(base_url, timeout)
+
+    def close(self):
+        super().close()
+        self.pool.close()
+
+    def _send(self, connection, method, path, body, headers):
+        try:
+            connection.request(method, path, body=body, headers=headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise RequestNotSent() from e
+        response = connection.getresponse()
+        return response.status, response.getheader("Retry-After"), response.read()
+
+    async def _request(self, method, path, body, headers):
+        """
+        Send a request, retrying as configured, and return the response
+        body. Raises error_class if the request does not succeed.
+        """
+        headers = {**self.headers, **headers}
+        idempotent = method in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            connection = self.pool.acquire()
+            retry_after = None
+            try:
+                status, retry_after, data = await self._run(
+                    self._send, connection, method, path, body, headers
+                )
+            except RequestNotSent as e:
+                connection.close()
+                error = f"{type(e.__cause__).__name__}: {e.__cause__}"
+            except (OSError, http.client.HTTPException) as e:
+                # The request went out, but its response was lost, e.g. to a
+                # read timeout
+                connection.close()
+                error = f"{type(e).__name__}: {e}"
+                if not idempotent:
+                    break
+            else:
+                self.pool.release(connection)
+                if status < 300:
+                    return data
+                error = f"{status} {data.decode('utf-8', 'replace')}"
+                if status not in RETRY_STATUSES or not (idempotent or status == 429):
+                    break
+
+            if attempt < self.max_retries:
+                delay = self.backoff * 2**attempt
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                await asyncio.sleep(delay)
+        raise self.error_class(f"An exception occurred while publishing: {error}")
+
+    async def _publish(self, data, name, compressed, description):
+        headers = {"Content-Type": "image/svg+xml"}
+        if compressed:
+            headers["Content-Encoding"] = "gzip"
+        name = urllib.parse.quote(name)
+        await self._request("PUT", f"{self.pool.path}/{name}", data, headers)
+        return f"{self.base_url}/{name}"
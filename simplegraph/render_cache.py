@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+
+def spec_key(spec):
+    """
+    The content hash of a GraphSpec, used as its cache key.
+    """
+    digest = hashlib.sha256(spec.graph.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(spec.payload.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    A content-addressed cache of rendered graphs. Entries are keyed on the
+    hash of the graph's spec and the output kind ("svg" or "base64"), so a
+    graph that changes in any way (a new series, a different title or color)
+    misses its old entry, and equal graphs share one.
+
+    Entries live in a bounded in-memory LRU. If a directory is given, they are
+    also written there and read back when they are not in memory, which lets
+    other processes and later runs reuse them. Clear the directory after
+    upgrading simplegraph, as older renders may differ.
+    """
+
+    def __init__(self, max_size=256, directory=None):
+        self.max_size = max_size
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cache = OrderedDict()
+
+    def _path(self, key, kind):
+        return os.path.join(self.directory, f"{key}.{kind}")
+
+    def _remember(self, key, kind, output):
+        self._cache[(key, kind)] = output
+        self._cache.move_to_end((key, kind))
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, kind):
+        """
+        Return the cached output, or None if there is none.
+        """
+        output = self._cache.get((key, kind))
+        if output is not None:
+            self.hits += 1
+            self._cache.move_to_end((key, kind))
+            return output
+
+        if self.directory:
+            try:
+                with open(self._path(key, kind), encoding="utf-8") as f:
+                    output = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self.disk_hits += 1
+                self._remember(key, kind, output)
+                return output
+
+        self.misses += 1
+        return None
+
+    def put(self, key, kind, output):
+        self._remember(key, kind, output)
+        if self.directory:
+            # Write to a temporary file first so that readers never see a
+            # partial entry
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(output)
+            os.replace(temp_path, self._path(key, kind))
+
+    def cache_info(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+            "max_size": self.max_size,
+        }
+
+    def clear(self):
+        """
+        Empty the cache, including its directory, and reset the statistics.
+        """
+        self._cache.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith((".svg", ".base64")):
+                    os.remove(os.path.join(self.directory, name))
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
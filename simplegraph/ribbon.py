@@ -1,8 +1,13 @@
+import numpy as np
+
 from .base import BaseGraph
+from .color_scale import ColorScale
+from .scene import Line
+from .scene import Path
+from .scene import Rect
 from .utils import human_readable_number
 from .utils import get_adjusted_max
 from .utils import get_adjusted_min
-from .utils import get_color
 from .utils import is_dark
 from .utils import calculate_ticks
 
@@ -13,6 +18,8 @@ class RibbonGraph(BaseGraph):
     series with a different scale is represented by a heatmap.
     """
 
+    _spec_attributes = BaseGraph._spec_attributes + ("x_labels", "num_colors")
+
     def __init__(
         self,
         width=300,
@@ -38,7 +45,12 @@ class RibbonGraph(BaseGraph):
         title_font_size=None,
         element_spacing=None,
         watermark=None,
+        value_label_strategy=None,
         num_colors=2,
+        color_lut_size=None,
+        merge_paths=False,
+        compact=False,
+        precision=2,
     ):
         super().__init__(
             width=width,
@@ -62,6 +74,9 @@ class RibbonGraph(BaseGraph):
             title_font_size=title_font_size,
             element_spacing=element_spacing,
             watermark=watermark,
+            value_label_strategy=value_label_strategy,
+            compact=compact,
+            precision=precision,
         )
         self.bar_width = bar_width
         self.x_labels = []
@@ -69,6 +84,8 @@ class RibbonGraph(BaseGraph):
         self.num_series = 0
         self.color_range = color_range
         self.num_colors = min(num_colors, len(self.colors))
+        self.color_lut_size = color_lut_size
+        self.merge_paths = merge_paths
 
     def add_series(
         self,
@@ -82,29 +99,52 @@ class RibbonGraph(BaseGraph):
         assert self.num_series < 3, "Only three series are allowed"
         self.num_series += 1
 
-    def _draw_ribbon(self, x, y1, y2, width, fill):
+    def _spec_data(self):
+        return {
+            "series": [
+                {
+                    "series": series,
+                    "legend_label": legend_label,
+                    "print_values": print_values,
+                }
+                for series, legend_label, print_values in zip(
+                    self.data, self.legend_labels, self.print_values
+                )
+            ]
+        }
+
+    def _ribbon_path(self, x, y1, y2, width):
         half_width = width / 2
         if y1 < y2:
             diff = y2 - y1
             return (
-                f'<path d="M{x} {y1} v{diff} l{half_width} {half_width} '
+                f"M{x} {y1} v{diff} l{half_width} {half_width} "
                 + f"l{half_width} -{half_width} v-{diff} l-{half_width} "
-                + f'{half_width}" fill="{fill}" />'
+                + f"{half_width}"
             )
         else:
             diff = y1 - y2
             return (
-                f'<path d="M{x} {y2} v{diff} l{half_width} -{half_width} '
+                f"M{x} {y2} v{diff} l{half_width} -{half_width} "
                 + f"l{half_width} {half_width} v-{diff} l-{half_width} "
-                + f'-{half_width}" fill="{fill}" />'
+                + f"-{half_width}"
             )
 
-    def render(self):
-        self._reset_graph()
-        assert self.num_series in [2, 3], "Two or three series are required"
+    def _draw_ribbon(self, x, y1, y2, width, fill):
+        return Path(self._ribbon_path(x, y1, y2, width), fill=fill)
 
-        max_value = max(self.data[0] + self.data[1])
-        min_value = min(self.data[0] + self.data[1])
+    def _compute_layout(self):
+        """
+        Compute everything the drawing needs that does not depend on colors:
+        ranges, ticks and the y positions of the ribbons.
+        """
+        # Series can be lists or any buffer, such as NumPy arrays
+        num_ribbons = len(self.data[0])
+        low_values = np.asarray(self.data[0], dtype=float)
+        high_values = np.asarray(self.data[1], dtype=float)
+        max_value = max(float(low_values.max()), float(high_values.max()))
+        min_value = min(float(low_values.min()), float(high_values.min()))
+        high_values = high_values[:num_ribbons]
 
         color_series_present = (
             True if self.num_series == 3 and self.num_colors > 1 else False
@@ -114,8 +154,9 @@ class RibbonGraph(BaseGraph):
             max_color_range = self.color_range[1]
             min_color_range = self.color_range[0]
         elif color_series_present:
-            max_range = max(self.data[2])
-            min_range = min(self.data[2])
+            color_values = np.asarray(self.data[2], dtype=float)
+            max_range = float(color_values.max())
+            min_range = float(color_values.min())
             # Adjust max and min range to be round numbers
             if max_range >= 0:
                 max_color_range = get_adjusted_max(max_range)
@@ -138,6 +179,47 @@ class RibbonGraph(BaseGraph):
 
         scale_primary = (self.height) / (adjusted_max_value - adjusted_min_value)
 
+        primary_tick_labels = [
+            f"{human_readable_number(tick_value)}" for tick_value in primary_ticks
+        ]
+
+        ys1 = (self.height - (low_values - adjusted_min_value) * scale_primary).tolist()
+        ys2 = (
+            self.height - (high_values - adjusted_min_value) * scale_primary
+        ).tolist()
+
+        return {
+            "num_ribbons": num_ribbons,
+            "color_series_present": color_series_present,
+            "color_range": (
+                (min_color_range, max_color_range) if color_series_present else None
+            ),
+            "primary_ticks": primary_ticks,
+            "primary_tick_labels": primary_tick_labels,
+            "adjusted_min_value": adjusted_min_value,
+            "adjusted_max_value": adjusted_max_value,
+            "scale_primary": scale_primary,
+            "ys1": ys1,
+            "ys2": ys2,
+        }
+
+    def _build_elements(self):
+        self._reset_graph()
+        assert self.num_series in [2, 3], "Two or three series are required"
+
+        layout = self._shared_layout("ribbon", self._compute_layout)
+        num_ribbons = layout["num_ribbons"]
+        color_series_present = layout["color_series_present"]
+        if color_series_present:
+            min_color_range, max_color_range = layout["color_range"]
+        primary_ticks = layout["primary_ticks"]
+        primary_tick_labels = layout["primary_tick_labels"]
+        adjusted_min_value = layout["adjusted_min_value"]
+        adjusted_max_value = layout["adjusted_max_value"]
+        scale_primary = layout["scale_primary"]
+        ys1 = layout["ys1"]
+        ys2 = layout["ys2"]
+
         if color_series_present:
             self.defs.append(
                 "<linearGradient id='legend_grad' x1='0%' y1='0%' x2='0%' y2='100%'>"
@@ -160,9 +242,12 @@ class RibbonGraph(BaseGraph):
                 legend_ribbon_color = self.colors[int(self.num_colors / 2)]
 
             self.svg_elements.append(
-                f'<path d="M{top_legend_x} {top_legend_y} h{third_graph_width} '
-                + f"l{half_bar_width} {half_bar_width} l-{half_bar_width} {half_bar_width} "
-                + f'h-{third_graph_width} l{half_bar_width} -{half_bar_width}" fill="{legend_ribbon_color}" />'
+                Path(
+                    f"M{top_legend_x} {top_legend_y} h{third_graph_width} "
+                    + f"l{half_bar_width} {half_bar_width} l-{half_bar_width} {half_bar_width} "
+                    + f"h-{third_graph_width} l{half_bar_width} -{half_bar_width}",
+                    fill=legend_ribbon_color,
+                )
             )
             self.most_extreme_dimensions["top"] = min(
                 top_legend_y - half_bar_width, self.most_extreme_dimensions["top"]
@@ -195,7 +280,13 @@ class RibbonGraph(BaseGraph):
                 right_legend_y_middle = right_legend_y + self.height / 2
 
                 self.svg_elements.append(
-                    f'<rect x="{right_legend_x}" y="{right_legend_y}" width="{self.bar_width}" height="{self.height}" fill="url(#legend_grad)" />'
+                    Rect(
+                        right_legend_x,
+                        right_legend_y,
+                        self.bar_width,
+                        self.height,
+                        fill="url(#legend_grad)",
+                    )
                 )
                 self.svg_elements.append(
                     self._generate_text(
@@ -227,96 +318,113 @@ class RibbonGraph(BaseGraph):
                 )
 
         # Draw ribbons
-        num_ribbons = len(self.data[0])
         bar_spacing = (self.width) / (num_ribbons + 1 / 2)
 
-        for index in range(num_ribbons):
-            x = (index + 1 / 2) * bar_spacing
-            y1 = (
-                self.height - (self.data[0][index] - adjusted_min_value) * scale_primary
-            )
-            y2 = (
-                self.height - (self.data[1][index] - adjusted_min_value) * scale_primary
+        if color_series_present:
+            color_scale = ColorScale(
+                self.colors[: self.num_colors],
+                domain=(min_color_range, max_color_range),
+                lut_size=self.color_lut_size,
             )
+            ribbon_colors = color_scale.map(self.data[2][:num_ribbons])
+
+        # With merge_paths, consecutive ribbons of the same color are drawn as
+        # one path, followed by their value labels
+        label_elements = [] if self.merge_paths else self.svg_elements
+        merged_path = []
+        merged_color = None
+
+        value_labels = []
+        for index, (y1, y2) in enumerate(zip(ys1, ys2)):
+            x = (index + 1 / 2) * bar_spacing
             color = self.colors[0]
             if color_series_present:
-                color_val = self.data[2][index]
-                color_range = max_color_range - min_color_range
-                color_percent = (color_val - min_color_range) / color_range
-                color = get_color(color_percent, self.colors[: self.num_colors])
-            self.svg_elements.append(
-                self._draw_ribbon(x, y1, y2, self.bar_width, color)
-            )
-            if self.print_values[0]:
-                if y1 < y2:
-                    self.svg_elements.append(
-                        self._generate_text(
-                            human_readable_number(self.data[0][index]),
-                            x + self.bar_width / 2,
-                            y1,
-                            fill=self.text_color,
-                            anchor="middle",
-                        )
-                    )
-                else:
+                color = ribbon_colors[index]
+            if not self.merge_paths:
+                self.svg_elements.append(
+                    self._draw_ribbon(x, y1, y2, self.bar_width, color)
+                )
+            else:
+                if color != merged_color and merged_path:
                     self.svg_elements.append(
-                        self._generate_text(
-                            human_readable_number(self.data[0][index]),
-                            x + self.bar_width / 2,
-                            y1,
-                            fill=self.text_color,
-                            anchor="middle",
-                        )
+                        Path("".join(merged_path), fill=merged_color)
                     )
+                    merged_path = []
+                merged_color = color
+                merged_path.append(self._ribbon_path(x, y1, y2, self.bar_width))
+            if self.print_values[0]:
+                self._add_value_label(
+                    label_elements,
+                    value_labels,
+                    human_readable_number(self.data[0][index]),
+                    x + self.bar_width / 2,
+                    y1,
+                    self.text_color,
+                )
             if self.print_values[1]:
                 if y2 < y1:
-                    self.svg_elements.append(
-                        self._generate_text(
-                            human_readable_number(self.data[1][index]),
-                            x + self.bar_width / 2,
-                            y2 - self.bar_width / 2 - 7,
-                            fill=self.text_color,
-                            anchor="middle",
-                        )
-                    )
+                    value_y = y2 - self.bar_width / 2 - 7
                 else:
-                    self.svg_elements.append(
-                        self._generate_text(
-                            human_readable_number(self.data[1][index]),
-                            x + self.bar_width / 2,
-                            y2 + self.bar_width / 2 + 5,
-                            fill=self.text_color,
-                            anchor="middle",
-                        )
-                    )
+                    value_y = y2 + self.bar_width / 2 + 5
+                self._add_value_label(
+                    label_elements,
+                    value_labels,
+                    human_readable_number(self.data[1][index]),
+                    x + self.bar_width / 2,
+                    value_y,
+                    self.text_color,
+                )
             if color_series_present and self.print_values[2]:
                 if y1 < y2:
                     y_adjustment = self.bar_width / 4
                 else:
                     y_adjustment = -self.bar_width / 4
                 text_color = "#ffffff" if is_dark(color) else "#000000"
-                self.svg_elements.append(
-                    self._generate_text(
-                        human_readable_number(self.data[2][index]),
-                        x + self.bar_width / 2,
-                        (y1 + y2) / 2 + y_adjustment,
-                        fill=text_color,
-                        anchor="middle",
-                    )
+                self._add_value_label(
+                    label_elements,
+                    value_labels,
+                    human_readable_number(self.data[2][index]),
+                    x + self.bar_width / 2,
+                    (y1 + y2) / 2 + y_adjustment,
+                    text_color,
                 )
 
+        if merged_path:
+            self.svg_elements.append(Path("".join(merged_path), fill=merged_color))
+        if self.merge_paths:
+            self.svg_elements.extend(label_elements)
+
+        if value_labels:
+            self.svg_elements.extend(
+                self._draw_labels(value_labels, self.value_label_strategy)
+            )
+
         # Draw axis
         self.svg_elements.append(
-            f'<line x1="0" y1="0" x2="0" y2="{self.height}" stroke="{self.text_color}" stroke-width="1" />'
+            Line(0, 0, 0, self.height, stroke=self.text_color, stroke_width=1)
         )
         if adjusted_min_value < 0 and adjusted_max_value > 0:
             zero_line = self.height - (0 - adjusted_min_value) * scale_primary
             self.svg_elements.append(
-                f'<line x1="0" y1="{zero_line}" x2="{self.width}" y2="{zero_line}" stroke="{self.text_color}" stroke-width="1" />'
+                Line(
+                    0,
+                    zero_line,
+                    self.width,
+                    zero_line,
+                    stroke=self.text_color,
+                    stroke_width=1,
+                )
             )
         else:
             self.svg_elements.append(
-                f'<line x1="0" y1="{self.height}" x2="{self.width}" y2="{self.height}" stroke="{self.text_color}" stroke-width="1" />'
+                Line(
+                    0,
+                    self.height,
+                    self.width,
+                    self.height,
+                    stroke=self.text_color,
+                    stroke_width=1,
+                )
             )
 
         # Draw x tick labels
@@ -337,9 +445,8 @@ class RibbonGraph(BaseGraph):
                 )
 
         # Draw primary y-axis ticks and values
-        for tick_value in primary_ticks:
+        for tick_value, tick_label in zip(primary_ticks, primary_tick_labels):
             tick_y = self.height - (tick_value - adjusted_min_value) * scale_primary
-            tick_label = f"{human_readable_number(tick_value)}"
 
             self.svg_elements.append(
                 self._generate_text(
@@ -352,7 +459,7 @@ class RibbonGraph(BaseGraph):
                 )
             )
             self.svg_elements.append(
-                f'<line x1="0" y1="{tick_y}" x2="-3" y2="{tick_y}" stroke="{self.text_color}" stroke-width="1" />'
+                Line(0, tick_y, -3, tick_y, stroke=self.text_color, stroke_width=1)
             )
 
         # Draw axis labels
@@ -389,5 +496,3 @@ class RibbonGraph(BaseGraph):
                     rotation=-90,
                 )
             )
-
-        return self._generate_svg()
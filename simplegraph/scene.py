@@ -0,0 +1,364 @@
+# Typed drawing primitives that graphs lay out into, and the serializers that
+# turn them into output. Geometry stays as numbers until it is serialized, so a
+# scene can be inspected, transformed or written in formats other than SVG.
+# Primitives are not changed once made.
+
+# The number of elements serialized into each chunk of SVG output
+ELEMENTS_PER_CHUNK = 256
+
+
+class Primitive:
+    """
+    The base class of scene primitives. fields names the slots of a
+    primitive in the order of its SVG attributes; fill, stroke and
+    stroke_width are left out of the output when None.
+    """
+
+    __slots__ = ("fill", "stroke", "stroke_width")
+    kind = None
+    fields = ()
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.values() == self.values()
+
+    def __hash__(self):
+        return hash((self.kind, self.values()))
+
+    def __repr__(self):
+        arguments = ", ".join(
+            f"{name}={value!r}"
+            for name, value in zip(self.fields, self.values())
+            if value is not None
+        )
+        return f"{type(self).__name__}({arguments})"
+
+
+class Rect(Primitive):
+    __slots__ = ("x", "y", "width", "height")
+    kind = "rect"
+    fields = ("x", "y", "width", "height", "fill", "stroke", "stroke_width")
+
+    def __init__(self, x, y, width, height, fill=None, stroke=None, stroke_width=None):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.fill = fill
+        self.stroke = stroke
+        self.stroke_width = stroke_width
+
+
+class Circle(Primitive):
+    __slots__ = ("cx", "cy", "r")
+    kind = "circle"
+    fields = ("cx", "cy", "r", "fill", "stroke", "stroke_width")
+
+    def __init__(self, cx, cy, r, fill=None, stroke=None, stroke_width=None):
+        self.cx = cx
+        self.cy = cy
+        self.r = r
+        self.fill = fill
+        self.stroke = stroke
+        self.stroke_width = stroke_width
+
+
+class Dot(Circle):
+    """
+    A circle of a categorical dot series. It is written as those always
+    were, with room for the stroke attributes left even when there are none.
+    """
+
+    __slots__ = ()
+
+
+class Line(Primitive):
+    __slots__ = ("x1", "y1", "x2", "y2")
+    kind = "line"
+    fields = ("x1", "y1", "x2", "y2", "fill", "stroke", "stroke_width")
+
+    def __init__(self, x1, y1, x2, y2, stroke=None, stroke_width=None):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+        self.fill = None
+        self.stroke = stroke
+        self.stroke_width = stroke_width
+
+
+class Path(Primitive):
+    __slots__ = ("d",)
+    kind = "path"
+    fields = ("d", "fill", "stroke", "stroke_width")
+
+    def __init__(self, d, fill=None, stroke=None, stroke_width=None):
+        self.d = d
+        self.fill = fill
+        self.stroke = stroke
+        self.stroke_width = stroke_width
+
+
+class Text(Primitive):
+    """
+    A text label at (x, y). anchor and baseline are the SVG text-anchor and
+    dominant-baseline, rotation is in degrees around (x, y) and attributes
+    holds any other SVG attributes.
+    """
+
+    __slots__ = (
+        "x",
+        "y",
+        "text",
+        "font_size",
+        "anchor",
+        "baseline",
+        "rotation",
+        "attributes",
+    )
+    kind = "text"
+    fields = (
+        "x",
+        "y",
+        "text",
+        "font_size",
+        "fill",
+        "anchor",
+        "baseline",
+        "rotation",
+        "attributes",
+    )
+
+    def __init__(
+        self,
+        x,
+        y,
+        text,
+        font_size=10,
+        fill=None,
+        anchor=None,
+        baseline=None,
+        rotation=None,
+        attributes=None,
+    ):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.font_size = font_size
+        self.fill = fill
+        self.stroke = None
+        self.stroke_width = None
+        self.anchor = anchor
+        self.baseline = baseline
+        self.rotation = rotation
+        self.attributes = attributes
+
+    def values(self):
+        values = super().values()
+        if self.attributes:
+            # Keep primitives hashable
+            return values[:-1] + (tuple(self.attributes.items()),)
+        return values
+
+
+class Group(Primitive):
+    """
+    Elements that are written one after the other on one line, without a
+    wrapping <g>, such as a bubble and its inner circle.
+    """
+
+    __slots__ = ("elements",)
+    kind = "group"
+    fields = ("elements",)
+
+    def __init__(self, elements):
+        self.elements = tuple(elements)
+        self.fill = None
+        self.stroke = None
+        self.stroke_width = None
+
+
+class Scene:
+    """
+    Everything a graph draws: the viewBox (left, top, width, height) of the
+    drawing, its background color, SVG definitions such as gradients and the
+    elements in drawing order. Elements are primitives, or SVG snippets
+    (such as watermarks) that are written as they are. Each element is
+    written on a line of its own; bars of no height leave an empty snippet,
+    and so an empty line.
+    """
+
+    __slots__ = ("viewbox", "background_color", "defs", "elements")
+
+    def __init__(self, viewbox, background_color=None, defs=None, elements=None):
+        self.viewbox = viewbox
+        self.background_color = background_color
+        self.defs = defs or []
+        self.elements = elements or []
+
+
+def _svg_style(element):
+    style = ""
+    if element.fill is not None:
+        style += f' fill="{element.fill}"'
+    if element.stroke is not None:
+        style += f' stroke="{element.stroke}"'
+    if element.stroke_width is not None:
+        style += f' stroke-width="{element.stroke_width}"'
+    return style
+
+
+def _svg_rect(element):
+    return (
+        f'<rect x="{element.x}" y="{element.y}" width="{element.width}" '
+        + f'height="{element.height}"{_svg_style(element)} />'
+    )
+
+
+def _svg_circle(element):
+    return (
+        f'<circle cx="{element.cx}" cy="{element.cy}" r="{element.r}"'
+        + f"{_svg_style(element)} />"
+    )
+
+
+def _svg_dot(element):
+    if element.stroke is None:
+        stroke = ""
+    else:
+        stroke = f'stroke="{element.stroke}" stroke-width="{element.stroke_width}"'
+    return (
+        f'<circle cx="{element.cx}" cy="{element.cy}" r="{element.r}" '
+        + f'fill="{element.fill}" {stroke} />'
+    )
+
+
+def _svg_line(element):
+    return (
+        f'<line x1="{element.x1}" y1="{element.y1}" x2="{element.x2}" '
+        + f'y2="{element.y2}"{_svg_style(element)} />'
+    )
+
+
+def _svg_path(element):
+    return f'<path d="{element.d}"{_svg_style(element)} />'
+
+
+def _svg_text(element):
+    x = element.x
+    y = element.y
+    svg = f'<text x="{x}" y="{y}" font-size="{element.font_size}" fill="{element.fill}"'
+    if element.anchor:
+        svg += f' text-anchor="{element.anchor}"'
+    if element.baseline:
+        svg += f' dominant-baseline="{element.baseline}"'
+    if element.rotation:
+        svg += f' transform="rotate({element.rotation} {x} {y})"'
+    if element.attributes:
+        svg += " " + " ".join(f'{k}="{v}"' for k, v in element.attributes.items())
+    return svg + f">{element.text}</text>"
+
+
+def _svg_group(element):
+    return "".join([svg_element(member) for member in element.elements])
+
+
+_SVG_ELEMENTS = {
+    Rect: _svg_rect,
+    Circle: _svg_circle,
+    Dot: _svg_dot,
+    Line: _svg_line,
+    Path: _svg_path,
+    Text: _svg_text,
+    Group: _svg_group,
+}
+
+
+def svg_element(element):
+    """
+    The SVG markup of one scene element.
+    """
+    if isinstance(element, str):
+        return element
+    return _SVG_ELEMENTS[type(element)](element)
+
+
+def svg_open_tag(viewbox, scale=1):
+    # The viewBox keeps the drawing's coordinates; scale only changes the
+    # size it is displayed at
+    left, top, width, height = viewbox
+    viewbox_param = f'viewBox="{left} {top} {width} {height}"'
+    if scale != 1:
+        width *= scale
+        height *= scale
+    return f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' {viewbox_param}>"
+
+
+def iter_svg(scene):
+    """
+    Serialize a scene as an SVG document, yielded in chunks.
+    """
+    yield svg_open_tag(scene.viewbox)
+
+    if scene.defs:
+        yield "<defs>" + scene.defs[0]
+        for definition in scene.defs[1:]:
+            yield "\n" + definition
+        yield "</defs>"
+
+    if scene.background_color:
+        left, top, width, height = scene.viewbox
+        yield (
+            f"<rect x='{left}' y='{top}' width='{width}' height='{height}' "
+            + f"rx='10' ry='10' fill='{scene.background_color}' />"
+        )
+
+    # Elements are joined in batches, which is faster than yielding each
+    elements = scene.elements
+    for start in range(0, len(elements), ELEMENTS_PER_CHUNK):
+        chunk = "\n".join(
+            [
+                (
+                    element
+                    if type(element) is str
+                    else _SVG_ELEMENTS[type(element)](element)
+                )
+                for element in elements[start : start + ELEMENTS_PER_CHUNK]
+            ]
+        )
+        yield "\n" + chunk if start else chunk
+
+    yield "</svg>"
+
+
+def _element_record(element):
+    if isinstance(element, str):
+        return {"kind": "svg", "svg": element}
+    if isinstance(element, Group):
+        return {
+            "kind": "group",
+            "elements": [_element_record(member) for member in element.elements],
+        }
+    record = {"kind": element.kind}
+    for name in element.fields:
+        value = getattr(element, name)
+        if value is not None:
+            record[name] = value
+    return record
+
+
+def scene_to_dict(scene):
+    """
+    Serialize a scene as a dict of plain values that can be written as JSON,
+    e.g. for drawing on a canvas. Each element is a dict with its kind and
+    the fields that are set; SVG snippets have the kind "svg" and groups
+    list their members under "elements".
+    """
+    return {
+        "viewbox": list(scene.viewbox),
+        "background_color": scene.background_color,
+        "defs": list(scene.defs),
+        "elements": [_element_record(element) for element in scene.elements],
+    }
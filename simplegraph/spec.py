@@ -0,0 +1,199 @@
+import json
+import struct
+
+# Type tags of the binary encoding
+_NONE = b"\xc0"
+_FALSE = b"\xc2"
+_TRUE = b"\xc3"
+_INT = b"i"
+_FLOAT = b"f"
+_STR = b"s"
+_LIST = b"l"
+_DICT = b"d"
+_FLOAT_ARRAY = b"a"
+
+_MAGIC = b"SG\x01"
+
+
+def _to_json(value):
+    # NumPy arrays and scalars, array.array and memoryviews all have tolist()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable.")
+
+
+def _canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=_to_json)
+
+
+def _pack_varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _unpack_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _pack(value, out):
+    if value is None:
+        out += _NONE
+    elif value is True:
+        out += _TRUE
+    elif value is False:
+        out += _FALSE
+    elif isinstance(value, int):
+        # Zigzag encoding keeps small negative numbers short
+        out += _INT
+        _pack_varint(value * 2 if value >= 0 else -value * 2 - 1, out)
+    elif isinstance(value, float):
+        out += _FLOAT
+        out += struct.pack("<d", value)
+    elif isinstance(value, str):
+        encoded = value.encode("utf-8")
+        out += _STR
+        _pack_varint(len(encoded), out)
+        out += encoded
+    elif isinstance(value, (list, tuple)):
+        if value and all(type(item) is float for item in value):
+            # Series of floats are stored as one block of doubles
+            out += _FLOAT_ARRAY
+            _pack_varint(len(value), out)
+            out += struct.pack(f"<{len(value)}d", *value)
+        else:
+            out += _LIST
+            _pack_varint(len(value), out)
+            for item in value:
+                _pack(item, out)
+    elif isinstance(value, dict):
+        out += _DICT
+        _pack_varint(len(value), out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        _pack(_to_json(value), out)
+
+
+def _unpack(data, offset):
+    tag = data[offset : offset + 1]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        value, offset = _unpack_varint(data, offset)
+        return (value >> 1 if value % 2 == 0 else -(value + 1 >> 1)), offset
+    if tag == _FLOAT:
+        return struct.unpack_from("<d", data, offset)[0], offset + 8
+    if tag == _STR:
+        length, offset = _unpack_varint(data, offset)
+        return bytes(data[offset : offset + length]).decode("utf-8"), offset + length
+    if tag == _FLOAT_ARRAY:
+        length, offset = _unpack_varint(data, offset)
+        values = struct.unpack_from(f"<{length}d", data, offset)
+        return list(values), offset + 8 * length
+    if tag == _LIST:
+        length, offset = _unpack_varint(data, offset)
+        values = []
+        for _ in range(length):
+            value, offset = _unpack(data, offset)
+            values.append(value)
+        return values, offset
+    if tag == _DICT:
+        length, offset = _unpack_varint(data, offset)
+        values = {}
+        for _ in range(length):
+            key, offset = _unpack(data, offset)
+            values[key], offset = _unpack(data, offset)
+        return values, offset
+    raise ValueError(f"Unknown type tag {tag!r} at offset {offset - 1}.")
+
+
+class GraphSpec:
+    """
+    An immutable description of a graph: the name of its class and its state,
+    i.e. the constructor arguments, the attributes set after construction
+    and the arguments of every add_series, add_bubble or add_arrow call.
+
+    The state is held as canonical JSON, so specs are hashable, compare equal
+    when they describe the same graph and are cheap to send to another
+    process. They can also be encoded as JSON or as a compact binary format.
+    """
+
+    __slots__ = ("graph", "payload")
+
+    def __init__(self, graph, state):
+        object.__setattr__(self, "graph", graph)
+        object.__setattr__(self, "payload", _canonical_json(state))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GraphSpec is immutable.")
+
+    def __reduce__(self):
+        return (_restore_spec, (self.graph, self.payload))
+
+    def __eq__(self, other):
+        if not isinstance(other, GraphSpec):
+            return NotImplemented
+        return self.graph == other.graph and self.payload == other.payload
+
+    def __hash__(self):
+        return hash((self.graph, self.payload))
+
+    def __repr__(self):
+        return f"GraphSpec({self.graph!r}, {self.payload[:60]!r}...)"
+
+    @property
+    def state(self):
+        # A fresh copy, so the spec itself cannot be changed through it
+        return json.loads(self.payload)
+
+    def to_dict(self):
+        return {"graph": self.graph, **self.state}
+
+    @classmethod
+    def from_dict(cls, spec):
+        state = dict(spec)
+        return cls(state.pop("graph"), state)
+
+    def to_json(self):
+        return _canonical_json(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_bytes(self):
+        out = bytearray(_MAGIC)
+        _pack(self.graph, out)
+        _pack(self.state, out)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[: len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not an encoded GraphSpec.")
+        graph, offset = _unpack(data, len(_MAGIC))
+        state, offset = _unpack(data, offset)
+        return cls(graph, state)
+
+
+def _restore_spec(graph, payload):
+    spec = object.__new__(GraphSpec)
+    object.__setattr__(spec, "graph", graph)
+    object.__setattr__(spec, "payload", payload)
+    return spec
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+
+DEFAULT_FONT_FAMILY = "sans-serif"
+
+# Advance of each character relative to an average character. Characters that
+# are not in the table take up one unit.
+ADVANCE_TABLES = {
+    "sans-serif": {
+        **dict.fromkeys("WMmw", 1.2),
+        **dict.fromkeys("lijtfr1.;:,", 0.8),
+    },
+}
+
+
+class TextMetrics:
+    """
+    Estimates the size of rendered text from a per-character advance table.
+    Measurements are kept in a bounded LRU cache keyed on (text, font_size),
+    since graphs measure the same labels over and over.
+    """
+
+    def __init__(
+        self,
+        font_family=DEFAULT_FONT_FAMILY,
+        max_size=4096,
+        char_width=0.6,
+        line_height=1.2,
+    ):
+        if font_family not in ADVANCE_TABLES:
+            raise ValueError(f"No advance table for font family {font_family!r}.")
+        self.font_family = font_family
+        self.advances = ADVANCE_TABLES[font_family]
+        self.max_size = max_size
+        # An average character is about 0.6 times the font size wide, and a
+        # line including spacing is about 1.2 times the font size tall
+        self.char_width = char_width
+        self.line_height = line_height
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def _estimate(self, text, font_size):
+        lines = text.splitlines()
+        advances = self.advances
+
+        # Find the widest line
+        max_chars = 0
+        for line in lines:
+            count = 0
+            for char in line:
+                count += advances.get(char, 1)
+            if count > max_chars:
+                max_chars = count
+
+        estimated_width = max_chars * font_size * self.char_width
+        estimated_height = len(lines) * font_size * self.line_height
+        return estimated_width, estimated_height
+
+    def measure(self, text, font_size):
+        """
+        Return the estimated (width, height) of text at the given font size.
+        """
+        key = (text, font_size)
+        dimensions = self._cache.get(key)
+        if dimensions is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return dimensions
+
+        self.misses += 1
+        dimensions = self._estimate(text, font_size)
+        self._cache[key] = dimensions
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return dimensions
+
+    def measure_many(self, texts, font_size):
+        """
+        Measure a batch of texts (e.g. all tick labels of an axis) at the same
+        font size. Returns a list of (width, height) in the order given.
+        """
+        return [self.measure(text, font_size) for text in texts]
+
+    def cache_info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "max_size": self.max_size,
+        }
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_text_metrics = {}
+
+
+def get_text_metrics(font_family=DEFAULT_FONT_FAMILY):
+    """
+    Return the shared TextMetrics instance for a font family.
+    """
+    if font_family not in _text_metrics:
+        _text_metrics[font_family] = TextMetrics(font_family)
+    return _text_metrics[font_family]
@@ -1,7 +1,8 @@
 import math
-import matplotlib
 import numpy as np
 
+from .text_metrics import get_text_metrics
+
 
 def polar_to_cartesian(angle, radius, x=0, y=0):
     x = x + radius * math.cos(angle)
@@ -10,38 +11,7 @@ def polar_to_cartesian(angle, radius, x=0, y=0):
 
 
 def estimate_text_dimensions(text, font_size):
-    # Split the text into lines
-    lines = text.splitlines()
-
-    # Define a list of "big" characters that take up more space
-    wide_chars = {"W", "M", "m", "w"}
-
-    # And a list of narrower ones
-    narrow_chars = {"l", "i", "j", "t", "f", "r", "1", ".", ";", ":", ","}
-
-    # Find the widest line
-    max_chars = 0
-    for line in lines:
-        count = 0
-        for char in line:
-            if char in wide_chars:
-                count += 1.2  # Assign a factor of 1.2 for wider characters
-            elif char in narrow_chars:
-                count += 0.8  # Assign a factor of 0.8 for narrower characters
-            else:
-                count += 1  # Normal characters get a factor of 1
-        if count > max_chars:
-            max_chars = count
-
-    # Assume each character is about 0.6 times the font size (this is a rough approximation)
-    estimated_width = max_chars * font_size * 0.6
-
-    # The height of a single line of text is roughly equal to the font size.
-    # For multiple lines, multiply by the number of lines.
-    # Include line spacing by multiplying the font size by a factor (e.g., 1.2).
-    estimated_height = len(lines) * font_size * 1.2
-
-    return estimated_width, estimated_height
+    return get_text_metrics().measure(text, font_size)
 
 
 def boxes_overlap(x1, y1, width1, height1, x2, y2, width2, height2):
@@ -70,12 +40,37 @@ def boxes_overlap(x1, y1, width1, height1, x2, y2, width2, height2):
         return bottom2 - top1
 
 
+def hex2color(color):
+    """
+    Convert a color to an (r, g, b) tuple of floats between 0 and 1. Hex
+    colors ("#rrggbb", "#rgb", or with an alpha channel, which is dropped)
+    are converted directly; anything else, e.g. a named color, is handed to
+    matplotlib, which is only imported when needed.
+    """
+    digits = color[1:] if color.startswith("#") else None
+    if digits is not None and len(digits) in (3, 4):
+        digits = "".join(digit * 2 for digit in digits)
+    if digits is not None and len(digits) in (6, 8):
+        try:
+            return tuple(int(digits[i : i + 2], 16) / 255 for i in (0, 2, 4))
+        except ValueError:
+            pass
+
+    import matplotlib.colors
+
+    return matplotlib.colors.to_rgb(color)
+
+
+def rgb2hex(rgb):
+    return "#" + "".join(format(round(value * 255), "02x") for value in rgb)
+
+
 def get_color(val, colors):
     # Convert hex colors to RGB
-    rgbs = [np.array(matplotlib.colors.hex2color(color)) for color in colors]
+    rgbs = [hex2color(color) for color in colors]
 
     # Assign values to color ranges
-    ranges = np.linspace(0, 1, len(colors))
+    ranges = np.linspace(0, 1, len(colors)).tolist()
 
     # If value is outside the defined range, use the edge colors.
     if val <= 0:
@@ -91,12 +86,14 @@ def get_color(val, colors):
         # Perform interpolation if val falls within the adjusted ranges
         if low_range <= val < high_range:
             t = (val - low_range) / (high_range - low_range)
-            color = rgbs[i] * (1 - t) + rgbs[i + 1] * t
+            color = [
+                low * (1 - t) + high * t for low, high in zip(rgbs[i], rgbs[i + 1])
+            ]
             break
     else:
         color = rgbs[0]  # default to the first color if no range found
 
-    return matplotlib.colors.rgb2hex(color)
+    return rgb2hex(color)
 
 
 def hex_to_rgba(hex_color, alpha=1.0):
@@ -0,0 +1,41 @@
+from simplegraph import BubbleAndArrowGraph
+from simplegraph import CategoricalGraph
+from simplegraph import RibbonGraph
+
+
+def categorical(**kwargs):
+    graph = CategoricalGraph(
+        width=600, height=400, title="Title", primary_y_axis_label="Y", **kwargs
+    )
+    graph.x_labels = ["A", "B", "C", "D"]
+    graph.add_series([10.25, -20, 30, 5], legend_label="Bars", print_values=True)
+    graph.add_series([15, 5, 12.5, 7], legend_label="Other")
+    graph.add_series([5, 15, 10, 1 / 3], series_type="line", secondary=True)
+    graph.add_series([1, 2, 3, 4], series_type="dot", print_values=True)
+    return graph
+
+
+def ribbon(**kwargs):
+    graph = RibbonGraph(width=600, height=400, **kwargs)
+    graph.x_labels = ["A", "B", "C"]
+    graph.add_series([10, 20, 30], legend_label="Low", print_values=True)
+    graph.add_series([20, 30, 40], legend_label="High", print_values=True)
+    graph.add_series([-10, 20, 5], legend_label="Color")
+    return graph
+
+
+def bubbles(**kwargs):
+    graph = BubbleAndArrowGraph(width=400, height=400, **kwargs)
+    graph.add_bubble(100, text="Bubble 0", label="big")
+    graph.add_bubble(50, inner_size=25, text="Bubble 1")
+    graph.add_bubble(70, text="Bubble 2")
+    graph.add_bubble(30, text="Bubble 3")
+    graph.add_arrow("big", 1, 60)
+    graph.add_arrow(1, 2, 20)
+    graph.add_arrow(2, "big", 30)
+    graph.add_arrow(3, 1, 10)
+    graph.add_arrow(1, 1, 5)
+    return graph
+
+
+EXAMPLES = [categorical, ribbon, bubbles]
@@ -0,0 +1,46 @@
+import random
+
+from simplegraph.arrows import arrow_paths
+
+from benchmarks.arrows import draw_arrow
+from benchmarks.arrows import paths_match
+
+
+def random_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        x1, y1 = rng.uniform(0, 400), rng.uniform(0, 400)
+        # Every fifth arrow points to its origin
+        x2, y2 = (x1, y1) if index % 5 == 0 else (rng.uniform(0, 400), 50.0)
+        rows.append(
+            [
+                x1,
+                y1,
+                x2,
+                y2,
+                200.0,
+                rng.choice([200.0, 150.5]),
+                rng.uniform(0, 30),
+                rng.uniform(0, 80),
+                rng.uniform(-20, 20),
+            ]
+        )
+    return rows
+
+
+def test_arrow_paths_match_scalar():
+    rows = random_rows(500)
+    scalar = [draw_arrow(*row) for row in rows]
+    vectorized = arrow_paths(rows)
+    assert paths_match(scalar, vectorized, tolerance=1e-9)
+    # The trigonometry is the same, so the paths are too
+    assert scalar == vectorized
+    assert not paths_match(scalar, vectorized[1:] + vectorized[:1])
+    assert arrow_paths([]) == []
+
+
+def test_paths_match_tolerance():
+    assert paths_match(["M 1.0,2.0 z "], ["M 1.0,2.0000001 z "], tolerance=1e-6)
+    assert not paths_match(["M 1.0,2.0 z "], ["M 1.0,2.0000001 z "], tolerance=1e-9)
+    assert not paths_match(["M 1.0,2.0 z "], ["L 1.0,2.0 z "])
@@ -0,0 +1,72 @@
+import pytest
+
+from simplegraph.batch import build_graph
+from simplegraph.batch import render_many
+
+
+def categorical_spec(offset):
+    return {
+        "graph": "CategoricalGraph",
+        "kwargs": {"width": 600, "height": 400, "title": f"Chart {offset}"},
+        "attributes": {"x_labels": ["A", "B", "C"], "x_axis_label": "X Axis"},
+        "series": [
+            {"series": [offset, 20, 30], "legend_label": "Series 1"},
+            {"series": [5, offset, 10], "series_type": "line"},
+        ],
+    }
+
+
+SPECS = [
+    categorical_spec(1),
+    {
+        "graph": "RibbonGraph",
+        "kwargs": {"width": 600, "height": 400},
+        "series": [
+            {"series": [10, 20, 30], "print_values": True},
+            {"series": [20, 30, 40]},
+            {"series": [-10, 20, 5]},
+        ],
+    },
+    # A ribbon graph needs at least two series
+    {"graph": "RibbonGraph", "series": [{"series": [1, 2, 3]}]},
+    {
+        "graph": "BubbleAndArrowGraph",
+        "kwargs": {"width": 400, "height": 400},
+        "bubbles": [
+            {"size": 100, "text": "Bubble 0", "label": "big"},
+            {"size": 50, "inner_size": 25, "text": "Bubble 1"},
+        ],
+        "arrows": [{"origin": "big", "destination": 1, "size": 60}],
+    },
+    categorical_spec(2),
+]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_render_many_in_order(workers):
+    results = list(render_many(SPECS, workers=workers, chunksize=2))
+
+    assert [result.index for result in results] == list(range(len(SPECS)))
+    for result, spec in zip(results, SPECS):
+        if result.index == 2:
+            assert result.output is None
+            assert "AssertionError" in result.error
+        else:
+            assert result.error is None
+            assert result.output == build_graph(spec).render()
+
+
+def test_render_many_as_completed():
+    specs = [categorical_spec(i) for i in range(10)]
+    results = list(render_many(specs, workers=2, ordered=False, output="base64"))
+
+    assert sorted(result.index for result in results) == list(range(10))
+    for result in results:
+        assert result.output == build_graph(specs[result.index]).to_base64_src()
+
+
+def test_unknown_graph_and_output():
+    with pytest.raises(ValueError):
+        build_graph({"graph": "PieGraph"})
+    with pytest.raises(ValueError):
+        list(render_many(SPECS, output="png"))
@@ -0,0 +1,103 @@
+from simplegraph.categorical import categorical_ranges
+
+from benchmarks.arrows import arrow_graph
+from benchmarks.arrows import compare_arrows
+from benchmarks.arrows import compare_geometry
+from benchmarks.harness import compare
+from benchmarks.harness import measure
+from benchmarks.import_time import IMPORT_TIME_BUDGET
+from benchmarks.import_time import measure_import_time
+from benchmarks.publish import compare_publishing
+from benchmarks.ranges import range_data
+from benchmarks.ranges import reference_ranges
+from benchmarks.variants import compare_variants
+from benchmarks.variants import separate_graph
+from benchmarks.workloads import get_workloads
+
+
+def test_workloads_render():
+    for workload in get_workloads("quick"):
+        if "-10x" in workload.name or workload.name.startswith(
+            ("ribbon-10", "bubble-10")
+        ):
+            result = measure(workload, repeat=1)
+            assert result["svg_bytes"] > 0
+            assert result["peak_memory"] > 0
+            assert 0 < result["compact_bytes"] < result["svg_bytes"]
+
+
+def test_compare():
+    baseline = {
+        "a": {"time": 1.0, "peak_memory": 100, "svg_bytes": 10},
+        "b": {"time": 1.0, "peak_memory": 100, "svg_bytes": 10},
+        "gone": {"time": 1.0, "peak_memory": 100, "svg_bytes": 10},
+    }
+    results = {
+        "a": {"time": 1.05, "peak_memory": 150, "svg_bytes": 10},
+        "b": {"time": 0.5, "peak_memory": 100, "svg_bytes": 12},
+        "new": {"time": 1.0, "peak_memory": 100, "svg_bytes": 10},
+    }
+    assert compare(baseline, results, threshold=0.1) == [
+        ("a", "peak_memory", 100, 150, "regression"),
+        ("b", "time", 1.0, 0.5, "improvement"),
+        ("b", "svg_bytes", 10, 12, "changed"),
+    ]
+
+
+def test_import_does_not_load_matplotlib():
+    seconds, modules = measure_import_time(repeat=3)
+    assert "simplegraph" in modules
+    assert "matplotlib" not in modules
+    # Slack for slow and busy CI machines
+    assert seconds < 2 * IMPORT_TIME_BUDGET
+
+
+def test_ranges_match_reference():
+    data, series_types, secondary = range_data(50, 6)
+    for flags in [secondary, [False] * 6, [True] * 5 + [False]]:
+        for stacked in [False, True]:
+            if stacked and len({flags[i] for i in range(5)}) > 1:
+                continue
+            expected = reference_ranges(data, series_types, flags, stacked)
+            assert categorical_ranges(data, series_types, flags, stacked) == expected
+
+
+def test_compare_publishing():
+    rows = compare_publishing(charts=3, latency=0, concurrency=(2,))
+    assert [name for name, *_ in rows] == [
+        "serial urllib",
+        "publisher x2",
+        "publisher x2 gzip",
+    ]
+    (_, _, _, serial_connections, raw_bytes), _, (*_, gzip_bytes) = rows
+    assert serial_connections == 3
+    assert all(requests == 3 for _, _, requests, _, _ in rows)
+    assert gzip_bytes < raw_bytes
+
+
+def test_compare_arrows():
+    rows = compare_arrows(bubbles=20, arrows=500, repeat=1)
+    (_, _, all_flows, all_bytes), (_, _, flows, size), _ = rows
+    assert all_flows == 500
+    assert flows < all_flows and size < all_bytes
+
+
+def test_compare_geometry():
+    scalar, vectorized, _ = compare_geometry(20, 300, repeat=1)
+    assert scalar > 0 and vectorized > 0
+
+
+def test_compare_variants():
+    variants = [{"dark_mode": True, "width": 400}, {"width": 1200}]
+    rows = compare_variants(variants, repeat=1)
+    assert [name for name, *_ in rows] == ["categorical", "ribbon", "bubble"]
+    assert all(separate > 0 and shared > 0 for _, separate, shared in rows)
+
+
+def test_separate_graph():
+    graph = arrow_graph(5, 10)
+    other = separate_graph(graph, {"dark_mode": True, "width": 400})
+    assert (other.width, other.height, other.dark_mode) == (400, 400, True)
+    assert graph.render_variants([{"dark_mode": True}]) == [
+        separate_graph(graph, {"dark_mode": True}).render()
+    ]
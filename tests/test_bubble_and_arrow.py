@@ -112,3 +112,53 @@ def test_bubble_and_arrow_graph():
     svg_base64 = graph.to_base64_src()
 
     print(f"\n<img src='{svg_base64}' />")
+
+
+def test_aggregate_arrows():
+    graph = BubbleAndArrowGraph(min_arrow_size=10)
+    for size in (100, 50, 25):
+        graph.add_bubble(size, text=str(size))
+    graph.add_arrow(0, 1, 6)
+    graph.add_arrow(0, 1, 6)
+    graph.add_arrow(0, 2, 3)
+    graph.add_arrow(0, 0, 2)
+    graph.add_arrow(1, 2, 30)
+    graph.add_arrow(2, 0, 1)
+    svg = graph.render()
+
+    # Duplicates add up, small flows merge into one other flow per origin
+    assert graph.drawn_arrows == [[0, 1, 12], [0, None, 5], [1, 2, 30], [2, None, 1]]
+    assert svg.count(" z ") == 4
+
+    bundled = BubbleAndArrowGraph.from_spec(graph.to_spec())
+    bundled.bundle_strength = 1
+    assert bundled.render() != svg
+    assert bundled.drawn_arrows == graph.drawn_arrows
+
+
+def test_arrow_index():
+    graph = BubbleAndArrowGraph()
+    graph.add_bubble(100, None, "Bubble 0", label="first")
+    graph.add_bubble(50, None, "Bubble 1")
+    graph.add_arrow(1, 1, 5)
+    graph.add_arrow(1, "first", 10)
+    graph.add_arrow("first", 1, 20)
+    graph.add_arrow(1, 0, 15)
+    # Labels of bubbles added later are resolved when rendering
+    graph.add_arrow("last", 0, 25)
+    graph.add_bubble(25, None, "Bubble 2", label="last")
+    assert graph.total_arrow_width_from_origin == {0: 20, 1: 30}
+    assert graph.pending_arrows == [4]
+
+    svg = graph.render()
+    expected = [[0, 1, 20], [1, 1, 5], [1, 0, 10], [1, 0, 15], [2, 0, 25]]
+    assert graph.drawn_arrows == expected
+    assert graph.total_arrow_width_from_origin == {0: 20, 1: 30, 2: 25}
+    # Rendering leaves the arrows as added, and reuses their order
+    assert graph.arrows[1] == [1, "first", 10]
+    assert graph.render() == svg
+    assert graph.drawn_arrows is graph.arrow_order
+
+    graph.add_arrow(0, "missing", 5)
+    with pytest.raises(KeyError):
+        graph.render()
@@ -1,3 +1,7 @@
+import array
+import re
+
+import numpy as np
 import pytest
 
 from simplegraph.categorical import CategoricalGraph
@@ -74,3 +78,148 @@ def test_categorical_graph():
 
     stacked_base64 = graph.to_base64_src()
     print(f"\n<img src='{stacked_base64}' />")
+
+
+def test_incremental_render():
+    def make_graph(incremental, num_series):
+        graph = CategoricalGraph(
+            width=600, height=400, title="Incremental", incremental=incremental
+        )
+        graph.x_labels = ["A", "B", "C", "D", "E"]
+        series = [
+            ([10, 20, -30, 40, 50], "bar"),
+            ([5, 35, 10, 33, 40], "line"),
+            ([15, 0, -5, 44, 36], "dot"),
+            ([100, 120, 130, 140, 150], "line"),
+        ]
+        for values, series_type in series[:num_series]:
+            graph.add_series(values, series_type=series_type, print_values=True)
+        return graph
+
+    graph = make_graph(True, 2)
+    computed_rows = []
+    series_geometry = graph._series_geometry
+    graph._series_geometry = lambda *args, **kwargs: (
+        computed_rows.append(kwargs["rows"]) or series_geometry(*args, **kwargs)
+    )
+    graph.render()
+    assert graph.fragment_misses == 3
+    assert computed_rows == [[0, 1]]
+
+    # A dot series within the current ticks only adds its own elements
+    graph.add_series([15, 0, -5, 44, 36], series_type="dot", print_values=True)
+    svg = graph.render()
+    assert graph.fragment_hits == 3
+    assert graph.fragment_misses == 4
+    assert computed_rows[-1] == [2]
+    assert svg == make_graph(True, 3).render()
+
+    # Same elements as a full render, grouped by series instead of by category
+    full_svg = make_graph(False, 3).render()
+    assert sorted(svg.split("\n")) == sorted(full_svg.split("\n"))
+
+    # New ticks invalidate everything
+    graph.add_series([100, 120, 130, 140, 150], series_type="line", print_values=True)
+    svg = graph.render()
+    assert graph.fragment_hits == 3
+    assert graph.fragment_misses == 9
+    assert computed_rows[-1] == [0, 1, 2, 3]
+    assert svg == make_graph(True, 4).render()
+
+
+def test_merge_paths():
+    def make_graph(merge_paths):
+        graph = CategoricalGraph(width=600, height=400, merge_paths=merge_paths)
+        graph.x_labels = [str(i) for i in range(50)]
+        graph.add_series([i - 10 for i in range(50)], print_values=True)
+        graph.add_series([i % 7 for i in range(50)], series_type="line")
+        graph.add_series([i % 5 for i in range(50)], series_type="dot")
+        return graph
+
+    svg = make_graph(False).render()
+    merged_svg = make_graph(True).render()
+
+    # One path per series instead of one element per cell
+    assert merged_svg.count("<path") == 3
+    assert svg.count("<circle") - merged_svg.count("<circle") == 50
+    assert svg.count("<line") - merged_svg.count("<line") == 49
+    assert len(merged_svg.split("\n")) < len(svg.split("\n")) / 2
+    assert merged_svg.count("<text") == svg.count("<text")
+
+    # The bar path has an outline for every bar except the one of height zero
+    bar_path = re.search(r'<path d="([^"]*)" fill="#73bed3"', merged_svg)[1]
+    rects = re.findall(
+        r'<rect x="([^"]*)" y="([^"]*)" width="[^"]*" height="([^"]*)" fill="#73bed3"',
+        svg,
+    )
+    outlines = re.findall(r"M([^ ]*) ([^h]*)h[^v]*v([^h]*)h", bar_path)
+    assert outlines == rects[: len(outlines)]
+    assert len(outlines) == 49
+
+
+def test_downsample():
+    values = [(i * 37) % 101 for i in range(10000)]
+    graph = CategoricalGraph(width=300, height=200)
+    graph.x_labels = [str(i) if i % 1000 == 0 else None for i in range(10000)]
+    graph.add_series(values, series_type="bar", downsample="max")
+    graph.add_series(values, series_type="line", secondary=True, downsample="lttb")
+    graph.add_series(values, series_type="dot", secondary=True)
+    svg = graph.render()
+
+    # Two categories per pixel of width
+    assert svg.count("<rect") <= 600 + len(graph.legend_labels)
+    assert svg.count("<circle") == 600 + 1
+    assert svg.count("<line") < 1000
+    for i in range(0, 10000, 1000):
+        assert f">{i}</text>" in svg
+    assert len(graph.drawn_data[0]) == 600
+    assert max(graph.drawn_data[0]) == 100
+
+    # Small series are left alone
+    graph = CategoricalGraph(max_categories=100)
+    graph.add_series(values[:100], downsample=True)
+    assert graph._downsample()[0] == graph.data
+
+    restored = CategoricalGraph.from_spec(graph.to_spec())
+    assert restored.downsampling == [True]
+
+
+def test_buffer_series():
+    def make_graph(convert, stacked):
+        graph = CategoricalGraph(stacked=stacked)
+        graph.x_labels = [str(i) for i in range(20)]
+        graph.add_series(convert([i * 1.5 - 10 for i in range(20)]), print_values=True)
+        graph.add_series(convert([float(i % 7) for i in range(20)]))
+        graph.add_series(
+            convert([float(i % 5) for i in range(20)]),
+            series_type="line",
+            secondary=True,
+        )
+        return graph
+
+    for stacked in [False, True]:
+        expected = make_graph(list, stacked).render()
+        for convert in [
+            np.array,
+            lambda values: array.array("d", values),
+            lambda values: memoryview(array.array("d", values)),
+        ]:
+            graph = make_graph(convert, stacked)
+            assert graph.render() == expected
+            assert CategoricalGraph.from_spec(graph.to_spec()).render() == expected
+
+
+def test_invalid_series_type():
+    # An unknown type used to be accepted and draw nothing
+    graph = CategoricalGraph()
+    with pytest.raises(ValueError, match="'dots'"):
+        graph.add_series([1, 2, 3], series_type="dots")
+    assert graph.data == []
+    assert graph.series_types == []
+
+    spec = {
+        "graph": "CategoricalGraph",
+        "series": [{"series": [1, 2, 3], "series_type": "Bar"}],
+    }
+    with pytest.raises(ValueError):
+        CategoricalGraph.from_spec(spec)
@@ -0,0 +1,110 @@
+import random
+import re
+import time
+
+import pytest
+
+from simplegraph import BubbleAndArrowGraph
+from simplegraph import CategoricalGraph
+from simplegraph.collision import resolve_label_collisions
+
+
+def overlaps(a, b, tolerance=1e-9):
+    (x1, y1, w1, h1), (x2, y2, w2, h2) = a, b
+    return (
+        abs(x1 - x2) < (w1 + w2) / 2 - tolerance
+        and abs(y1 - y2) < (h1 + h2) / 2 - tolerance
+    )
+
+
+def random_labels(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(0, 200), rng.uniform(0, 200), rng.uniform(10, 60), 12)
+        for _ in range(count)
+    ]
+
+
+def test_shift_resolves_all_overlaps():
+    labels = random_labels(500)
+    placements = resolve_label_collisions(labels, "shift")
+
+    boxes = [(x, y, w, h) for (x, y), (_, _, w, h) in zip(placements, labels)]
+    assert all(x == label[0] for (x, _), label in zip(placements, labels))
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            assert not overlaps(boxes[i], boxes[j])
+
+
+def test_shift_scales_to_stacked_labels():
+    # Labels at the same spot end up in one stack; moving each label below
+    # the whole stack at once keeps this from being quadratic
+    for count in (500, 8000):
+        labels = [(100, 100, 40, 12)] * count + [(300, 100, 40, 12)]
+        start = time.perf_counter()
+        placements = resolve_label_collisions(labels, "shift")
+        elapsed = time.perf_counter() - start
+        ys = sorted(y for x, y in placements if x == 100)
+        assert ys[0] == 100
+        assert all(b - a >= 12 for a, b in zip(ys, ys[1:]))
+        assert placements[-1] == (300, 100)
+    # Quadratic placement took minutes for 8000 labels
+    assert elapsed < 5
+
+
+def test_hide_keeps_earlier_labels():
+    labels = [(0, 0, 20, 10), (5, 2, 20, 10), (100, 0, 20, 10)]
+    assert resolve_label_collisions(labels, "hide") == [(0, 0), None, (100, 0)]
+
+    with pytest.raises(ValueError):
+        resolve_label_collisions(labels, "scatter")
+
+
+def test_bubble_labels_do_not_overlap():
+    graph = BubbleAndArrowGraph(width=400, height=400)
+    for i in range(30):
+        graph.add_bubble(1, None, f"Bubble {i}")
+    svg = graph.render()
+
+    boxes = [
+        (float(x), float(y), *graph.text_metrics.measure(text, 10))
+        for x, y, text in re.findall(
+            r'<text x="([^"]+)" y="([^"]+)"[^>]*>([^<]+)<', svg
+        )
+    ]
+    assert len(boxes) == 30
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            assert not overlaps(boxes[i], boxes[j])
+
+
+@pytest.mark.parametrize("count", [1, 2])
+def test_few_bubble_labels_stay_on_their_bubbles(count):
+    graph = BubbleAndArrowGraph(width=400, height=400)
+    for i in range(count):
+        graph.add_bubble(10 - i, None, f"Bubble {i}")
+    svg = graph.render()
+
+    centers = re.findall(r'<circle cx="([^"]+)" cy="([^"]+)"', svg)
+    labels = re.findall(r'<text x="([^"]+)" y="([^"]+)"', svg)
+    assert len(labels) == count
+    assert labels == centers
+
+
+@pytest.mark.parametrize("strategy", ["hide", "leader"])
+def test_value_label_strategies(strategy):
+    def make_graph(value_label_strategy):
+        graph = CategoricalGraph(
+            width=100, height=100, value_label_strategy=value_label_strategy
+        )
+        graph.add_series(list(range(30)), series_type="line", print_values=True)
+        graph.add_series(list(range(30)), series_type="dot", print_values=True)
+        return graph.render()
+
+    plain = make_graph(None)
+    placed = make_graph(strategy)
+    if strategy == "hide":
+        assert placed.count("<text") < plain.count("<text")
+    else:
+        assert placed.count("<text") == plain.count("<text")
+        assert 'stroke-width="0.5"' in placed
@@ -0,0 +1,41 @@
+import math
+
+from simplegraph import RibbonGraph
+from simplegraph.color_scale import ColorScale
+from simplegraph.utils import get_color
+
+COLORS = ["#73bed3", "#e8c170", "#a53030", "#75a743"]
+
+
+def test_matches_get_color():
+    values = [-1, 0, 0.1, 1 / 3, 0.5, 0.999, 1, 2, math.nan]
+    for colors in [COLORS, COLORS[:2], COLORS[:1]]:
+        expected = [get_color(value, colors) for value in values]
+        assert ColorScale(colors).map(values) == expected
+
+
+def test_domain():
+    scale = ColorScale(COLORS[:2], domain=(-50, 50))
+    assert scale.map([-50, 0, 50]) == [COLORS[0], get_color(0.5, COLORS[:2]), COLORS[1]]
+
+
+def test_lut():
+    scale = ColorScale(COLORS, lut_size=1024)
+    exact = ColorScale(COLORS)
+    assert scale.map([0, 1 / 3, 2 / 3, 1]) == exact.map([0, 1 / 3, 2 / 3, 1])
+    for color, exact_color in zip(scale.map([0.123, 0.456]), exact.map([0.123, 0.456])):
+        for i in (1, 3, 5):
+            assert abs(int(color[i : i + 2], 16) - int(exact_color[i : i + 2], 16)) <= 1
+
+
+def test_ribbon_lut():
+    graphs = [
+        RibbonGraph(num_colors=4, color_range=(0, 20)),
+        RibbonGraph(num_colors=4, color_range=(0, 20), color_lut_size=257),
+    ]
+    for graph in graphs:
+        graph.add_series([1, 2, 3])
+        graph.add_series([2, 3, 4])
+        graph.add_series([0, 10, 20])
+    # The edges and the middle of the color range fall on table entries
+    assert graphs[0].render() == graphs[1].render()
@@ -0,0 +1,152 @@
+import re
+
+import pytest
+
+from simplegraph.compact import INHERITED_ATTRIBUTES
+from simplegraph.compact import compact_path
+from simplegraph.compact import compact_svg
+from simplegraph.compact import format_number
+from tests.graphs import EXAMPLES
+
+ELEMENT = re.compile(r"<(/?)(\w+)([^>]*?)(/?)>([^<]*)")
+ATTRIBUTE = re.compile(r"([\w:-]+)=(?:\"([^\"]*)\"|'([^']*)')")
+NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)")
+ARGUMENTS = {"m": 2, "l": 2, "h": 1, "v": 1, "c": 6, "q": 4, "a": 7, "z": 0}
+
+
+def path_points(d):
+    # The absolute end point of every path segment
+    tokens = re.findall(r"[A-Za-z]|-?(?:\d+\.?\d*|\.\d+)", d)
+    points = []
+    x = y = start_x = start_y = 0
+    command = None
+    while tokens:
+        if tokens[0].isalpha():
+            command = tokens.pop(0)
+        elif command in "Mm":
+            command = "L" if command == "M" else "l"
+        arguments = [float(tokens.pop(0)) for _ in range(ARGUMENTS[command.lower()])]
+        relative = command.islower()
+        if command in "Zz":
+            x, y = start_x, start_y
+        elif command in "Hh":
+            x = arguments[0] + x * relative
+        elif command in "Vv":
+            y = arguments[0] + y * relative
+        else:
+            x, y = arguments[-2] + x * relative, arguments[-1] + y * relative
+        if command in "Mm":
+            start_x, start_y = x, y
+        points.append((x, y))
+    return points
+
+
+def normalize(name, value):
+    if name == "d":
+        return path_points(value)
+    if re.fullmatch(r"#[0-9a-f]{3}", value):
+        return "#" + "".join(digit * 2 for digit in value[1:])
+    if name == "font-size" or name == "stroke-width":
+        value = value.removesuffix("px")
+    if NUMBER.search(value) and name not in ("fill", "stroke", "style", "offset"):
+        return [float(number) for number in NUMBER.findall(value)]
+    return value
+
+
+def drawn_elements(svg):
+    """
+    Every element with the attributes it is drawn with, after resolving CSS
+    classes and attributes inherited from groups.
+    """
+    rules = {
+        name: dict(item.split(":") for item in body.split(";"))
+        for name, body in re.findall(r"\.(\w+)\{([^}]*)\}", svg)
+    }
+    svg = re.sub(r"<style>.*?</style>", "", svg)
+    elements = []
+    stack = [{}]
+    for closing, tag, attributes, self_closing, text in ELEMENT.findall(svg):
+        if closing:
+            stack.pop()
+            continue
+        attributes = {
+            match[1]: match[2] or match[3] for match in ATTRIBUTE.finditer(attributes)
+        }
+        resolved = {
+            name: value
+            for name, value in stack[-1].items()
+            if name in INHERITED_ATTRIBUTES
+        }
+        resolved.update(rules.get(attributes.pop("class", None), {}))
+        resolved.update(attributes)
+        if tag != "g":
+            elements.append(
+                (
+                    tag,
+                    {name: normalize(name, value) for name, value in resolved.items()},
+                    text.strip(),
+                )
+            )
+        if not self_closing:
+            stack.append(resolved)
+    return elements
+
+
+def assert_close(compact, original):
+    # Numbers may differ by the rounding to two decimals
+    if isinstance(original, (list, tuple)):
+        assert len(compact) == len(original)
+        for compact_item, original_item in zip(compact, original):
+            assert_close(compact_item, original_item)
+    elif isinstance(original, dict):
+        assert compact.keys() == original.keys()
+        for name in original:
+            assert_close(compact[name], original[name])
+    elif isinstance(original, float):
+        assert abs(compact - original) <= 0.0051
+    else:
+        assert compact == original
+
+
+@pytest.mark.parametrize("build", EXAMPLES)
+@pytest.mark.parametrize("dark_mode", [False, True])
+def test_compact_svg_draws_the_same(build, dark_mode):
+    svg = build(dark_mode=dark_mode).render()
+    compact = compact_svg(svg)
+    assert len(compact) < 0.7 * len(svg)
+    assert_close(drawn_elements(compact), drawn_elements(svg))
+
+
+@pytest.mark.parametrize("build", EXAMPLES)
+def test_compact_mode(build):
+    graph = build(compact=True, precision=1)
+    svg = graph.render()
+    assert "<style>" in svg
+    for value in re.findall(r"=\"([^\"]*)\"", svg):
+        assert not re.search(r"\d\.\d\d", value)
+    # Categorical graphs are drawn series by series, in another order
+    expected = drawn_elements(build().render())
+    assert len(drawn_elements(svg)) == len(expected)
+
+
+def test_format_number():
+    assert format_number(0.5, 2) == ".5"
+    assert format_number(-0.5, 2) == "-.5"
+    assert format_number(-0.001, 2) == "0"
+    assert format_number(100, 2) == "100"
+    assert format_number(100.0, 0) == "100"
+    assert format_number(173.33333333333334, 2) == "173.33"
+
+
+def test_compact_path():
+    d = "M10.123 20.456 L30.5 40.25 L30.5 60 Q 40 50 60 70 z m 5 5 h 10.004 v -0.001"
+    compact = compact_path(d, 2)
+    assert compact == "M10.12 20.46L30.5 40.25V60Q40 50 60 70zm5 5h10.01v-.01"
+    assert_close(path_points(compact), path_points(d))
+    assert len(compact_path("M0 0 l5 5 l5 -5 v-30", 2)) == len("M0 0l5 5 5-5v-30")
+    # Path data that is not understood is left alone
+    assert compact_path("M0 0 X1", 2) == "M0 0 X1"
+
+
+def test_unbalanced_svg_is_unchanged():
+    assert compact_svg("<svg><g></svg>") == "<svg><g></svg>"
@@ -0,0 +1,52 @@
+import numpy as np
+
+from simplegraph.downsample import aggregate
+from simplegraph.downsample import bucket_edges
+from simplegraph.downsample import downsample
+from simplegraph.downsample import lttb
+from simplegraph.downsample import min_max
+
+
+def test_bucket_edges():
+    edges = bucket_edges(10, 4)
+    assert edges[0] == 0 and edges[-1] == 10
+    assert len(edges) == 5
+    assert all(np.diff(edges) > 0)
+
+
+def test_lttb_keeps_ends_and_peaks():
+    values = [0] * 100
+    values[37] = 50
+    values[71] = -50
+    selected = lttb(values, bucket_edges(100, 10)).tolist()
+    assert selected[0] == 0 and selected[-1] == 99
+    assert 37 in selected and 71 in selected
+    assert selected == sorted(selected)
+
+
+def test_min_max_keeps_envelope():
+    values = np.sin(np.linspace(0, 20, 1000))
+    edges = bucket_edges(1000, 20)
+    selected = min_max(values, edges)
+    for column in range(10):
+        start, end = edges[2 * column], edges[2 * column + 2]
+        low, high = selected[2 * column : 2 * column + 2]
+        assert start <= low < high < end
+        assert {values[low], values[high]} == {
+            values[start:end].min(),
+            values[start:end].max(),
+        }
+
+    # With an odd number of buckets the last one keeps the last point
+    assert min_max(values, bucket_edges(1000, 21))[-1] == 999
+
+
+def test_aggregate():
+    edges = bucket_edges(6, 3)
+    values = [1, 2, 3, 4, 5, 6]
+    assert aggregate(values, edges, "sum").tolist() == [3, 7, 11]
+    assert aggregate(values, edges, "mean").tolist() == [1.5, 3.5, 5.5]
+    assert aggregate(values, edges, "max").tolist() == [2, 4, 6]
+    # Picked values keep their type
+    assert downsample(values, edges, "minmax") == [1, 4, 6]
+    assert downsample([0.5] + values[1:], edges, "lttb")[0] == 0.5
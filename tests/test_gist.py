@@ -1,8 +1,16 @@
 import unittest
 import urllib.request
 import json
+import http.server
+import threading
+import time
 from unittest.mock import patch, MagicMock
+
+import pytest
+
 from simplegraph import CategoricalGraph
+from simplegraph.gist import GistUploadError
+from simplegraph.gist import upload_many
 
 
 class TestUploadToGithubGist(unittest.TestCase):
@@ -48,5 +56,149 @@ class TestUploadToGithubGist(unittest.TestCase):
         self.assertEqual(actual, expected)
 
 
+class GistHandler(http.server.BaseHTTPRequestHandler):
+    # A stand-in for the gists endpoint, which keeps connections alive
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers), body))
+            server.connections.add(self.client_address)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            status = server.statuses.pop(0) if server.statuses else 201
+        time.sleep(server.delay)
+
+        if status == 201:
+            (filename,) = body["files"]
+            response = {
+                "files": {
+                    filename: {"raw_url": f"https://gist.test/{body['description']}"}
+                }
+            }
+        else:
+            response = {"message": "Try again"}
+        data = json.dumps(response).encode("utf-8")
+        with server.lock:
+            server.active -= 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def gist_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), GistHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.connections = set()
+    server.active = 0
+    server.max_active = 0
+    server.statuses = []
+    server.delay = 0.01
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_graph(title):
+    graph = CategoricalGraph(title=title)
+    graph.x_labels = ["A", "B", "C"]
+    graph.add_series([1, 2, 3], legend_label="Series 1")
+    return graph
+
+
+def test_upload_many(gist_server):
+    graphs = [make_graph(f"Graph {i}") for i in range(20)]
+    urls = upload_many(graphs, "test_token", api_url=gist_server.url, max_concurrency=4)
+    assert urls == [f"https://gist.test/Graph {i}" for i in range(20)]
+
+    assert len(gist_server.requests) == 20
+    # Connections are kept alive and reused, and no more than four uploads
+    # run at a time
+    assert len(gist_server.connections) <= 4
+    assert 1 < gist_server.max_active <= 4
+
+    path, headers, body = gist_server.requests[0]
+    assert path == "/api/gists"
+    assert headers["Authorization"] == "token test_token"
+    assert body["public"] is True
+    (content,) = [file["content"] for file in body["files"].values()]
+    assert content == make_graph(body["description"]).render()
+
+
+def test_upload_same_graph(gist_server):
+    graph = make_graph("Same")
+    graph.x_labels = [str(i) for i in range(500)]
+    graph.data = [[i % 17 for i in range(500)]]
+    urls = upload_many([graph] * 4, "test_token", api_url=gist_server.url)
+    assert urls == ["https://gist.test/Same"] * 4
+    assert len(gist_server.requests) == 1
+    (content,) = [
+        file["content"] for file in gist_server.requests[0][2]["files"].values()
+    ]
+    assert content == graph.render()
+
+
+def test_upload_retries(gist_server):
+    gist_server.statuses = [429, 429]
+    urls = upload_many(
+        [make_graph("Retried")], "test_token", api_url=gist_server.url, backoff=0
+    )
+    assert urls == ["https://gist.test/Retried"]
+    assert len(gist_server.requests) == 3
+
+
+def test_upload_not_repeated(gist_server):
+    # The gist may have been created, so sending it again could create a
+    # second one
+    gist_server.statuses = [503]
+    with pytest.raises(GistUploadError, match="503"):
+        upload_many(
+            [make_graph("Failed")], "test_token", api_url=gist_server.url, backoff=0
+        )
+    assert len(gist_server.requests) == 1
+
+    gist_server.delay = 0.5
+    with pytest.raises(GistUploadError, match="timed out"):
+        upload_many(
+            [make_graph("Slow")],
+            "test_token",
+            api_url=gist_server.url,
+            backoff=0,
+            timeout=0.1,
+        )
+    assert len(gist_server.requests) == 2
+
+
+def test_upload_error(gist_server):
+    gist_server.statuses = [422]
+    with pytest.raises(GistUploadError, match="422"):
+        upload_many([make_graph("Invalid")], "test_token", api_url=gist_server.url)
+    assert len(gist_server.requests) == 1
+
+    gist_server.statuses = [401]
+    results = upload_many(
+        [make_graph("Invalid"), make_graph("Valid")],
+        "test_token",
+        api_url=gist_server.url,
+        max_concurrency=1,
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], GistUploadError)
+    assert results[1] == "https://gist.test/Valid"
+
+
 if __name__ == "__main__":
     unittest.main()
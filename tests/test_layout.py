@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+
+from simplegraph.bubble_and_arrow import BubbleAndArrowGraph
+from simplegraph.layout import barnes_hut_repulsion
+from simplegraph.layout import force_layout
+from simplegraph.layout import remove_overlaps
+from simplegraph.layout import ring_layout
+
+
+def overlaps(x, y, radii, gap=0.1):
+    distance = np.hypot(x[:, None] - x[None], y[:, None] - y[None])
+    np.fill_diagonal(distance, np.inf)
+    # Allow for rounding at exactly the minimum distance
+    return int(np.sum(distance < (radii[:, None] + radii[None]) * (1 + gap) - 1e-9))
+
+
+def random_bubbles(count, seed=0):
+    rng = random.Random(seed)
+    radii = np.array([rng.uniform(1, 30) for _ in range(count)])
+    edges = [(rng.randrange(count), rng.randrange(count)) for _ in range(count)]
+    return radii, edges
+
+
+def test_ring_layout_has_no_overlaps():
+    radii, _ = random_bubbles(500)
+    x, y = ring_layout(radii)
+    assert overlaps(x, y, radii) == 0
+    # The largest bubble is in the middle
+    assert (x[radii.argmax()], y[radii.argmax()]) == (0, 0)
+
+
+def test_barnes_hut_matches_direct_sum():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=(2, 300))
+    charge = rng.uniform(0.5, 2, 300)
+    fx, fy = barnes_hut_repulsion(x, y, charge)
+
+    dx = x[:, None] - x[None]
+    dy = y[:, None] - y[None]
+    distance2 = dx * dx + dy * dy
+    np.fill_diagonal(distance2, np.inf)
+    expected_x = (charge[:, None] * charge[None] * dx / distance2).sum(axis=1)
+    expected_y = (charge[:, None] * charge[None] * dy / distance2).sum(axis=1)
+    error = np.hypot(fx - expected_x, fy - expected_y)
+    assert np.median(error / np.hypot(expected_x, expected_y)) < 0.02
+
+
+def test_force_layout_is_deterministic_and_has_no_overlaps():
+    radii, edges = random_bubbles(1000)
+    x, y = force_layout(radii, edges, seed=3, iterations=20)
+    assert overlaps(x, y, radii) == 0
+
+    again = force_layout(radii, edges, seed=3, iterations=20)
+    assert np.array_equal(x, again[0]) and np.array_equal(y, again[1])
+    other = force_layout(radii, edges, seed=4, iterations=20)
+    assert not np.array_equal(x, other[0])
+
+
+def test_remove_overlaps_separates_stacked_bubbles():
+    radii = np.ones(10)
+    x, y = remove_overlaps(np.zeros(10), np.zeros(10), radii)
+    assert overlaps(x, y, radii) == 0
+
+
+def test_layouts_fill_the_canvas():
+    for layout in ("rings", "force"):
+        graph = BubbleAndArrowGraph(width=600, height=400, layout=layout)
+        for size in range(1, 301):
+            graph.add_bubble(size, size / 2, f"Bubble {size}")
+        for origin in range(300):
+            graph.add_arrow(origin, (origin * 7) % 300, 5)
+        graph.add_arrow(0, 0, 5)
+        svg = graph.render()
+        assert svg.count("<circle") == 600
+
+        positions = graph._calculate_positions()
+        assert min(x - r for x, _, r, _ in positions) >= graph.cx - 300 - 1e-6
+        assert max(x + r for x, _, r, _ in positions) <= graph.cx + 300 + 1e-6
+        assert min(y - r for _, y, r, _ in positions) >= graph.cy - 200 - 1e-6
+        assert max(y + r for _, y, r, _ in positions) <= graph.cy + 200 + 1e-6
+
+        spec_graph = BubbleAndArrowGraph.from_spec(graph.to_spec())
+        assert spec_graph.render() == svg
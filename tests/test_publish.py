@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import http.server
+import os
+import threading
+import urllib.request
+
+import pytest
+
+from simplegraph import CategoricalGraph
+from simplegraph import RibbonGraph
+from simplegraph.publish import DirectoryPublisher
+from simplegraph.publish import HTTPPublisher
+from simplegraph.publish import PublishError
+from simplegraph.publish import publish_many
+
+
+class PutHandler(http.server.BaseHTTPRequestHandler):
+    # A stand-in for a file store that accepts PUT requests and keeps
+    # connections alive
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        server = self.server
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.connections.add(self.client_address)
+            status = server.statuses.pop(0) if server.statuses else 201
+            if status == 201:
+                server.files[self.path] = (dict(self.headers), data)
+        if status is None:
+            # Drop the connection without a response
+            self.close_connection = True
+            return
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def put_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PutHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.files = {}
+    server.connections = set()
+    server.statuses = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/charts"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_graph(value):
+    graph = CategoricalGraph(title=f"Graph {value}")
+    graph.x_labels = ["A", "B", "C"]
+    graph.add_series([1, 2, value])
+    return graph
+
+
+def test_directory_publisher(tmp_path):
+    # Graphs 0 and 2 are the same and are stored once
+    graphs = [make_graph(value) for value in [5, 6, 5]]
+    urls = publish_many(DirectoryPublisher(tmp_path), graphs)
+    assert urls[0] == urls[2] != urls[1]
+    assert len(os.listdir(tmp_path)) == 2
+    with urllib.request.urlopen(urls[1]) as f:
+        assert f.read().decode("utf-8") == graphs[1].render()
+
+    urls = publish_many(
+        DirectoryPublisher(tmp_path, base_url="https://charts.test/"),
+        graphs,
+        names=["a.svg.gz", "b.svg.gz", "c.svg.gz"],
+        compress=True,
+    )
+    assert urls == [
+        "https://charts.test/a.svg.gz",
+        "https://charts.test/b.svg.gz",
+        "https://charts.test/a.svg.gz",
+    ]
+    assert not os.path.exists(tmp_path / "c.svg.gz")
+    with gzip.open(tmp_path / "b.svg.gz") as f:
+        assert f.read().decode("utf-8") == graphs[1].render()
+
+
+def test_same_graph_twice(tmp_path):
+    graph = CategoricalGraph()
+    graph.x_labels = [str(i) for i in range(500)]
+    graph.add_series([i % 17 for i in range(500)], print_values=True)
+    graph.add_series([i % 5 for i in range(500)], series_type="line")
+    expected = graph.render()
+
+    urls = publish_many(DirectoryPublisher(tmp_path), [graph] * 8)
+    assert len(set(urls)) == 1
+    assert os.listdir(tmp_path) == [urls[0].rsplit("/", 1)[1]]
+    with urllib.request.urlopen(urls[0]) as f:
+        assert f.read().decode("utf-8") == expected
+
+    async def publish_twice(publisher):
+        async with publisher:
+            return await asyncio.gather(
+                *(publisher.publish_graph(graph) for _ in range(8))
+            )
+
+    urls = asyncio.run(publish_twice(DirectoryPublisher(tmp_path / "graph")))
+    assert len(set(urls)) == 1
+    assert len(os.listdir(tmp_path / "graph")) == 1
+
+
+def test_failed_render(tmp_path):
+    # A ribbon graph needs two or three series
+    broken = RibbonGraph()
+    broken.add_series([1, 2, 3])
+    graphs = [make_graph(5), broken, make_graph(6)]
+
+    urls = publish_many(DirectoryPublisher(tmp_path), graphs, return_exceptions=True)
+    assert isinstance(urls[1], AssertionError)
+    assert urls[0] != urls[2]
+    assert len(os.listdir(tmp_path)) == 2
+    with urllib.request.urlopen(urls[2]) as f:
+        assert f.read().decode("utf-8") == graphs[2].render()
+
+    with pytest.raises(AssertionError):
+        publish_many(DirectoryPublisher(tmp_path / "raised"), graphs)
+
+
+def test_http_publisher(put_server):
+    graphs = [make_graph(value % 10) for value in range(30)]
+    urls = publish_many(
+        HTTPPublisher(put_server.url, headers={"Authorization": "Bearer test"}),
+        graphs,
+        compress=True,
+    )
+    assert len(set(urls)) == 10
+    assert all(url.startswith(put_server.url + "/") for url in urls)
+    assert len(put_server.files) == 10
+    assert len(put_server.connections) <= 8
+
+    headers, data = put_server.files["/charts/" + urls[3].rsplit("/", 1)[1]]
+    assert headers["Authorization"] == "Bearer test"
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Content-Type"] == "image/svg+xml"
+    assert gzip.decompress(data).decode("utf-8") == graphs[3].render()
+
+
+def test_http_publisher_errors(put_server):
+    put_server.statuses = [500, 503]
+    (url,) = publish_many(
+        HTTPPublisher(put_server.url, backoff=0), [make_graph(1)], names=["one.svg"]
+    )
+    assert url == put_server.url + "/one.svg"
+    assert "/charts/one.svg" in put_server.files
+
+    # PUT is idempotent, so requests whose response was lost are sent again
+    put_server.statuses = [None]
+    (url,) = publish_many(
+        HTTPPublisher(put_server.url, backoff=0), [make_graph(3)], names=["three.svg"]
+    )
+    assert "/charts/three.svg" in put_server.files
+
+    put_server.statuses = [403]
+    with pytest.raises(PublishError, match="403"):
+        publish_many(HTTPPublisher(put_server.url), [make_graph(2)])
@@ -0,0 +1,77 @@
+from simplegraph import BubbleAndArrowGraph
+from simplegraph import CategoricalGraph
+from simplegraph.render_cache import RenderCache
+
+
+def make_graph(cache):
+    graph = CategoricalGraph(width=600, height=400, dark_mode=True)
+    graph.render_cache = cache
+    graph.x_labels = ["A", "B", "C"]
+    graph.add_series([10, 20, 30], legend_label="Series 1")
+    return graph
+
+
+def test_hits_and_invalidation():
+    cache = RenderCache()
+    graph = make_graph(cache)
+
+    svg = graph.render()
+    assert graph.render() == svg
+    assert make_graph(cache).render() == svg
+    assert cache.cache_info()["hits"] == 2
+    assert cache.cache_info()["misses"] == 1
+
+    graph.add_series([5, 15, 10], series_type="line")
+    updated = graph.render()
+    assert updated != svg
+    assert cache.cache_info()["misses"] == 2
+
+    graph.title = "Title"
+    assert graph.render() != updated
+
+    uncached = make_graph(None)
+    uncached.add_series([5, 15, 10], series_type="line")
+    assert uncached.render() == updated
+
+
+def test_layout_of_cached_graph():
+    cache = RenderCache()
+    make_graph(cache).render()
+
+    # A hit does not lay the graph out, but to_scene does
+    graph = make_graph(cache)
+    graph.render()
+    assert cache.cache_info()["hits"] == 1
+    assert graph.svg_elements == []
+    scene = graph.to_scene()
+    assert scene.elements == make_graph(None).to_scene().elements
+
+
+def test_base64_and_eviction():
+    cache = RenderCache(max_size=2)
+    graph = BubbleAndArrowGraph()
+    graph.render_cache = cache
+    graph.add_bubble(100, text="Bubble")
+
+    src = graph.to_base64_src()
+    assert graph.to_base64_src() == src
+    graph.render_cache = None
+    assert graph.to_base64_src() == src
+
+    graph.render_cache = cache
+    graph.add_bubble(50, text="Other")
+    graph.to_base64_src()
+    assert cache.cache_info()["evictions"] == 2
+    assert cache.cache_info()["size"] == 2
+
+
+def test_disk_layer(tmp_path):
+    svg = make_graph(RenderCache(directory=tmp_path)).render()
+
+    cache = RenderCache(directory=tmp_path)
+    assert make_graph(cache).render() == svg
+    assert cache.cache_info()["disk_hits"] == 1
+    assert cache.cache_info()["misses"] == 0
+
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
@@ -1,3 +1,7 @@
+import array
+import re
+
+import numpy as np
 import pytest
 
 from simplegraph.ribbon import RibbonGraph
@@ -38,3 +42,39 @@ def test_ribbon_graph():
     svg_base64 = graph.to_base64_src()
 
     print(f"\n<img src='{svg_base64}' />")
+
+
+def test_merge_paths():
+    def make_graph(merge_paths, color_series):
+        graph = RibbonGraph(width=600, height=400, merge_paths=merge_paths)
+        graph.add_series(list(range(20)), print_values=True)
+        graph.add_series([value * 2 - 5 for value in range(20)])
+        if color_series:
+            graph.add_series([value // 5 for value in range(20)])
+        return graph
+
+    for color_series, num_paths in [(False, 1), (True, 4)]:
+        svg = make_graph(False, color_series).render()
+        merged_svg = make_graph(True, color_series).render()
+
+        # Consecutive ribbons of the same color share a path
+        assert svg.count("<path") == 21
+        assert merged_svg.count("<path") == num_paths + 1
+        merged_d = "".join(re.findall(r'<path d="([^"]*)" fill="#', merged_svg))
+        d = "".join(re.findall(r'<path d="([^"]*)" fill="#', svg))
+        assert merged_d == d
+        assert merged_svg.count("<text") == svg.count("<text")
+
+
+def test_buffer_series():
+    def make_graph(convert):
+        graph = RibbonGraph(width=600, height=400)
+        graph.x_labels = [str(i) for i in range(20)]
+        graph.add_series(convert([float(i) for i in range(20)]), print_values=True)
+        graph.add_series(convert([20.0 - i for i in range(20)]), print_values=True)
+        graph.add_series(convert([i * 0.5 for i in range(20)]))
+        return graph
+
+    expected = make_graph(list).render()
+    for convert in [np.array, lambda values: memoryview(array.array("d", values))]:
+        assert make_graph(convert).render() == expected
@@ -0,0 +1,107 @@
+import json
+
+from simplegraph import BubbleAndArrowGraph
+from simplegraph import CategoricalGraph
+from simplegraph import RibbonGraph
+from simplegraph.scene import Circle
+from simplegraph.scene import Dot
+from simplegraph.scene import Group
+from simplegraph.scene import Line
+from simplegraph.scene import Path
+from simplegraph.scene import Rect
+from simplegraph.scene import Text
+from simplegraph.scene import iter_svg
+from simplegraph.scene import scene_to_dict
+from simplegraph.scene import svg_element
+
+
+def test_svg_elements():
+    assert (
+        svg_element(Rect(1, 2.5, 3, 4, "#ff0000"))
+        == '<rect x="1" y="2.5" width="3" height="4" fill="#ff0000" />'
+    )
+    assert (
+        svg_element(Circle(1, 2, 5, "#ff0000", "#000000", 1))
+        == '<circle cx="1" cy="2" r="5" fill="#ff0000" stroke="#000000" stroke-width="1" />'
+    )
+    assert (
+        svg_element(Line(0, 1, 2, 3, stroke="#000000", stroke_width=0.5))
+        == '<line x1="0" y1="1" x2="2" y2="3" stroke="#000000" stroke-width="0.5" />'
+    )
+    assert (
+        svg_element(Path("M0 0h5v5z", fill="none", stroke="#00ff00"))
+        == '<path d="M0 0h5v5z" fill="none" stroke="#00ff00" />'
+    )
+    assert svg_element(
+        Text(5, 6, "A", 12, "#000000", "end", "middle", -90, {"font-weight": "bold"})
+    ) == (
+        '<text x="5" y="6" font-size="12" fill="#000000" text-anchor="end" '
+        + 'dominant-baseline="middle" transform="rotate(-90 5 6)" font-weight="bold">'
+        + "A</text>"
+    )
+    assert svg_element("<g />") == "<g />"
+
+    # Categorical dots and bubbles are written as they always were
+    assert (
+        svg_element(Dot(1, 2, 5, "#ff0000"))
+        == '<circle cx="1" cy="2" r="5" fill="#ff0000"  />'
+    )
+    assert svg_element(
+        Group([Circle(1, 2, 5, "#ff0000"), Circle(1, 2, 3, "#ffffff")])
+    ) == (
+        '<circle cx="1" cy="2" r="5" fill="#ff0000" />'
+        + '<circle cx="1" cy="2" r="3" fill="#ffffff" />'
+    )
+
+
+def test_primitives_compare_by_value():
+    assert Rect(1, 2, 3, 4, "#ff0000") == Rect(1, 2, 3, 4, fill="#ff0000")
+    assert Rect(1, 2, 3, 4, "#ff0000") != Rect(1, 2, 3, 4, "#00ff00")
+    assert Line(0, 0, 1, 1) != Path("M0 0L1 1")
+    texts = {Text(0, 0, "A", attributes={"a": 1}), Text(0, 0, "A", attributes={"a": 1})}
+    assert len(texts) == 1
+
+
+def test_graph_scenes():
+    categorical = CategoricalGraph(width=400, height=300, title="Title")
+    categorical.x_labels = ["A", "B", "C"]
+    categorical.add_series([10, 0, -5], legend_label="Bars", print_values=True)
+    categorical.add_series([3, 6, 2], legend_label="Dots", series_type="dot")
+
+    ribbon = RibbonGraph(width=400, height=300, watermark="<g />")
+    ribbon.x_labels = ["A", "B", "C"]
+    ribbon.add_series([10, 20, 30])
+    ribbon.add_series([20, 10, 40])
+    ribbon.add_series([1, 2, 3])
+
+    bubbles = BubbleAndArrowGraph(width=400, height=400, background_color="#202020")
+    bubbles.add_bubble(50, 20, "Bubble 0")
+    bubbles.add_bubble(30, None, "Bubble 1")
+    bubbles.add_arrow(0, 1, 10)
+
+    for graph in (categorical, ribbon, bubbles):
+        svg = graph.render()
+        scene = graph.to_scene()
+        assert "".join(iter_svg(scene)) == svg
+
+        record = scene_to_dict(scene)
+        assert json.loads(json.dumps(record)) == record
+        assert len(record["elements"]) == len(scene.elements)
+
+    kinds = {
+        element["kind"] for element in scene_to_dict(categorical.to_scene())["elements"]
+    }
+    assert kinds == {"rect", "circle", "line", "text", "svg"}
+    # The zero value draws no bar, only an empty line
+    assert sum(isinstance(e, Rect) for e in categorical.to_scene().elements) == 3
+    assert "" in categorical.to_scene().elements
+    assert scene_to_dict(ribbon.to_scene())["elements"][-1] == {
+        "kind": "svg",
+        "svg": "<g />",
+    }
+    bubble_record = scene_to_dict(bubbles.to_scene())
+    assert bubble_record["background_color"] == "#202020"
+    # A bubble with an inner circle is one group of two circles
+    group = bubble_record["elements"][1]
+    assert group["kind"] == "group"
+    assert [member["kind"] for member in group["elements"]] == ["circle", "circle"]
@@ -0,0 +1,56 @@
+import pickle
+
+import pytest
+
+from simplegraph import RibbonGraph
+from simplegraph.spec import GraphSpec
+from tests.graphs import EXAMPLES
+from tests.graphs import categorical
+
+
+@pytest.mark.parametrize("make_graph", EXAMPLES)
+def test_round_trip(make_graph):
+    graph = make_graph()
+    spec = graph.to_spec()
+
+    for copy in [
+        GraphSpec.from_json(spec.to_json()),
+        GraphSpec.from_bytes(spec.to_bytes()),
+        GraphSpec.from_dict(spec.to_dict()),
+        pickle.loads(pickle.dumps(spec)),
+    ]:
+        assert copy == spec
+        assert hash(copy) == hash(spec)
+        assert type(graph).from_spec(copy).render() == graph.render()
+
+
+def test_spec_is_immutable():
+    spec = categorical().to_spec()
+    with pytest.raises(AttributeError):
+        spec.graph = "RibbonGraph"
+
+    state = spec.state
+    state["series"].clear()
+    assert spec.state["series"]
+
+
+def test_equal_specs():
+    assert categorical().to_spec() == categorical().to_spec()
+
+    graph = categorical()
+    graph.title = "Other"
+    assert graph.to_spec() != categorical().to_spec()
+
+
+def test_binary_encoding_values():
+    state = {"values": [0, -1, 2**40, -(2**40), 1.5, None, True, False, "é"]}
+    spec = GraphSpec("CategoricalGraph", state)
+    assert GraphSpec.from_bytes(spec.to_bytes()).state == state
+
+    with pytest.raises(ValueError):
+        GraphSpec.from_bytes(b"not a spec")
+
+
+def test_wrong_graph_type():
+    with pytest.raises(ValueError):
+        RibbonGraph.from_spec(categorical().to_spec())
@@ -0,0 +1,57 @@
+import base64
+import gzip
+import io
+from pathlib import Path
+
+import pytest
+
+from tests.graphs import EXAMPLES
+
+GOLDEN = Path(__file__).parent / "golden"
+
+
+def golden(build):
+    # Rendered by render() when it still built one string, before streaming
+    return (GOLDEN / f"{build.__name__}.svg").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("make_graph", EXAMPLES)
+def test_streamed_output_matches_golden(make_graph):
+    expected = golden(make_graph)
+    assert make_graph().render() == expected
+
+    chunks = list(make_graph().iter_render())
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected
+
+    byte_chunks = list(make_graph().iter_render(encoding="utf-8"))
+    assert b"".join(byte_chunks) == expected.encode("utf-8")
+
+    text_file = io.StringIO()
+    make_graph().render_to(text_file)
+    assert text_file.getvalue() == expected
+
+    compressed = io.BytesIO()
+    with gzip.GzipFile(fileobj=compressed, mode="wb") as gzip_file:
+        make_graph().render_to(gzip_file)
+    assert gzip.decompress(compressed.getvalue()).decode("utf-8") == expected
+
+
+@pytest.mark.parametrize("make_graph", EXAMPLES)
+def test_streamed_base64_matches_golden(make_graph):
+    svg = golden(make_graph).encode("utf-8")
+    expected = "data:image/svg+xml;base64," + base64.b64encode(svg).decode("ascii")
+
+    assert make_graph().to_base64_src() == expected
+    assert make_graph().to_base64_bytes() == expected.encode("ascii")
+    # Blocks smaller than the document, and not a multiple of 3
+    chunks = list(make_graph().iter_base64(block_size=100))
+    assert len(chunks) > 2
+    assert b"".join(chunks) == expected.encode("ascii")
+
+    text_file = io.StringIO()
+    make_graph().write_base64_src(text_file)
+    assert text_file.getvalue() == expected
+    binary_file = io.BytesIO()
+    make_graph().write_base64_src(binary_file)
+    assert binary_file.getvalue() == expected.encode("ascii")
@@ -0,0 +1,47 @@
+import pytest
+
+from simplegraph.text_metrics import TextMetrics
+from simplegraph.text_metrics import get_text_metrics
+from simplegraph.utils import estimate_text_dimensions
+
+
+def test_measure_uses_advance_table():
+    metrics = TextMetrics()
+
+    # "W" is wide, "i" is narrow, "a" is an average character
+    assert metrics.measure("W", 10) == pytest.approx((1.2 * 10 * 0.6, 12))
+    assert metrics.measure("i", 10) == pytest.approx((0.8 * 10 * 0.6, 12))
+    assert metrics.measure("a", 10) == pytest.approx((10 * 0.6, 12))
+
+    # The widest line sets the width, every line adds to the height
+    assert metrics.measure("ab\nabcd", 10) == pytest.approx((4 * 10 * 0.6, 24))
+
+
+def test_cache_counters_and_bound():
+    metrics = TextMetrics(max_size=2)
+
+    metrics.measure("A", 10)
+    metrics.measure("A", 10)
+    metrics.measure("A", 12)
+    assert metrics.cache_info() == {"hits": 1, "misses": 2, "size": 2, "max_size": 2}
+
+    # "A" at 10 is the least recently used entry and gets evicted
+    metrics.measure("B", 10)
+    metrics.measure("A", 12)
+    metrics.measure("A", 10)
+    assert metrics.cache_info() == {"hits": 2, "misses": 4, "size": 2, "max_size": 2}
+
+
+def test_measure_many():
+    metrics = TextMetrics()
+    texts = ["0", "25", "50", "25"]
+
+    assert metrics.measure_many(texts, 10) == [metrics.measure(t, 10) for t in texts]
+    assert metrics.misses == 3
+
+
+def test_estimate_text_dimensions_uses_shared_metrics():
+    assert estimate_text_dimensions("Mil", 12) == get_text_metrics().measure("Mil", 12)
+
+    with pytest.raises(ValueError):
+        TextMetrics(font_family="no-such-font")
@@ -0,0 +1,73 @@
+import re
+
+import pytest
+
+from tests.graphs import EXAMPLES
+from tests.graphs import categorical
+
+THEMES = [
+    {},
+    {"dark_mode": True},
+    {"background_color": "#202020"},
+    {"colors": ["#ff0000", "#00ff00", "#0000ff", "#ffff00"]},
+    {"dark_mode": True, "background_color": "#eeeeee"},
+]
+
+
+def size(svg):
+    width, height = re.match(
+        r"<svg [^>]*width='([^']*)' height='([^']*)'", svg
+    ).groups()
+    return float(width), float(height)
+
+
+@pytest.mark.parametrize("build", EXAMPLES)
+def test_themes_match_separate_renders(build):
+    for options in [{}, {"dark_mode": True}, {"compact": True}]:
+        graph = build(**options)
+        svgs = graph.render_variants(THEMES)
+        for theme, svg in zip(THEMES, svgs):
+            assert svg == build(**{**options, **theme}).render()
+        # The graph renders as before afterwards
+        assert graph.render() == build(**options).render()
+
+
+def test_attributes_set_after_construction():
+    colors = ["#ff0000", "#00ff00", "#0000ff", "#ffff00"]
+    graph = categorical()
+    graph.colors = list(colors)
+    svg = graph.render()
+    assert "#ff0000" in svg
+    same, dark = graph.render_variants([{"scale": 1}, {"dark_mode": True}])
+    assert same == svg
+    assert dark == categorical(colors=colors, dark_mode=True).render()
+
+    graph.text_color = "#123456"
+    (light,) = graph.render_variants([{"background_color": "#eeeeee"}])
+    assert 'fill="#123456"' in light
+    assert "#ff0000" in light
+
+
+def test_sizes():
+    graph = categorical()
+    svg = graph.render()
+    width, height = size(svg)
+    scaled, wide, tall, dark = graph.render_variants(
+        [{"scale": 2}, {"width": 1000}, {"height": 130}, {"dark_mode": True}]
+    )
+    assert size(scaled) == (2 * width, 2 * height)
+    assert size(wide)[0] == pytest.approx(1000)
+    assert size(wide)[1] == pytest.approx(1000 * height / width)
+    assert size(tall)[1] == pytest.approx(130)
+    # Only the displayed size changes
+    for variant in (scaled, wide, tall):
+        assert variant.split(">", 1)[1] == svg.split(">", 1)[1]
+    assert size(dark) == (width, height)
+
+
+def test_invalid_variants():
+    graph = categorical()
+    with pytest.raises(ValueError):
+        graph.render_variants([{"font": "Arial"}])
+    with pytest.raises(ValueError):
+        graph.render_variants([{"width": 100, "height": 100}])